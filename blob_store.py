@@ -0,0 +1,287 @@
+"""
+Blob storage for uploaded files (resumes)
+Blobs are content-addressed: the key is the SHA-256 of the content, so the
+same file uploaded twice is stored once, and a stored blob never changes.
+Database rows keep only the hash, size and mime type.
+
+Backends implement the small BlobStore interface; LocalBlobStore keeps
+blobs on local disk. An object store (GCS/S3) can be added as another
+backend without touching the callers.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from collections import namedtuple
+
+CHUNK_SIZE = 64 * 1024
+
+BlobInfo = namedtuple('BlobInfo', ['sha256', 'size', 'mime_type'])
+
+
+class BlobTooLarge(Exception):
+    """Raised when a stream exceeds max_size while being stored"""
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+def sniff_mime_type(head):
+    """Mime type from the first bytes of a file"""
+    if head.startswith(b'%PDF-'):
+        return 'application/pdf'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'PK\x03\x04'):
+        return 'application/zip'
+    return 'application/octet-stream'
+
+
+def is_sha256(key):
+    return len(key) == 64 and all(c in '0123456789abcdef' for c in key)
+
+
+class BlobWriter:
+    """Writable file object that becomes a blob on commit().
+
+    Hashes and counts bytes as they are written and raises BlobTooLarge as
+    soon as max_size is exceeded, so an upload can be streamed straight
+    into the store without buffering it first. Also readable/seekable, as
+    werkzeug expects of upload streams. Closing an uncommitted writer
+    discards it.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.size = 0
+        self.info = None
+        self._digest = hashlib.sha256()
+        self._head = b''
+
+    def write(self, data):
+        if self.info is not None:
+            raise ValueError('blob already committed')
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.discard()
+            raise BlobTooLarge(f'blob exceeds {self.max_size} bytes')
+        if len(self._head) < 16:
+            self._head += bytes(data[:16 - len(self._head)])
+        self._digest.update(data)
+        self._write(data)
+        return len(data)
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def mime_type(self):
+        return sniff_mime_type(self._head)
+
+    def commit(self):
+        """Store the written bytes (idempotent), returns BlobInfo"""
+        if self.info is None:
+            self._commit()
+            self.info = BlobInfo(self.sha256, self.size, self.mime_type)
+        return self.info
+
+    def close(self):
+        if self.info is None:
+            self.discard()
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    def _commit(self):
+        raise NotImplementedError
+
+    def discard(self):
+        raise NotImplementedError
+
+
+class BlobStore:
+    """Interface for blob backends"""
+
+    def writer(self, max_size=None):
+        """BlobWriter for streaming a new blob into the store"""
+        raise NotImplementedError
+
+    def put(self, stream, max_size=None):
+        """Store everything read from a binary stream, returns BlobInfo.
+
+        Reads in chunks, hashing as it goes; raises BlobTooLarge (and stores
+        nothing) as soon as more than max_size bytes have been read.
+        """
+        writer = self.writer(max_size)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return writer.commit()
+        except BaseException:
+            writer.discard()
+            raise
+
+    def open(self, sha256):
+        """Binary file object for a blob, raises BlobNotFound"""
+        raise NotImplementedError
+
+    def local_path(self, sha256):
+        """Filesystem path of a blob if the backend has one (else None), so
+        it can be served with sendfile / Range support"""
+        return None
+
+    def exists(self, sha256):
+        raise NotImplementedError
+
+    def delete(self, sha256):
+        raise NotImplementedError
+
+    def modified_at(self, sha256):
+        """Unix time the blob was written, raises BlobNotFound"""
+        raise NotImplementedError
+
+    def keys(self):
+        """Iterate over the hashes of all stored blobs"""
+        raise NotImplementedError
+
+    def put_bytes(self, data, max_size=None):
+        return self.put(io.BytesIO(data), max_size=max_size)
+
+    def read_bytes(self, sha256):
+        with self.open(sha256) as f:
+            return f.read()
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under `root`, sharded by hash prefix: ab/cd/abcd...
+
+    Writes go to a temp file in the same filesystem and are renamed into
+    place, so readers never see a partial blob and concurrent uploads of
+    the same content are safe.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._tmp = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp, exist_ok=True)
+
+    def path(self, sha256):
+        if not is_sha256(sha256):
+            raise BlobNotFound(sha256)
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def writer(self, max_size=None):
+        return LocalBlobWriter(self, max_size)
+
+    def local_path(self, sha256):
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            raise BlobNotFound(sha256)
+        return path
+
+    def open(self, sha256):
+        try:
+            return open(self.path(sha256), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(sha256)
+
+    def exists(self, sha256):
+        try:
+            return os.path.exists(self.path(sha256))
+        except BlobNotFound:
+            return False
+
+    def delete(self, sha256):
+        try:
+            os.unlink(self.path(sha256))
+        except (FileNotFoundError, BlobNotFound):
+            pass
+
+    def modified_at(self, sha256):
+        try:
+            return os.path.getmtime(self.path(sha256))
+        except FileNotFoundError:
+            raise BlobNotFound(sha256)
+
+    def keys(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self._tmp:
+                continue
+            for name in filenames:
+                if is_sha256(name):
+                    yield name
+
+
+class LocalBlobWriter(BlobWriter):
+    """Writes to a temp file next to the store, renamed into place on commit"""
+
+    def __init__(self, store, max_size=None):
+        super().__init__(max_size)
+        self._store = store
+        fd, self._tmp_path = tempfile.mkstemp(dir=store._tmp, prefix='upload-')
+        self._file = os.fdopen(fd, 'w+b')
+
+    def _write(self, data):
+        self._file.write(data)
+
+    # Read access for werkzeug / FileStorage
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        return self._file.readline(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return self.info is None
+
+    def _commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        path = self._store.path(self.sha256)
+        if os.path.exists(path):
+            # Already stored (deduplicated); touch it so garbage
+            # collection treats it as freshly uploaded
+            os.unlink(self._tmp_path)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if self.info is None and os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+def default_blob_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs')
+
+
+def create_blob_store(backend=None):
+    """Build a store from BLOB_BACKEND / BLOB_DIR settings"""
+    backend = (backend or os.getenv('BLOB_BACKEND', 'local')).lower()
+    if backend == 'local':
+        return LocalBlobStore(os.getenv('BLOB_DIR') or default_blob_dir())
+    raise ValueError(f'unknown BLOB_BACKEND: {backend}')
@@ -0,0 +1,127 @@
+"""
+In-process caches
+Small thread-safe LRU cache with per-entry TTL, used to keep hot lookups
+(session tokens, dashboard aggregates) out of the database, and a
+version-checked snapshot for rarely written reference data.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get() on a miss, so that None can be cached as a value
+MISSING = object()
+
+
+class TTLCache:
+    """LRU cache whose entries also expire after `ttl` seconds.
+
+    Values may be None (negative caching); use `get(key, MISSING)` to tell a
+    cached None apart from a miss.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value, or `default` if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value; `ttl` overrides the cache default for this entry"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove one entry (no error if absent)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Remove every entry for which predicate(key, value) is true"""
+        with self._lock:
+            doomed = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
+class VersionedValue:
+    """A value loaded on first use and reloaded when its version changes.
+
+    The version lives somewhere every process can read cheaply (a counter
+    row bumped in the same transaction as the writes), so each worker sees
+    a change on its next read without any messaging between workers.
+    """
+
+    def __init__(self):
+        self._entry = (None, None)   # (version, value), swapped atomically
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, version, load):
+        """The value for `version`; otherwise call load() -> (version, value)"""
+        cached_version, value = self._entry
+        if version is not None and version == cached_version:
+            self.hits += 1
+            return value
+        with self._lock:
+            cached_version, value = self._entry
+            if version is not None and version == cached_version:
+                self.hits += 1
+                return value
+            self._entry = load()
+            self.loads += 1
+            return self._entry[1]
+
+    def invalidate(self):
+        self._entry = (None, None)
+
+    def stats(self):
+        return {'version': self._entry[0], 'hits': self.hits, 'loads': self.loads}
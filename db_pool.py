@@ -0,0 +1,348 @@
+"""
+PostgreSQL connection pool
+Per-process, thread-safe pool used by backend.py instead of opening a new
+psycopg2 connection (TCP + TLS + auth) for every request.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+
+# Errors that mean the connection itself is unusable and must not go back to the pool
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class PooledConnection:
+    """Proxy around a pooled psycopg2 connection.
+
+    Behaves like the real connection, except that close() hands the
+    connection back to the pool instead of closing the socket. This keeps
+    the existing `conn = get_db_connection() ... conn.close()` call sites
+    working unchanged.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+
+    @property
+    def raw(self):
+        """The underlying psycopg2 connection"""
+        return self._conn
+
+    @property
+    def released(self):
+        return self._released
+
+    def close(self, discard=False):
+        """Return the connection to the pool (idempotent)"""
+        if self._released:
+            return
+        self._released = True
+        self._pool.putconn(self._conn, discard=discard)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise psycopg2.InterfaceError('connection already returned to the pool')
+        return getattr(self._conn, name)
+
+
+class RequestConnection:
+    """Connection shared by everything that runs during one web request.
+
+    Handlers and helpers keep their `conn.commit()` / `conn.close()` calls,
+    but on this handle both are deferred: the owner commits or rolls back
+    once with finish() and returns the connection with release().
+    rollback() still goes straight to the server. Helpers that swallow
+    database errors must run their statements under savepoint().
+    """
+
+    def __init__(self, pooled):
+        self._pooled = pooled
+        self.finished = False
+
+    @property
+    def raw(self):
+        return self._pooled.raw
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def finish(self, commit=True):
+        """End the shared transaction"""
+        self.finished = True
+        if commit:
+            self._pooled.commit()
+        else:
+            self._pooled.rollback()
+
+    def release(self, discard=False):
+        """Return the connection to the pool"""
+        self._pooled.close(discard=discard)
+
+    def __getattr__(self, name):
+        return getattr(self._pooled, name)
+
+
+@contextmanager
+def savepoint(conn, name='helper'):
+    """Run a block inside SAVEPOINT `name`
+
+    On error only the block's statements are rolled back before the error
+    propagates, so a helper that catches it leaves the shared request
+    transaction usable for the rest of the request.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'SAVEPOINT {name}')
+    try:
+        yield
+    except Exception:
+        cursor.execute(f'ROLLBACK TO SAVEPOINT {name}')
+        raise
+    cursor.execute(f'RELEASE SAVEPOINT {name}')
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with health checks.
+
+    - keeps between `minconn` and `maxconn` connections open
+    - blocks up to `timeout` seconds when every connection is checked out
+    - recycles connections older than `max_age` seconds
+    - pings idle connections that have not been used for `health_check_interval`
+      seconds, or that were idle when another connection failed
+    - discards connections that raised OperationalError/InterfaceError
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=5, max_age=1800, timeout=30,
+                 health_check_interval=30, connect=psycopg2.connect):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError('invalid pool size: minconn=%s maxconn=%s' % (minconn, maxconn))
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_age = max_age
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = []          # stack of (conn, created_at, last_used, generation)
+        self._born = {}          # id(conn) -> created_at, for every open connection
+        self._size = 0           # open connections, idle + checked out + being opened
+        self._generation = 0     # bumped whenever a connection turns out to be broken
+        self._closed = False
+        self.pid = os.getpid()
+        self.stats = {'checkouts': 0, 'created': 0, 'recycled': 0,
+                      'discarded': 0, 'timeouts': 0}
+
+        for _ in range(minconn):
+            conn = self._new_connection()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, self._born[id(conn)], time.monotonic(), self._generation))
+
+    def _new_connection(self):
+        conn = self._connect(self.dsn)
+        conn.autocommit = False
+        self._born[id(conn)] = time.monotonic()
+        self.stats['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        self._born.pop(id(conn), None)
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, created_at, last_used, generation):
+        """Cheap checks first; only round-trip to the server when needed"""
+        if conn.closed:
+            return False
+        if self.max_age and time.monotonic() - created_at > self.max_age:
+            self.stats['recycled'] += 1
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        stale = time.monotonic() - last_used > self.health_check_interval
+        if stale or generation < self._generation:
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+                cursor.close()
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def getconn(self):
+        """Check out a raw connection, waiting up to `timeout` seconds"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolError('connection pool is closed')
+                entry = None
+                if self._idle:
+                    entry = self._idle.pop()
+                elif self._size < self.maxconn:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout('no database connection available within %ss' % self.timeout)
+                    self._cond.wait(remaining)
+                    continue
+
+            if entry is None:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self.stats['checkouts'] += 1
+                return conn
+
+            conn = entry[0]
+            if self._is_healthy(*entry):
+                self.stats['checkouts'] += 1
+                return conn
+
+            # Unhealthy: drop it and try again (may open a replacement)
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def putconn(self, conn, discard=False):
+        """Return a raw connection to the pool"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or conn.closed:
+            self.stats['discarded'] += 1
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._generation += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+                return
+            created_at = self._born.get(id(conn), time.monotonic())
+            self._idle.append((conn, created_at, time.monotonic(), self._generation))
+            self._cond.notify()
+
+    def get(self):
+        """Check out a connection wrapped in a PooledConnection proxy"""
+        return PooledConnection(self, self.getconn())
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always returns the connection to the pool.
+
+        Commits on success, rolls back on error, and discards the connection
+        if it raised a connection-level error.
+        """
+        pooled = self.get()
+        try:
+            yield pooled
+            if not pooled.released:
+                pooled.commit()
+        except CONNECTION_ERRORS:
+            pooled.close(discard=True)
+            raise
+        except Exception:
+            if not pooled.released:
+                try:
+                    pooled.rollback()
+                except CONNECTION_ERRORS:
+                    pooled.close(discard=True)
+            raise
+        finally:
+            pooled.close()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry[0])
+
+    def status(self):
+        """Snapshot of pool sizing and counters"""
+        with self._cond:
+            return dict(self.stats, size=self._size, idle=len(self._idle),
+                        in_use=self._size - len(self._idle),
+                        minconn=self.minconn, maxconn=self.maxconn)
+
+
+# ============================================================================
+# PER-PROCESS POOL
+# ============================================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+# Pools inherited from a parent process. Their sockets are shared with the
+# parent, so they must never be closed (or garbage collected, which closes
+# them) in the child - we just keep a reference and stop using them.
+_inherited_pools = []
+
+
+def get_pool(dsn, **kwargs):
+    """Return this process's pool, creating it lazily.
+
+    Gunicorn forks workers from the master; a pool created before the fork
+    would share sockets between processes. The pool remembers the pid that
+    built it and a fresh one is built on first use in each worker.
+    """
+    global _pool
+    pid = os.getpid()
+    if _pool is not None and _pool.pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid != pid:
+            _inherited_pools.append(_pool)
+            _pool = None
+        if _pool is None:
+            _pool = ConnectionPool(dsn, **kwargs)
+        return _pool
+
+
+def pool_settings_from_env():
+    """Pool sizing from environment variables"""
+    return {
+        'minconn': int(os.getenv('DB_POOL_MIN', 1)),
+        'maxconn': int(os.getenv('DB_POOL_MAX', 5)),
+        'max_age': int(os.getenv('DB_POOL_MAX_AGE', 1800)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'health_check_interval': float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+    }
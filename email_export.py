@@ -1,18 +1,61 @@
 """
 Email Export Script for Cron Job
 Exports user signups and intern applications to Excel files
+
+Usage:
+    python email_export.py                  # full export of both tables, in parallel
+    python email_export.py --incremental    # only rows added or changed since the last run (delta files)
+    python email_export.py --compact        # merge delta files into one snapshot per export
+    python email_export.py --benchmark      # time serial vs parallel on synthetic tables
+
+Exports stream: rows come from a server-side (named) cursor in batches of
+EXPORT_BATCH_SIZE and go straight into a write-only workbook, which
+spills each row to a temp file as it is appended. Memory stays flat
+whatever the table size.
+
+Full exports are CPU-bound in openpyxl, so main() spreads them over a
+process pool: one task per table, and tables over EXPORT_SHARD_ROWS rows
+are cut into primary key ranges. Every worker reads through the same
+exported snapshot, and the ranges' worksheet XML is joined into the
+final workbook without formatting the rows again.
 """
 
+import argparse
+import glob
+import math
+import multiprocessing
 import os
+import re
 import sys
+import tempfile
+import time
+import uuid
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, islice
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
 USE_POSTGRES = DATABASE_URL is not None
 
+# Rows per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 2000))
+MAX_COLUMN_WIDTH = 50
+EXPORT_DIR = 'exports'
+# Incremental exports leave out rows newer than this: a row's timestamp is
+# its transaction's start time, so a long transaction can still commit rows
+# stamped before the watermark the previous run stored
+EXPORT_SETTLE_SECONDS = int(os.getenv('EXPORT_SETTLE_SECONDS', 300))
+# Parallel full exports: worker processes, and rows per shard of a large table
+EXPORT_PROCESSES = int(os.getenv('EXPORT_PROCESSES', 0)) or os.cpu_count() or 1
+EXPORT_SHARD_ROWS = int(os.getenv('EXPORT_SHARD_ROWS', 100000))
+
 def get_db_connection():
     """Get database connection"""
     if USE_POSTGRES:
@@ -22,85 +65,448 @@ def get_db_connection():
         import sqlite3
         return sqlite3.connect('aisolutions.db')
 
-def create_excel_with_style(filename, headers, data):
-    """Create a styled Excel file"""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
-    # Header styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Write data
-    for row_idx, row_data in enumerate(data, 2):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.value = value
-            cell.alignment = Alignment(horizontal="left", vertical="center")
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save file
+def iter_batches(conn, query, params=(), batch_size=None):
+    """Yield the rows of a query in lists of up to batch_size rows
+
+    On PostgreSQL this is a named (server-side) cursor, so only one batch
+    is ever held in memory; it lives until the transaction ends.
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    if USE_POSTGRES:
+        cursor = conn.cursor(name=f'export_{uuid.uuid4().hex}')
+        cursor.itersize = batch_size
+    else:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def export_styles():
+    """Named styles for one workbook (a NamedStyle binds to the workbook it is added to)"""
+    header = NamedStyle(name='export_header')
+    header.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header.font = Font(bold=True, color="FFFFFF", size=12)
+    header.alignment = Alignment(horizontal="center", vertical="center")
+    cell = NamedStyle(name='export_cell')
+    cell.alignment = Alignment(horizontal="left", vertical="center")
+    return header, cell
+
+class ColumnWidths:
+    """Longest value seen per column, as an Excel column width"""
+
+    def __init__(self, headers):
+        self.lengths = [len(str(header)) for header in headers]
+
+    def update(self, row):
+        lengths = self.lengths
+        for i, value in enumerate(row):
+            if value is not None:
+                length = len(str(value))
+                if length > lengths[i]:
+                    lengths[i] = length
+
+    def widths(self):
+        return [min(length + 2, MAX_COLUMN_WIDTH) for length in self.lengths]
+
+def write_excel(filename, headers, batches, progress=None):
+    """Write a styled Excel file from batches of rows, returns the row count
+
+    The workbook is write-only, so rows cannot be revisited: column widths
+    must be in the sheet before its first row. They are measured on the
+    header and the first batch as it is written, not by walking the
+    columns afterwards. Every cell shares one of two named styles; one
+    styled cell per column is reused for every row.
+
+    progress(rows written so far) is called after each batch.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    for style in export_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet()
+    
+    batches = iter(batches)
+    first = next(batches, [])
+    widths = ColumnWidths(headers)
+    for row in first:
+        widths.update(row)
+    for col, width in enumerate(widths.widths(), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.style = 'export_header'
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
+    cells = []
+    for _ in headers:
+        cell = WriteOnlyCell(ws)
+        cell.style = 'export_cell'
+        cells.append(cell)
+    
+    count = 0
+    for batch in chain([first], batches):
+        for row in batch:
+            for cell, value in zip(cells, row):
+                cell.value = value
+            ws.append(cells)
+        count += len(batch)
+        if progress:
+            progress(count)
+    
     wb.save(filename)
     print(f"✅ Created: {filename}")
+    return count
 
-def export_user_signups():
-    """Export all user signup emails"""
+def create_excel_with_style(filename, headers, data):
+    """Create a styled Excel file from a list of rows"""
+    return write_excel(filename, headers, [data])
+
+def export_query(filename, headers, query, format_row, progress=None):
+    """Stream a query into a styled Excel file, returns the row count
+
+    No file is written when the query returns no rows.
+    """
+    conn = get_db_connection()
+    try:
+        batches = iter_batches(conn, query)
+        first = next(batches, None)
+        if not first:
+            return 0
+        formatted = ([format_row(row) for row in batch] for batch in chain([first], batches))
+        return write_excel(filename, headers, formatted, progress)
+    finally:
+        conn.close()
+
+def format_user(user):
+    return [
+        user[0],  # name
+        user[1],  # email
+        user[2],  # phone
+        user[3],  # address
+        str(user[4]) if user[4] else 'N/A'  # created_at
+    ]
+
+def format_application(app):
+    return [
+        app[0],   # full_name
+        app[1],   # email
+        app[2],   # phone
+        app[3],   # position (job title)
+        app[4],   # college
+        app[5],   # degree
+        app[6],   # semester
+        app[7],   # year
+        app[8],   # status
+        str(app[9]) if app[9] else 'N/A',  # applied_at
+        app[10] or 'N/A',  # linkedin
+        app[11] or 'N/A'   # github
+    ]
+
+# Full exports by kind: file name prefix, table, headers, columns, row formatter.
+# Rows come newest first by id (ids follow signup / application order), so a
+# large table can be exported as id ranges in parallel and merged in order.
+class FullExport(namedtuple('FullExport', ['prefix', 'table', 'headers', 'columns', 'format_row'])):
+
+    @property
+    def query(self):
+        return f'SELECT {self.columns} FROM {self.table} ORDER BY id DESC'
+
+    @property
+    def range_query(self):
+        """Rows with lower < id <= upper, in export order"""
+        return f'SELECT {self.columns} FROM {self.table} WHERE id > %s AND id <= %s ORDER BY id DESC'
+
+FULL_EXPORTS = {
+    'users': FullExport(
+        'user_signups', 'users',
+        ['Full Name', 'Email', 'Phone', 'Address', 'Signup Date'],
+        'name, email, phone, address, created_at', format_user),
+    'applications': FullExport(
+        'intern_applications', 'applications',
+        ['Full Name', 'Email', 'Phone', 'Job Title/Position', 'College', 
+         'Degree', 'Semester', 'Year', 'Status', 'Applied Date', 'LinkedIn', 'GitHub'],
+        'full_name, email, phone, position, college, degree, semester, year, status, applied_at, linkedin, github',
+        format_application),
+}
+
+def run_full_export(kind, progress=None):
+    """Export a whole table, returns (rows, filename); filename is None for an empty table"""
+    spec = FULL_EXPORTS[kind]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = os.path.join(EXPORT_DIR, f'{spec.prefix}_{timestamp}.xlsx')
+    count = export_query(filename, spec.headers, spec.query, spec.format_row, progress)
+    return count, filename if count else None
+
+def count_rows(kind):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM {FULL_EXPORTS[kind].table}')
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+def run_exports(kinds, progress=None):
+    """Run several full exports, returns the files written
+
+    progress(rows written, total rows) is reported across all of them;
+    the total is counted up front.
+    """
+    total = sum(count_rows(kind) for kind in kinds)
+    done = 0
+    files = []
+    for kind in kinds:
+        report = (lambda rows, base=done: progress(base + rows, total)) if progress else None
+        if progress:
+            progress(done, total)
+        count, filename = run_full_export(kind, report)
+        done += count
+        if filename:
+            files.append(filename)
+    if progress:
+        progress(done, total)
+    return files
+
+# Parallel full exports. A shard is an id range of about shard_rows rows,
+# read from the primary key; shards are written newest range first, so the
+# merged file keeps the export's id DESC order.
+SHEET_XML = 'xl/worksheets/sheet1.xml'
+ROW_TAG = re.compile(rb'<row r="\d+"')
+CELL_REF = re.compile(rb'<c r="[A-Z]+\d+"')
+
+def shard_ranges(cursor, table, shard_rows):
+    """(lower, upper] id ranges of about shard_rows rows each, newest first
+
+    Reads only the primary key: ntile splits the ids into equal-sized
+    groups whatever the gaps between them. Empty table: no ranges.
+    """
+    cursor.execute(f'SELECT COUNT(*) FROM {table}')
+    parts = math.ceil(cursor.fetchone()[0] / shard_rows)
+    if not parts:
+        return []
+    cursor.execute(f'''
+        SELECT MIN(id) - 1, MAX(id)
+        FROM (SELECT id, ntile(%s) OVER (ORDER BY id) AS part FROM {table}) parts
+        GROUP BY part
+        ORDER BY part DESC
+    ''', (parts,))
+    return cursor.fetchall()
+
+def export_shard(spec, snapshot, lower, upper, filename):
+    """Write the rows with lower < id <= upper of a full export, returns the row count
+
+    Runs in a worker process; reads through the parent's exported snapshot
+    so all shards see the same rows.
+    """
+    conn = get_db_connection()
+    try:
+        conn.set_session(isolation_level='REPEATABLE READ')
+        conn.cursor().execute('SET TRANSACTION SNAPSHOT %s', (snapshot,))
+        batches = iter_batches(conn, spec.range_query, (lower, upper))
+        formatted = ([spec.format_row(row) for row in batch] for batch in batches)
+        return write_excel(filename, spec.headers, formatted)
+    finally:
+        conn.close()
+
+def iter_sheet_xml(zf, chunk_size=1 << 20):
+    """('head' | 'rows' | 'tail', bytes) parts of a workbook's worksheet XML, streamed
+
+    'rows' parts always hold whole <row> elements.
+    """
+    with zf.open(SHEET_XML) as sheet:
+        buffer = b''
+        head = True
+        while True:
+            chunk = sheet.read(chunk_size)
+            buffer += chunk
+            if head:
+                start = buffer.find(b'<sheetData>')
+                if start < 0:
+                    if not chunk:
+                        raise ValueError('worksheet has no sheetData')
+                    continue
+                start += len(b'<sheetData>')
+                yield 'head', buffer[:start]
+                buffer = buffer[start:]
+                head = False
+            if not chunk:
+                end = buffer.find(b'</sheetData>')
+                if end < 0:
+                    raise ValueError('worksheet has no sheetData')
+                yield 'rows', buffer[:end]
+                yield 'tail', buffer[end:]
+                return
+            end = buffer.rfind(b'</row>')
+            if end >= 0:
+                end += len(b'</row>')
+                yield 'rows', buffer[:end]
+                buffer = buffer[end:]
+
+def merge_shards(filename, shards):
+    """Join shard workbooks (each with a header row) into one workbook
+
+    Everything but the rows comes from the first shard, so the column
+    widths are the ones measured on the first batch, as in a serial
+    export. Later shards lose their header row; rows are renumbered and
+    cell references, which are optional, are dropped.
+    """
+    last_row = 0
+    
+    def renumber(match):
+        nonlocal last_row
+        last_row += 1
+        return b'<row r="%d"' % last_row
+    
+    with zipfile.ZipFile(shards[0]) as first, zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as out:
+        for item in first.infolist():
+            if item.filename != SHEET_XML:
+                out.writestr(item, first.read(item))
+                continue
+            with out.open(SHEET_XML, 'w', force_zip64=True) as sheet:
+                tail = b''
+                for i, shard in enumerate(shards):
+                    with zipfile.ZipFile(shard) as zf:
+                        skip_header = i > 0
+                        for part, data in iter_sheet_xml(zf):
+                            if part == 'head':
+                                if i == 0:
+                                    sheet.write(data)
+                            elif part == 'tail':
+                                tail = data
+                            else:
+                                if skip_header:
+                                    data = data[data.find(b'</row>') + len(b'</row>'):]
+                                    skip_header = False
+                                sheet.write(CELL_REF.sub(b'<c', ROW_TAG.sub(renumber, data)))
+                sheet.write(tail)
+
+def export_parallel(kinds, processes=None, shard_rows=None):
+    """Run full exports on a process pool, returns {kind: (rows, filename)}
+
+    Tables over shard_rows rows are split into shards exported side by
+    side and merged into the final file; filename is None for an empty
+    table. Needs PostgreSQL (shared snapshots); otherwise runs serially.
+    """
+    if not USE_POSTGRES:
+        return {kind: run_full_export(kind) for kind in kinds}
+    processes = processes or EXPORT_PROCESSES
+    shard_rows = shard_rows or EXPORT_SHARD_ROWS
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Held open until every shard is written: it keeps the snapshot alive
+    conn = get_db_connection()
+    shards = {}
     try:
-        conn = get_db_connection()
+        conn.set_session(isolation_level='REPEATABLE READ')
         cursor = conn.cursor()
+        cursor.execute('SELECT pg_export_snapshot()')
+        snapshot = cursor.fetchone()[0]
+        plan = []
+        for kind in kinds:
+            spec = FULL_EXPORTS[kind]
+            # An empty table still gets one (empty) range, so it is reported as such
+            ranges = shard_ranges(cursor, spec.table, shard_rows) or [(0, 0)]
+            filename = os.path.join(EXPORT_DIR, f'{spec.prefix}_{timestamp}.xlsx')
+            if len(ranges) == 1:
+                shards[kind] = [filename]
+            else:
+                shards[kind] = [f'{filename}.part{i:03d}.tmp' for i in range(len(ranges))]
+            plan.append((kind, spec, filename, ranges))
         
-        # Get all users
-        cursor.execute('''
-            SELECT name, email, phone, address, created_at
-            FROM users
-            ORDER BY created_at DESC
+        results = {}
+        workers = max(1, min(processes, sum(len(names) for names in shards.values())))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {kind: [pool.submit(export_shard, spec, snapshot, lower, upper, name)
+                              for (lower, upper), name in zip(ranges, shards[kind])]
+                       for kind, spec, _, ranges in plan}
+            for kind, _, filename, _ in plan:
+                rows = sum(future.result() for future in futures[kind])
+                if len(shards[kind]) > 1:
+                    merge_shards(filename + '.tmp', shards[kind])
+                    os.replace(filename + '.tmp', filename)
+                    print(f"✅ Merged {len(shards[kind])} shards: {filename}")
+                results[kind] = (rows, filename if rows else None)
+        return results
+    finally:
+        conn.close()
+        for names in shards.values():
+            for name in names:
+                if name.endswith('.tmp') and os.path.exists(name):
+                    os.remove(name)
+
+def benchmark(sizes=(100000, 1000000), processes=None, shard_rows=None):
+    """Time a serial and a parallel full export of synthetic users tables
+
+    Returns [(rows, serial seconds, parallel seconds)]; the scratch table
+    and files are removed afterwards.
+    """
+    global EXPORT_DIR
+    table = f'export_benchmark_{uuid.uuid4().hex[:8]}'
+    users = FULL_EXPORTS['users']
+    spec = users._replace(prefix=table, table=table)
+    processes = processes or EXPORT_PROCESSES
+    export_dir = EXPORT_DIR
+    results = []
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            CREATE TABLE {table} (id SERIAL PRIMARY KEY, name TEXT, email TEXT, phone TEXT,
+                                  address TEXT, created_at TIMESTAMP)
         ''')
-        
-        users = cursor.fetchall()
+        conn.commit()
+        FULL_EXPORTS[table] = spec
+        for size in sizes:
+            cursor.execute(f'TRUNCATE {table} RESTART IDENTITY')
+            cursor.execute(f'''
+                INSERT INTO {table} (name, email, phone, address, created_at)
+                SELECT 'User ' || i, 'user' || i || '@example.com', '555-' || lpad((i %% 10000)::text, 4, '0'),
+                       i || ' Main Street, Springfield', TIMESTAMP '2025-01-01' + i * INTERVAL '1 minute'
+                FROM generate_series(1, %s) AS i
+            ''', (size,))
+            cursor.execute(f'ANALYZE {table}')
+            conn.commit()
+            with tempfile.TemporaryDirectory() as tmp:
+                EXPORT_DIR = tmp
+                started = time.perf_counter()
+                serial_rows, _ = run_full_export(table)
+                serial = time.perf_counter() - started
+                started = time.perf_counter()
+                # Without an explicit shard size, one shard per process
+                parallel_rows, _ = export_parallel([table], processes,
+                                                   shard_rows or math.ceil(size / processes))[table]
+                parallel = time.perf_counter() - started
+            if serial_rows != parallel_rows:
+                raise RuntimeError(f'row counts differ: serial {serial_rows}, parallel {parallel_rows}')
+            print(f"⏱️ {size} rows: serial {serial:.1f}s, parallel {parallel:.1f}s ({serial / parallel:.2f}x)")
+            results.append((size, serial, parallel))
+        return results
+    finally:
+        EXPORT_DIR = export_dir
+        FULL_EXPORTS.pop(table, None)
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.commit()
         conn.close()
-        
-        if not users:
+
+def export_user_signups():
+    """Export all user signup emails"""
+    try:
+        count, filename = run_full_export('users')
+        if not count:
             print("⚠️ No users found")
             return
-        
-        # Create Excel file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'exports/user_signups_{timestamp}.xlsx'
-        
-        headers = ['Full Name', 'Email', 'Phone', 'Address', 'Signup Date']
-        data = []
-        
-        for user in users:
-            data.append([
-                user[0],  # name
-                user[1],  # email
-                user[2],  # phone
-                user[3],  # address
-                str(user[4]) if user[4] else 'N/A'  # created_at
-            ])
-        
-        create_excel_with_style(filename, headers, data)
-        print(f"📧 Exported {len(users)} user signups")
+        print(f"📧 Exported {count} user signups")
+        return filename
         
     except Exception as e:
         print(f"❌ Error exporting user signups: {e}")
@@ -110,74 +516,190 @@ def export_user_signups():
 def export_intern_applications():
     """Export all intern application emails with job titles"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all applications
-        cursor.execute('''
-            SELECT full_name, email, phone, position, college, degree, 
-                   semester, year, status, applied_at, linkedin, github
-            FROM applications
-            ORDER BY applied_at DESC
-        ''')
-        
-        applications = cursor.fetchall()
-        conn.close()
-        
-        if not applications:
+        count, filename = run_full_export('applications')
+        if not count:
             print("⚠️ No applications found")
             return
-        
-        # Create Excel file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'exports/intern_applications_{timestamp}.xlsx'
-        
-        headers = ['Full Name', 'Email', 'Phone', 'Job Title/Position', 'College', 
-                   'Degree', 'Semester', 'Year', 'Status', 'Applied Date', 'LinkedIn', 'GitHub']
-        data = []
-        
-        for app in applications:
-            data.append([
-                app[0],   # full_name
-                app[1],   # email
-                app[2],   # phone
-                app[3],   # position (job title)
-                app[4],   # college
-                app[5],   # degree
-                app[6],   # semester
-                app[7],   # year
-                app[8],   # status
-                str(app[9]) if app[9] else 'N/A',  # applied_at
-                app[10] or 'N/A',  # linkedin
-                app[11] or 'N/A'   # github
-            ])
-        
-        create_excel_with_style(filename, headers, data)
-        print(f"📧 Exported {len(applications)} intern applications")
+        print(f"📧 Exported {count} intern applications")
+        return filename
         
     except Exception as e:
         print(f"❌ Error exporting applications: {e}")
         import traceback
         traceback.print_exc()
 
-def main():
-    """Main export function"""
+# Incremental exports: each run writes a delta file with the rows whose
+# (updated_at, id) is past the export's watermark in export_watermarks, and
+# moves the watermark in the same transaction. A row edited after it was
+# exported comes out again in a later delta (migration 10 keeps updated_at
+# current). Delta and snapshot files start with an ID column so compaction
+# can keep the latest version of each row.
+IncrementalExport = namedtuple('IncrementalExport', ['table', 'time_column', 'columns', 'headers', 'format_row'])
+
+INCREMENTAL_EXPORTS = {
+    'user_signups': IncrementalExport(
+        'users', 'updated_at', 'name, email, phone, address, created_at',
+        ['ID'] + FULL_EXPORTS['users'].headers, format_user),
+    'intern_applications': IncrementalExport(
+        'applications', 'updated_at',
+        'full_name, email, phone, position, college, degree, semester, year, status, applied_at, linkedin, github',
+        ['ID'] + FULL_EXPORTS['applications'].headers, format_application),
+}
+
+def export_incremental(name):
+    """Export rows added or changed since the last run of `name`, returns (rows, filename)
+
+    The watermark row is locked for the whole export, so two runs never
+    write the same delta. If a run dies after saving its file but before
+    committing, the next run exports those rows again and compaction
+    drops the duplicates. PostgreSQL only.
+    """
+    spec = INCREMENTAL_EXPORTS[name]
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO export_watermarks (name) VALUES (%s) ON CONFLICT (name) DO NOTHING', (name,))
+        cursor.execute('SELECT last_at, last_id FROM export_watermarks WHERE name = %s FOR UPDATE', (name,))
+        last_at, last_id = cursor.fetchone()
+        
+        query = f'''
+            SELECT id, {spec.time_column}, {spec.columns}
+            FROM {spec.table}
+            WHERE (%(last_at)s::timestamp IS NULL OR ({spec.time_column}, id) > (%(last_at)s, %(last_id)s))
+              AND {spec.time_column} < LOCALTIMESTAMP - %(settle)s * INTERVAL '1 second'
+            ORDER BY {spec.time_column}, id
+        '''
+        batches = iter_batches(conn, query, {'last_at': last_at, 'last_id': last_id,
+                                             'settle': EXPORT_SETTLE_SECONDS})
+        first = next(batches, None)
+        if not first:
+            conn.rollback()
+            return 0, None
+        
+        last = {}
+        def formatted():
+            for batch in chain([first], batches):
+                last['key'] = batch[-1][1], batch[-1][0]
+                yield [[row[0]] + spec.format_row(row[2:]) for row in batch]
+        
+        # Microseconds: delta files are merged in name order
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        filename = os.path.join(EXPORT_DIR, f'{name}_delta_{timestamp}.xlsx')
+        count = write_excel(filename, spec.headers, formatted())
+        
+        cursor.execute('''
+            UPDATE export_watermarks
+            SET last_at = %s, last_id = %s, rows_exported = rows_exported + %s, updated_at = CURRENT_TIMESTAMP
+            WHERE name = %s
+        ''', (last['key'][0], last['key'][1], count, name))
+        conn.commit()
+        return count, filename
+    finally:
+        conn.close()
+
+def read_export_rows(filename):
+    """Data rows of an export file, streamed"""
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        for row in wb.active.iter_rows(min_row=2, values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+def compact_exports(name):
+    """Merge the latest snapshot and newer delta files of `name` into a new snapshot
+
+    A row appears more than once when it was edited after an export, or
+    when a run died before committing its watermark. Files are in export
+    order, so its last occurrence is the latest version: a first pass maps
+    each ID to that position (IDs only, not rows, are held in memory) and
+    the second writes just those rows. The merged files are deleted.
+    Returns the snapshot filename, or None when there is nothing to merge.
+    """
+    spec = INCREMENTAL_EXPORTS[name]
+    snapshots = sorted(glob.glob(os.path.join(EXPORT_DIR, f'{name}_snapshot_*.xlsx')))
+    deltas = sorted(glob.glob(os.path.join(EXPORT_DIR, f'{name}_delta_*.xlsx')))
+    if not deltas:
+        return None
+    sources = snapshots[-1:] + deltas
+    
+    def all_rows():
+        return chain.from_iterable(read_export_rows(source) for source in sources)
+    
+    latest = {row[0]: position for position, row in enumerate(all_rows())}
+    
+    def rows():
+        for position, row in enumerate(all_rows()):
+            if latest[row[0]] == position:
+                yield row
+    
+    def batches(rows):
+        while True:
+            batch = list(islice(rows, EXPORT_BATCH_SIZE))
+            if not batch:
+                return
+            yield batch
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    filename = os.path.join(EXPORT_DIR, f'{name}_snapshot_{timestamp}.xlsx')
+    tmp = filename + '.tmp'
+    write_excel(tmp, spec.headers, batches(rows()))
+    os.replace(tmp, filename)
+    for source in snapshots + deltas:
+        if source != filename:
+            os.remove(source)
+    return filename
+
+def main(mode='full'):
+    """Main export function
+
+    mode: 'full' (every row, the original behaviour), 'incremental' or 'compact'
+    """
     print("\n" + "="*60)
     print(f"🔄 Email Export Job Started - {datetime.now()}")
     print("="*60)
     
     # Create exports directory if it doesn't exist
-    os.makedirs('exports', exist_ok=True)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
     
-    # Export user signups
-    export_user_signups()
-    
-    # Export intern applications
-    export_intern_applications()
+    if mode == 'incremental':
+        import migrations
+        migrations.migrate(DATABASE_URL)   # export_watermarks, updated_at columns
+        for name in INCREMENTAL_EXPORTS:
+            count, filename = export_incremental(name)
+            print(f"📧 {name}: {count} new rows" + (f" -> {filename}" if filename else ''))
+    elif mode == 'compact':
+        for name in INCREMENTAL_EXPORTS:
+            filename = compact_exports(name)
+            print(f"🗜️ {name}: " + (f"snapshot {filename}" if filename else 'nothing to compact'))
+    else:
+        # Both tables (and shards of large ones) on a process pool
+        try:
+            results = export_parallel(['users', 'applications'])
+            for kind, label in (('users', 'user signups'), ('applications', 'intern applications')):
+                count, filename = results[kind]
+                if count:
+                    print(f"📧 Exported {count} {label}")
+                else:
+                    print(f"⚠️ No {label} found")
+        except Exception as e:
+            print(f"❌ Error exporting data: {e}")
+            import traceback
+            traceback.print_exc()
     
     print("="*60)
     print("✅ Email Export Job Completed")
     print("="*60 + "\n")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Export users and applications to Excel')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--incremental', action='store_true', help='only rows added or changed since the last incremental run')
+    group.add_argument('--compact', action='store_true', help='merge delta files into a snapshot')
+    group.add_argument('--benchmark', type=int, nargs='*', metavar='ROWS',
+                       help='time serial vs parallel exports of synthetic tables (default 100000 1000000 rows)')
+    args = parser.parse_args()
+    if args.benchmark is not None:
+        benchmark(args.benchmark or (100000, 1000000))
+    else:
+        main('incremental' if args.incremental else 'compact' if args.compact else 'full')
@@ -0,0 +1,487 @@
+"""
+Outbound email queue
+Request handlers only write a 'pending' row to the emails table (in their
+own transaction); a background dispatcher in each worker drains it:
+
+- rows are claimed with FOR UPDATE SKIP LOCKED plus a lease, so several
+  workers can dispatch at once without sending the same email twice
+- sends run on a bounded thread pool over one keep-alive HTTP connection
+  pool per process, with connect/read timeouts and quick in-call retries
+  on 429/502/503/504 and connection failures
+- temporary failures (timeouts, 429, 5xx) retry with exponential backoff
+  and jitter; permanent failures and exhausted retries end as 'failed'
+- a per-recipient-domain token bucket keeps bursts from tripping provider
+  throttling; rate-limited rows are pushed back without using an attempt
+- rows queued together with a batch_id (bulk notifications) go out as
+  Mailgun batch sends: up to 1000 recipients per API call, personalised
+  with recipient-variables
+
+Status values: pending -> sent | failed
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from psycopg2.extras import execute_values
+
+from metrics import LatencyHistogram
+
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+
+class DeliveryError(Exception):
+    """Email could not be handed to the provider"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class MailgunTransport:
+    """Sends messages through the Mailgun HTTP API.
+
+    One requests.Session per process (created lazily, so gunicorn workers
+    never share sockets inherited across fork) with an HTTPAdapter pool of
+    `pool_size` keep-alive connections, so bursts reuse warm TLS
+    connections. Throttling (429), gateway errors (502/503/504) and failed
+    connects are retried `retries` times with jittered backoff, honouring
+    Retry-After; anything else is left to the outbox retry schedule.
+
+    `base_url` can point at a local stand-in server for tests.
+    """
+
+    # Mailgun accepts at most 1000 recipients per batch send
+    batch_limit = 1000
+    retry_statuses = (429, 502, 503, 504)
+
+    def __init__(self, api_key, domain, from_email, base_url='https://api.mailgun.net/v3',
+                 timeout=(5, 15), pool_size=4, retries=2, retry_backoff=0.5, retry_backoff_max=10):
+        self.api_key = api_key
+        self.domain = domain
+        self.from_email = from_email
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+        self.latency = {'send': LatencyHistogram(), 'send_batch': LatencyHistogram()}
+        self._counters = {'calls': 0, 'retries': 0, 'errors': 0}
+        self._statuses = {}
+
+    @property
+    def configured(self):
+        return bool(self.api_key and self.domain)
+
+    def _get_session(self):
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    # Retries are handled in _post (with jitter), not by urllib3
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                          max_retries=0, pool_block=False)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.auth = ("api", self.api_key)
+                    self._session = session
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def send(self, to_email, subject, body):
+        """Raises DeliveryError on failure"""
+        self._post('send', {
+            "from": f"ZGENAI <{self.from_email}>",
+            "to": [to_email],
+            "subject": subject,
+            "text": body,
+            "html": body.replace('\n', '<br>')
+        })
+
+    def send_batch(self, messages):
+        """Send personalised messages in one API call.
+
+        messages: list of (to_email, subject, body) with distinct addresses.
+        With recipient-variables set, Mailgun sends each recipient their own
+        message (no shared To: list), substituting %recipient.*% per address.
+        """
+        if len(messages) > self.batch_limit:
+            raise ValueError(f'at most {self.batch_limit} recipients per batch')
+        variables = {
+            to_email: {'subject': subject, 'text': body, 'html': body.replace('\n', '<br>')}
+            for to_email, subject, body in messages
+        }
+        self._post('send_batch', {
+            "from": f"ZGENAI <{self.from_email}>",
+            "to": list(variables),
+            "subject": "%recipient.subject%",
+            "text": "%recipient.text%",
+            "html": "%recipient.html%",
+            "recipient-variables": json.dumps(variables)
+        })
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response is not None and response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(self.retry_backoff_max, float(retry_after))
+        delay = min(self.retry_backoff_max, self.retry_backoff * 2 ** attempt)
+        return random.uniform(0, delay)
+
+    def _count(self, key, status=None):
+        with self._lock:
+            self._counters[key] += 1
+            if status is not None:
+                self._statuses[status] = self._statuses.get(status, 0) + 1
+
+    def _post(self, kind, data):
+        if not self.configured:
+            raise DeliveryError('Mailgun not configured', retryable=False)
+        session = self._get_session()
+        url = f"{self.base_url}/{self.domain}/messages"
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries
+            start = time.perf_counter()
+            try:
+                response = session.post(url, data=data, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.latency[kind].observe(time.perf_counter() - start)
+                self._count('calls', type(e).__name__)
+                # Connection failures are retried here; a read timeout may
+                # already have been delivered, so it is left to the outbox
+                if isinstance(e, requests.ConnectionError) and not last_try:
+                    self._count('retries')
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                self._count('errors')
+                raise DeliveryError(f'{type(e).__name__}: {e}')
+            self.latency[kind].observe(time.perf_counter() - start)
+            self._count('calls', response.status_code)
+
+            if response.status_code == 200:
+                return
+            if response.status_code in self.retry_statuses and not last_try:
+                self._count('retries')
+                time.sleep(self._retry_delay(attempt, response))
+                continue
+            self._count('errors')
+            retryable = response.status_code == 429 or response.status_code >= 500
+            raise DeliveryError(f'Mailgun {response.status_code}: {response.text[:500]}', retryable=retryable)
+
+    def connections_opened(self):
+        """New connections opened by this process's pool (lower = more reuse)"""
+        if self._session is None:
+            return 0
+        adapter = self._session.get_adapter(self.base_url)
+        pools = adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters, statuses={str(k): v for k, v in self._statuses.items()})
+        counters['connections_opened'] = self.connections_opened()
+        counters['latency'] = {kind: hist.snapshot() for kind, hist in self.latency.items()}
+        return counters
+
+
+class DomainRateLimiter:
+    """Token bucket per recipient domain
+
+    Buckets live in one process, so with `processes` dispatchers (one per
+    gunicorn worker) each gets an equal share of the rate and burst and
+    together they stay within per_minute / burst.
+    """
+
+    def __init__(self, per_minute=60, burst=10, processes=1):
+        self.rate = per_minute / 60.0 / processes
+        self.burst = max(1, burst // processes)
+        self._buckets = {}   # domain -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, domain):
+        """Take a token; returns 0 if allowed, else seconds until one is free"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(domain, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                self._buckets[domain] = (tokens - 1, now)
+                return 0
+            self._buckets[domain] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+def recipient_domain(email):
+    return email.rsplit('@', 1)[-1].lower()
+
+
+def batch_chunks(rows, limit):
+    """Split claimed rows into batch sends of at most `limit` distinct addresses"""
+    chunks = []
+    for row in rows:
+        to_email = row[1].lower()
+        for chunk, addresses in chunks:
+            if len(chunk) < limit and to_email not in addresses:
+                break
+        else:
+            chunk, addresses = [], set()
+            chunks.append((chunk, addresses))
+        chunk.append(row)
+        addresses.add(to_email)
+    return [chunk for chunk, _ in chunks]
+
+
+def backoff_delay(attempts, base=30, maximum=3600):
+    """Exponential backoff with jitter: roughly base * 2^(attempts-1), capped"""
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class EmailOutbox:
+    """The emails table used as a durable outbox
+
+    The outbox columns (status, attempts, ...) come from migration 7.
+    """
+
+    def __init__(self, connection_factory):
+        self._connection = connection_factory
+
+    def enqueue(self, cursor, to_email, subject, body, user_id=None):
+        """Queue an email inside the caller's transaction, returns its id"""
+        cursor.execute('''
+            INSERT INTO emails (to_email, subject, body, user_id, status, next_attempt_at)
+            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            RETURNING id
+        ''', (to_email, subject, body, user_id, PENDING))
+        return cursor.fetchone()[0]
+
+    def enqueue_many(self, cursor, messages, batch_id=None):
+        """Queue many emails with one multi-row INSERT, returns their ids.
+
+        messages: list of (to_email, subject, body, user_id). Emails sharing
+        a batch_id are delivered as Mailgun batch sends.
+        """
+        if not messages:
+            return []
+        rows = execute_values(cursor, '''
+            INSERT INTO emails (to_email, subject, body, user_id, status, next_attempt_at, batch_id)
+            VALUES %s
+            RETURNING id
+        ''', [(to_email, subject, body, user_id, PENDING, batch_id)
+              for to_email, subject, body, user_id in messages],
+            template='(%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s)', page_size=len(messages), fetch=True)
+        return [row[0] for row in rows]
+
+    def claim(self, limit, lease, batched=False):
+        """Lease up to `limit` due emails to this dispatcher
+
+        batched=False claims individual emails, batched=True claims emails
+        queued with a batch_id (grouped by batch).
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                UPDATE emails
+                SET next_attempt_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+                WHERE id IN (
+                    SELECT id FROM emails
+                    WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                      AND batch_id IS {'NOT NULL' if batched else 'NULL'}
+                    ORDER BY {'batch_id, id' if batched else 'next_attempt_at, id'}
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, to_email, subject, body, attempts, batch_id
+            ''', (lease, limit))
+            return cursor.fetchall()
+
+    def mark_sent(self, email_ids):
+        with self._connection() as conn:
+            conn.cursor().execute('''
+                UPDATE emails
+                SET status = 'sent', delivered_at = CURRENT_TIMESTAMP, attempts = attempts + 1,
+                    last_error = NULL, next_attempt_at = NULL
+                WHERE id = ANY(%s)
+            ''', (list(email_ids),))
+
+    def mark_failed(self, email_ids, error, retry_in=None):
+        """Record a failed attempt; retry_in=None means give up"""
+        with self._connection() as conn:
+            if retry_in is None:
+                conn.cursor().execute('''
+                    UPDATE emails
+                    SET status = 'failed', attempts = attempts + 1, last_error = %s, next_attempt_at = NULL
+                    WHERE id = ANY(%s)
+                ''', (error, list(email_ids)))
+            else:
+                conn.cursor().execute('''
+                    UPDATE emails
+                    SET attempts = attempts + 1, last_error = %s,
+                        next_attempt_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+                    WHERE id = ANY(%s)
+                ''', (error, retry_in, list(email_ids)))
+
+    def postpone(self, email_id, delay):
+        """Push an email back without counting an attempt (rate limited)"""
+        with self._connection() as conn:
+            conn.cursor().execute('''
+                UPDATE emails SET next_attempt_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+                WHERE id = %s
+            ''', (delay, email_id))
+
+    def counts(self):
+        """Number of emails per status"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT status, COUNT(*) FROM emails GROUP BY status')
+            return dict(cursor.fetchall())
+
+
+class EmailDispatcher:
+    """Background thread that drains the outbox with a bounded worker pool.
+
+    Like the session sweeper, ensure_running() is cheap to call on every
+    request and (re)starts the thread in whichever process calls it.
+    """
+
+    def __init__(self, outbox, transport, workers=4, batch_size=20, max_attempts=6,
+                 backoff_base=30, backoff_max=3600, lease=120, poll_interval=5,
+                 rate_limiter=None):
+        self.outbox = outbox
+        self.transport = transport
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        self._wake = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'rate_limited': 0}
+
+    def ensure_running(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='email-send')
+            self._thread = threading.Thread(target=self._run, name='email-dispatcher', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Start a dispatch pass now instead of at the next poll"""
+        self._wake.set()
+
+    def _count(self, outcome, n=1):
+        with self._lock:
+            self._stats[outcome] += n
+
+    def _record_failure(self, rows, error):
+        """Schedule a retry or give up, per row"""
+        retry, give_up = [], []
+        for row in rows:
+            attempts = row[4] + 1
+            (retry if error.retryable and attempts < self.max_attempts else give_up).append(row[0])
+        if retry:
+            attempts = max(row[4] for row in rows) + 1
+            self.outbox.mark_failed(retry, str(error),
+                                    retry_in=backoff_delay(attempts, self.backoff_base, self.backoff_max))
+            self._count('retried', len(retry))
+        if give_up:
+            self.outbox.mark_failed(give_up, str(error))
+            self._count('failed', len(give_up))
+        return bool(retry)
+
+    def _deliver(self, row):
+        email_id, to_email, subject, body, attempts = row[:5]
+        wait = self.rate_limiter.acquire(recipient_domain(to_email))
+        if wait:
+            self.outbox.postpone(email_id, wait)
+            self._count('rate_limited')
+            return
+        try:
+            self.transport.send(to_email, subject, body)
+        except DeliveryError as e:
+            if self._record_failure([row], e):
+                print(f"⚠️ Email {email_id} to {to_email} failed (attempt {attempts + 1}), will retry: {e}")
+            else:
+                print(f"❌ Email {email_id} to {to_email} failed permanently: {e}")
+            return
+        self.outbox.mark_sent([email_id])
+        self._count('sent')
+        print(f"✅ Email sent to: {to_email}")
+
+    def _deliver_batch(self, rows):
+        # One API call for the whole chunk; the provider paces delivery, so
+        # the per-domain limiter is not applied per recipient here
+        try:
+            self.transport.send_batch([(row[1], row[2], row[3]) for row in rows])
+        except DeliveryError as e:
+            retrying = self._record_failure(rows, e)
+            print(f"⚠️ Batch of {len(rows)} emails failed{', will retry' if retrying else ''}: {e}")
+            return
+        self.outbox.mark_sent([row[0] for row in rows])
+        self._count('sent', len(rows))
+        print(f"✅ Batch of {len(rows)} emails sent")
+
+    def dispatch_once(self):
+        """Claim due emails and send them; returns the number of emails claimed"""
+        rows = self.outbox.claim(self.batch_size, self.lease)
+        batched = self.outbox.claim(self.transport.batch_limit, self.lease, batched=True)
+        if not rows and not batched:
+            return 0
+        executor = self._executor
+        if executor is None or self._pid != os.getpid():
+            # Called directly (tests, scripts) without the background thread
+            executor = self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                           thread_name_prefix='email-send')
+            self._pid = os.getpid()
+
+        futures = [executor.submit(self._deliver, row) for row in rows]
+        groups = {}
+        for row in batched:
+            groups.setdefault(row[5], []).append(row)
+        for group in groups.values():
+            for chunk in batch_chunks(group, self.transport.batch_limit):
+                futures.append(executor.submit(self._deliver_batch, chunk))
+
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # Bookkeeping failed; the lease expires and the email is retried
+                print(f"⚠️ Email dispatch error: {e}")
+        return len(rows) + len(batched)
+
+    def _run(self):
+        while True:
+            try:
+                claimed = self.dispatch_once()
+            except Exception as e:
+                print(f"⚠️ Email dispatcher error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, workers=self.workers,
+                        running=self._thread is not None and self._thread.is_alive())
@@ -0,0 +1,166 @@
+"""
+Raw table exports in streamable formats
+For downstream analytics, which only needs rows, not styled workbooks.
+Each format turns batches of rows into a stream of bytes, so an export
+can go straight into a chunked HTTP response without touching disk:
+
+- csv       plain CSV with a header row
+- ndjson    one JSON object per row, gzip-compressed (.ndjson.gz)
+- columnar  gzip-compressed row groups stored column by column. The first
+            line is a JSON header with the column names; every following
+            line is one row group, {"rows": n, "columns": [...]}, where a
+            column is {"values": [...]} or, when it has few distinct values,
+            dictionary-encoded as {"dict": [...], "codes": [...]}.
+            read_columnar() turns it back into rows.
+
+Datetimes are written as ISO 8601 strings.
+"""
+
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from email_export import iter_batches, EXPORT_BATCH_SIZE
+
+COLUMNAR_FORMAT = 'xgen-columnar'
+COLUMNAR_VERSION = 1
+
+# Exportable tables and their columns; secrets and file contents stay out
+EXPORT_TABLES = {
+    'users': ['id', 'name', 'email', 'phone', 'address', 'created_at', 'last_login'],
+    'applications': ['id', 'position', 'full_name', 'email', 'phone', 'address', 'college', 'degree',
+                     'semester', 'year', 'about', 'resume_name', 'linkedin', 'github', 'status', 'applied_at'],
+    'emails': ['id', 'to_email', 'subject', 'body', 'sent_at', 'user_id'],
+}
+
+
+def plain(value):
+    """A JSON/CSV friendly version of a column value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class ExportFormat:
+    """Encodes (columns, batches of rows) as a stream of bytes"""
+
+    name = None
+    mimetype = 'application/octet-stream'
+    extension = ''
+
+    def encode(self, columns, batches):
+        raise NotImplementedError
+
+
+class CsvFormat(ExportFormat):
+    name = 'csv'
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def encode(self, columns, batches):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows([plain(value) for value in row] for row in batch)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+
+class GzipFormat(ExportFormat):
+    """Base for formats written as one gzip stream, a chunk per batch"""
+
+    mimetype = 'application/gzip'
+
+    def encode(self, columns, batches):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # 31: gzip container
+        for text in self.lines(columns, batches):
+            chunk = compressor.compress(text.encode('utf-8'))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def lines(self, columns, batches):
+        raise NotImplementedError
+
+
+class NdjsonFormat(GzipFormat):
+    name = 'ndjson'
+    extension = 'ndjson.gz'
+
+    def lines(self, columns, batches):
+        for batch in batches:
+            yield ''.join(json.dumps(dict(zip(columns, map(plain, row))), separators=(',', ':')) + '\n'
+                          for row in batch)
+
+
+class ColumnarFormat(GzipFormat):
+    name = 'columnar'
+    extension = 'cols.gz'
+
+    def lines(self, columns, batches):
+        yield json.dumps({'format': COLUMNAR_FORMAT, 'version': COLUMNAR_VERSION, 'columns': columns}) + '\n'
+        for batch in batches:
+            encoded = [encode_column([plain(row[i]) for row in batch]) for i in range(len(columns))]
+            yield json.dumps({'rows': len(batch), 'columns': encoded}, separators=(',', ':')) + '\n'
+
+
+def encode_column(values):
+    """Dictionary-encode a column when at most half its values are distinct"""
+    index = {}
+    codes = []
+    for value in values:
+        try:
+            codes.append(index.setdefault(value, len(index)))
+        except TypeError:   # unhashable, keep as is
+            return {'values': values}
+    if len(index) * 2 > len(values):
+        return {'values': values}
+    return {'dict': list(index), 'codes': codes}
+
+
+def decode_column(column):
+    if 'dict' in column:
+        dictionary = column['dict']
+        return [dictionary[code] for code in column['codes']]
+    return column['values']
+
+
+def read_columnar(fileobj):
+    """(columns, row iterator) from a columnar export file object"""
+    lines = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj), encoding='utf-8')
+    header = json.loads(lines.readline())
+    if header.get('format') != COLUMNAR_FORMAT:
+        raise ValueError('not a columnar export')
+
+    def rows():
+        for line in lines:
+            group = json.loads(line)
+            yield from zip(*[decode_column(column) for column in group['columns']])
+    return header['columns'], rows()
+
+
+FORMATS = {fmt.name: fmt for fmt in (CsvFormat(), NdjsonFormat(), ColumnarFormat())}
+
+
+def stream_table(connection_factory, table, fmt, batch_size=None):
+    """Bytes of a whole table in format `fmt`, read through a server-side cursor
+
+    The connection is checked out when the stream starts and returned when
+    it ends or the client goes away.
+    """
+    columns = EXPORT_TABLES[table]
+    encoder = FORMATS[fmt]
+    with connection_factory() as conn:
+        batches = iter_batches(conn, f'SELECT {", ".join(columns)} FROM {table} ORDER BY id',
+                               batch_size=batch_size or EXPORT_BATCH_SIZE)
+        yield from encoder.encode(columns, batches)
@@ -0,0 +1,165 @@
+"""
+Background export jobs
+The /api/admin/export/* endpoints only record a job and return its id; the
+export itself runs on a small thread pool in the worker that accepted it,
+so a large export neither hits the gunicorn timeout nor ties up a request.
+
+- jobs live in the export_jobs table (migration 4, applied on deploy and
+  before a worker's first request), so any worker can answer a status poll
+- at most one queued/running job per kind (a partial unique index): a
+  second request for the same export while one is in flight gets that job
+- running jobs report rows written and refresh a heartbeat; a job whose
+  worker died stops heartbeating and is marked failed after `stale_after`
+  seconds, which frees its kind for a new request
+
+Status values: queued -> running -> done | failed
+"""
+
+import json
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+ACTIVE = (QUEUED, RUNNING)
+
+
+class ExportJobs:
+    """Submits export runners to a bounded pool and tracks them in export_jobs.
+
+    `runners` maps a job kind to a callable taking progress(rows, total)
+    and returning the list of files it wrote. The pool is created lazily,
+    so threads are never inherited across a gunicorn fork.
+    """
+
+    def __init__(self, connection_factory, runners, workers=2, stale_after=600, keep_days=7):
+        self.connection = connection_factory
+        self.runners = runners
+        self.workers = workers
+        self.stale_after = stale_after
+        self.keep_days = keep_days
+        self._executor = None
+        self._pid = None
+        self._local = set()    # ids of jobs queued or running in this process
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='export-job')
+                self._pid = os.getpid()
+                self._local = set()
+            return self._executor
+
+    def submit(self, kind):
+        """Start a job for `kind`, or join the one in flight; returns (job, created)"""
+        if kind not in self.runners:
+            raise ValueError(f'unknown export: {kind}')
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE export_jobs
+                SET status = %s, error = 'export worker stopped responding', finished_at = LOCALTIMESTAMP
+                WHERE status IN %s AND heartbeat_at < LOCALTIMESTAMP - %s * INTERVAL '1 second'
+            ''', (FAILED, ACTIVE, self.stale_after))
+            cursor.execute('''
+                DELETE FROM export_jobs
+                WHERE status NOT IN %s AND created_at < LOCALTIMESTAMP - %s * INTERVAL '1 day'
+            ''', (ACTIVE, self.keep_days))
+            # The job in flight can finish between the insert and the lookup
+            for _ in range(3):
+                job_id = secrets.token_hex(8)
+                cursor.execute('''
+                    INSERT INTO export_jobs (id, kind) VALUES (%s, %s)
+                    ON CONFLICT (kind) WHERE status IN ('queued', 'running') DO NOTHING
+                    RETURNING id
+                ''', (job_id, kind))
+                if cursor.fetchone():
+                    created = True
+                    break
+                cursor.execute('SELECT id FROM export_jobs WHERE kind = %s AND status IN %s', (kind, ACTIVE))
+                row = cursor.fetchone()
+                if row:
+                    job_id, created = row[0], False
+                    break
+            else:
+                raise RuntimeError(f'could not start export job for {kind}')
+
+        if created:
+            pool = self._pool()
+            with self._lock:
+                self._local.add(job_id)
+            pool.submit(self._run, job_id, kind)
+        return self.get(job_id), created
+
+    def get(self, job_id):
+        """Job as a dict, None if unknown"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, kind, status, rows_written, total_rows, files, error,
+                       created_at, started_at, finished_at
+                FROM export_jobs WHERE id = %s
+            ''', (job_id,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        total = row[4]
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'status': row[2],
+            'rows_written': row[3],
+            'total_rows': total,
+            'progress': round(min(row[3] / total, 1.0), 4) if total else (1.0 if row[2] == DONE else 0.0),
+            'files': [os.path.basename(name) for name in json.loads(row[5] or '[]')],
+            'error': row[6],
+            'created_at': row[7].isoformat() if row[7] else None,
+            'started_at': row[8].isoformat() if row[8] else None,
+            'finished_at': row[9].isoformat() if row[9] else None,
+        }
+
+    def _heartbeat(self, job_id, rows=None, total=None):
+        """Record progress; also keeps this process's queued jobs from looking stale"""
+        with self._lock:
+            local = list(self._local)
+        with self.connection() as conn:
+            conn.cursor().execute('''
+                UPDATE export_jobs
+                SET rows_written = CASE WHEN id = %(id)s THEN COALESCE(%(rows)s, rows_written) ELSE rows_written END,
+                    total_rows = CASE WHEN id = %(id)s THEN COALESCE(%(total)s, total_rows) ELSE total_rows END,
+                    heartbeat_at = LOCALTIMESTAMP
+                WHERE id = ANY(%(local)s::varchar[])
+            ''', {'id': job_id, 'rows': rows, 'total': total, 'local': local})
+
+    def _finish(self, job_id, status, files=None, error=None):
+        with self.connection() as conn:
+            conn.cursor().execute('''
+                UPDATE export_jobs
+                SET status = %s, files = %s, error = %s, finished_at = LOCALTIMESTAMP, heartbeat_at = LOCALTIMESTAMP
+                WHERE id = %s
+            ''', (status, json.dumps(files or []), error, job_id))
+
+    def _run(self, job_id, kind):
+        try:
+            with self.connection() as conn:
+                conn.cursor().execute('''
+                    UPDATE export_jobs SET status = %s, started_at = LOCALTIMESTAMP, heartbeat_at = LOCALTIMESTAMP
+                    WHERE id = %s
+                ''', (RUNNING, job_id))
+            files = self.runners[kind](lambda rows, total: self._heartbeat(job_id, rows, total))
+            self._finish(job_id, DONE, files=files)
+            print(f"✅ Export job {job_id} ({kind}) finished: {len(files)} file(s)")
+        except Exception as e:
+            print(f"❌ Export job {job_id} ({kind}) failed: {e}")
+            try:
+                self._finish(job_id, FAILED, error=str(e))
+            except Exception as finish_error:
+                print(f"❌ Could not record export job failure: {finish_error}")
+        finally:
+            with self._lock:
+                self._local.discard(job_id)
@@ -0,0 +1,66 @@
+"""
+In-process metrics
+Thread-safe latency histogram with fixed buckets, used to expose per-call
+timings of outbound HTTP calls on the admin stats endpoints.
+"""
+
+import threading
+
+# Upper bounds in milliseconds; anything slower lands in the overflow bucket
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Counts observations per latency bucket (per process)"""
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (None if empty)"""
+        with self._lock:
+            counts, total, max_ms = list(self._counts), self._count, self._max_ms
+        if not total:
+            return None
+        rank = q / 100 * total
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else round(max_ms, 1)
+        return round(max_ms, 1)
+
+    def snapshot(self):
+        """Bucket counts (keyed '<=N ms' / '>N ms') plus count, mean, max and percentiles"""
+        with self._lock:
+            counts, total = list(self._counts), self._count
+            sum_ms, max_ms = self._sum_ms, self._max_ms
+        buckets = {f'<={bound}ms': counts[i] for i, bound in enumerate(self.buckets_ms)}
+        buckets[f'>{self.buckets_ms[-1]}ms'] = counts[-1]
+        return {
+            'count': total,
+            'mean_ms': round(sum_ms / total, 1) if total else None,
+            'max_ms': round(max_ms, 1),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': buckets,
+        }
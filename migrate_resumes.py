@@ -0,0 +1,106 @@
+"""
+Move resume files from applications.resume_data (BYTEA) into the blob store
+
+Rows are processed in small batches, one transaction per batch: each
+resume is written to the blob store, then the row gets resume_sha256 /
+resume_size / resume_mime and its resume_data is cleared. Re-running is
+safe; already migrated rows are skipped.
+
+Usage:
+    python migrate_resumes.py                  # migrate everything
+    python migrate_resumes.py --batch-size 10 --limit 100
+    python migrate_resumes.py --keep-data      # copy only, leave resume_data
+    python migrate_resumes.py --gc             # delete blobs no row references
+
+Run VACUUM (FULL) applications afterwards to give the space back to the OS.
+"""
+
+import argparse
+import time
+
+import migrations
+from backend import DATABASE_URL, db_connection, blob_store
+
+
+def migrate_batch(batch_size, keep_data=False):
+    """Migrate up to batch_size rows, returns (rows migrated, bytes moved)"""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        # Pick ids first, then fetch one blob at a time to bound memory use
+        cursor.execute('''
+            SELECT id FROM applications
+            WHERE resume_data IS NOT NULL AND resume_sha256 IS NULL
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ''', (batch_size,))
+        ids = [row[0] for row in cursor.fetchall()]
+
+        moved = 0
+        for application_id in ids:
+            cursor.execute('SELECT resume_data FROM applications WHERE id = %s', (application_id,))
+            info = blob_store.put_bytes(bytes(cursor.fetchone()[0]))
+            cursor.execute(f'''
+                UPDATE applications
+                SET resume_sha256 = %s, resume_size = %s, resume_mime = %s
+                    {'' if keep_data else ', resume_data = NULL'}
+                WHERE id = %s
+            ''', (info.sha256, info.size, info.mime_type, application_id))
+            moved += info.size
+        return len(ids), moved
+
+
+def collect_garbage(dry_run=False, min_age=3600):
+    """Delete blobs that no application references, returns how many
+
+    Blobs younger than min_age seconds are kept: an upload is stored
+    before its application row commits.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT resume_sha256 FROM applications WHERE resume_sha256 IS NOT NULL')
+        referenced = {row[0] for row in cursor.fetchall()}
+
+    removed = 0
+    cutoff = time.time() - min_age
+    for sha256 in list(blob_store.keys()):
+        if sha256 not in referenced and blob_store.modified_at(sha256) < cutoff:
+            if not dry_run:
+                blob_store.delete(sha256)
+            removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move resume BLOBs out of the applications table')
+    parser.add_argument('--batch-size', type=int, default=20, help='rows per transaction (default 20)')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many rows')
+    parser.add_argument('--keep-data', action='store_true', help='do not clear resume_data after copying')
+    parser.add_argument('--gc', action='store_true', help='delete unreferenced blobs instead of migrating')
+    parser.add_argument('--dry-run', action='store_true', help='with --gc: only count unreferenced blobs')
+    args = parser.parse_args()
+
+    # The blob reference columns come from migration 8
+    migrations.migrate(DATABASE_URL)
+
+    if args.gc:
+        removed = collect_garbage(dry_run=args.dry_run)
+        print(f"🧹 {'Would remove' if args.dry_run else 'Removed'} {removed} unreferenced blobs")
+        return
+
+    total_rows = total_bytes = 0
+    start = time.time()
+    while args.limit is None or total_rows < args.limit:
+        batch_size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - total_rows)
+        rows, moved = migrate_batch(batch_size, keep_data=args.keep_data)
+        if not rows:
+            break
+        total_rows += rows
+        total_bytes += moved
+        print(f"📦 Migrated {total_rows} resumes ({total_bytes / 1024 / 1024:.1f} MB)")
+
+    print(f"✅ Done: {total_rows} resumes moved to the blob store in {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
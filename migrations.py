@@ -0,0 +1,467 @@
+"""
+Versioned schema migrations
+
+init_db only creates missing tables. Everything after that (indexes,
+constraints, column changes) is a numbered Migration in MIGRATIONS,
+applied in order and recorded in the schema_version table, so each one
+runs once per database.
+
+- a session advisory lock keeps several workers / deploy hooks from
+  migrating at the same time
+- a migration made only of plain SQL runs in one transaction
+- Index steps can be built with CREATE INDEX CONCURRENTLY, which does not
+  block writes on a live table but cannot run inside a transaction. Such
+  migrations run step by step in autocommit mode, so every step must be
+  idempotent (IF NOT EXISTS); an INVALID index left behind by a failed
+  concurrent build is dropped and rebuilt on the next run.
+
+Migrations run as a deploy step (Procfile release, the compose `migrate`
+service) and, as a fallback, in each worker before its first request
+(lazy_init_db). The fallback only takes the lock if it is free, so a
+request never waits on a migration another process is running.
+
+Usage:
+    python migrations.py                    # apply pending migrations (CONCURRENTLY);
+                                            # creates the tables first on an empty database
+    python migrations.py --status           # list applied / pending versions
+    python migrations.py --explain          # index usage report for the hot route queries
+"""
+
+import argparse
+import json
+from collections import namedtuple
+
+import psycopg2
+
+SCHEMA_VERSION_TABLE = 'schema_version'
+# pg_advisory_lock key shared by every process running migrations
+MIGRATION_LOCK_ID = 4210917
+
+
+class Index(namedtuple('Index', ['name', 'table', 'columns', 'where', 'unique'])):
+    """An index step; built CONCURRENTLY unless the runner says otherwise"""
+
+    def __new__(cls, name, table, columns, where=None, unique=False):
+        return super().__new__(cls, name, table, columns, where, unique)
+
+    def sql(self, concurrently=True):
+        return 'CREATE {}INDEX {}IF NOT EXISTS {} ON {} ({}){}'.format(
+            'UNIQUE ' if self.unique else '', 'CONCURRENTLY ' if concurrently else '',
+            self.name, self.table, self.columns, f' WHERE {self.where}' if self.where else '')
+
+
+Migration = namedtuple('Migration', ['version', 'name', 'steps'])
+
+
+def updated_at_steps(table, created_column):
+    """Steps giving `table` an updated_at column kept current by a trigger
+
+    Existing rows start at their creation time, so an export watermark
+    taken on the creation time stays valid on (updated_at, id).
+    """
+    return [
+        f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP',
+        f'ALTER TABLE {table} ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP',
+        f'UPDATE {table} SET updated_at = COALESCE({created_column}, CURRENT_TIMESTAMP) WHERE updated_at IS NULL',
+        f'DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table}',
+        f'''
+        CREATE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        ''',
+        Index(f'idx_{table}_updated_at_id', table, 'updated_at, id'),
+    ]
+
+
+MIGRATIONS = [
+    # Indexes init_db used to create ad hoc; existing databases already have them
+    Migration(1, 'listing and dashboard indexes', [
+        # Keyset pagination on (applied_at, id), optionally narrowed by an admin filter
+        Index('idx_applications_applied_at_id', 'applications', 'applied_at DESC, id DESC'),
+        Index('idx_applications_status_applied_at_id', 'applications', 'status, applied_at DESC, id DESC'),
+        Index('idx_applications_position_applied_at_id', 'applications', 'position, applied_at DESC, id DESC'),
+        Index('idx_applications_college_applied_at_id', 'applications', 'college, applied_at DESC, id DESC'),
+        Index('idx_users_created_at_id', 'users', 'created_at DESC, id DESC'),
+        Index('idx_emails_sent_at_id', 'emails', 'sent_at DESC, id DESC'),
+        Index('idx_emails_user_id', 'emails', 'user_id'),
+        Index('idx_projects_user_id', 'projects', 'user_id, updated_at DESC'),
+        Index('idx_recruiter_applications_stats', 'recruiter_applications', 'recruiter_id, status, application_date'),
+        Index('idx_intern_daily_tasks_stats', 'intern_daily_tasks', 'intern_id, status, completed_at, due_date'),
+        Index('idx_weekly_tasks_week_number', 'weekly_tasks', 'week_number'),
+        Index('idx_task_submissions_intern_submitted', 'task_submissions', 'intern_id, submitted_at DESC'),
+        Index('idx_intern_progress_intern_week', 'intern_progress', 'intern_id, week_number'),
+    ]),
+    # Foreign keys (PostgreSQL does not index the referencing side, so every
+    # parent delete / per-owner lookup was a sequential scan) and the
+    # per-owner listings that sort
+    Migration(2, 'foreign key and per-owner listing indexes', [
+        Index('idx_sessions_user_id', 'sessions', 'user_id'),
+        Index('idx_applications_email', 'applications', 'email'),
+        Index('idx_selected_interns_application_id', 'selected_interns', 'application_id'),
+        Index('idx_intern_sessions_intern_id', 'intern_sessions', 'intern_id'),
+        Index('idx_intern_daily_tasks_intern_created', 'intern_daily_tasks', 'intern_id, created_at DESC'),
+        Index('idx_daily_task_submissions_task_id', 'daily_task_submissions', 'task_id'),
+        Index('idx_daily_task_submissions_intern_id', 'daily_task_submissions', 'intern_id'),
+        Index('idx_task_submissions_task_id', 'task_submissions', 'task_id'),
+        Index('idx_recruiter_sessions_recruiter_id', 'recruiter_sessions', 'recruiter_id'),
+        Index('idx_recruiter_applications_recruiter_date', 'recruiter_applications',
+              'recruiter_id, application_date DESC'),
+    ]),
+    # Watermarks for incremental exports (email_export.py --incremental)
+    Migration(3, 'export watermarks', [
+        '''
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            name VARCHAR(100) PRIMARY KEY,
+            last_at TIMESTAMP,
+            last_id INTEGER,
+            rows_exported BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    # Background export jobs (export_jobs.py); one queued/running job per kind
+    Migration(4, 'export jobs', [
+        '''
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id VARCHAR(32) PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            rows_written BIGINT NOT NULL DEFAULT 0,
+            total_rows BIGINT,
+            files TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            heartbeat_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        Index('idx_export_jobs_active_kind', 'export_jobs', 'kind',
+              where="status IN ('queued', 'running')", unique=True),
+    ]),
+    # Per-recruiter dashboard counters, kept in step with recruiter_applications
+    # by the recruiter endpoints (backend.adjust_recruiter_counters)
+    Migration(5, 'recruiter stats counters', [
+        '''
+        CREATE TABLE IF NOT EXISTS recruiter_stats_counters (
+            recruiter_id INTEGER PRIMARY KEY REFERENCES recruiters(id) ON DELETE CASCADE,
+            total INTEGER NOT NULL DEFAULT 0,
+            offers INTEGER NOT NULL DEFAULT 0,
+            interviewing INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        INSERT INTO recruiter_stats_counters (recruiter_id, total, offers, interviewing)
+        SELECT recruiter_id, COUNT(*), COUNT(*) FILTER (WHERE status = 'offer'),
+               COUNT(*) FILTER (WHERE status = 'interviewing')
+        FROM recruiter_applications
+        GROUP BY recruiter_id
+        ON CONFLICT (recruiter_id) DO NOTHING
+        ''',
+    ]),
+    # Version counters for data cached in every worker (backend.bump_cache_version)
+    Migration(6, 'cache versions', [
+        '''
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name VARCHAR(100) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        ''',
+        "INSERT INTO cache_versions (name) VALUES ('weekly_tasks') ON CONFLICT (name) DO NOTHING",
+    ]),
+    # Outbox columns on emails (email_outbox.py); rows written before the
+    # outbox existed were already sent (or logged)
+    Migration(7, 'email outbox columns', [
+        '''
+        ALTER TABLE emails
+        ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'sent',
+        ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS last_error TEXT,
+        ADD COLUMN IF NOT EXISTS delivered_at TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS batch_id VARCHAR(64)
+        ''',
+        Index('idx_emails_outbox_pending', 'emails', 'next_attempt_at', where="status = 'pending'"),
+    ]),
+    # Blob store references on applications (blob_store.py, migrate_resumes.py);
+    # resume_data stays for rows not yet moved to the store
+    Migration(8, 'resume blob columns', [
+        '''
+        ALTER TABLE applications
+        ADD COLUMN IF NOT EXISTS resume_sha256 VARCHAR(64),
+        ADD COLUMN IF NOT EXISTS resume_size BIGINT,
+        ADD COLUMN IF NOT EXISTS resume_mime VARCHAR(100)
+        ''',
+        Index('idx_applications_resume_sha256', 'applications', 'resume_sha256'),
+    ]),
+    # Admin / intern sessions shared by every worker (session_store.PostgresSessionStore)
+    Migration(9, 'shared sessions', [
+        '''
+        CREATE TABLE IF NOT EXISTS shared_sessions (
+            namespace VARCHAR(50) NOT NULL,
+            token VARCHAR(255) NOT NULL,
+            data JSONB NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (namespace, token)
+        )
+        ''',
+        Index('idx_shared_sessions_expires_at', 'shared_sessions', 'expires_at'),
+    ]),
+    # Incremental exports key on (updated_at, id), so edited rows are exported again
+    Migration(10, 'updated_at on users and applications', [
+        '''
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        *updated_at_steps('users', 'created_at'),
+        *updated_at_steps('applications', 'applied_at'),
+    ]),
+]
+
+
+def check_order(migrations):
+    """Versions must be unique and strictly increasing"""
+    versions = [m.version for m in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError(f'migration versions out of order: {versions}')
+
+
+check_order(MIGRATIONS)
+
+
+def ensure_version_table(cursor, table=SCHEMA_VERSION_TABLE):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def applied_versions(cursor, table=SCHEMA_VERSION_TABLE):
+    cursor.execute(f'SELECT version FROM {table} ORDER BY version')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def drop_invalid_index(conn, name):
+    """Drop an index left INVALID by an interrupted concurrent build"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND NOT i.indisvalid
+    ''', (name,))
+    if cursor.fetchone():
+        print(f"🧹 Dropping invalid index {name}")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+def run_step(conn, step, concurrently):
+    if isinstance(step, Index):
+        if concurrently:
+            drop_invalid_index(conn, step.name)
+        conn.cursor().execute(step.sql(concurrently))
+    else:
+        conn.cursor().execute(step)
+
+
+def apply_migration(conn, migration, concurrently, table=SCHEMA_VERSION_TABLE):
+    online = concurrently and any(isinstance(step, Index) for step in migration.steps)
+    conn.autocommit = online
+    try:
+        for step in migration.steps:
+            run_step(conn, step, online)
+        conn.cursor().execute(f'INSERT INTO {table} (version, name) VALUES (%s, %s)',
+                              (migration.version, migration.name))
+        if not online:
+            conn.commit()
+    except Exception:
+        if not online:
+            conn.rollback()
+        raise
+    finally:
+        conn.autocommit = False
+
+
+def migrate(dsn, migrations=MIGRATIONS, concurrently=True, table=SCHEMA_VERSION_TABLE, wait=True):
+    """Apply pending migrations in order, returns the versions applied
+
+    concurrently=False builds indexes inside the migration's transaction
+    (fine for new or small tables, and what init_db uses).
+    wait=False returns None straight away, applying nothing, when another
+    process holds the migration lock.
+    """
+    check_order(migrations)
+    conn = psycopg2.connect(dsn)
+    locked = False
+    try:
+        cursor = conn.cursor()
+        if wait:
+            cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+        else:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+            if not cursor.fetchone()[0]:
+                return None
+        locked = True
+        ensure_version_table(cursor, table)
+        done = set(applied_versions(cursor, table))
+        conn.commit()
+
+        applied = []
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            print(f"🔧 Applying migration {migration.version}: {migration.name}")
+            apply_migration(conn, migration, concurrently, table)
+            applied.append(migration.version)
+        return applied
+    finally:
+        if not conn.closed:
+            conn.rollback()
+            if locked:
+                conn.cursor().execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_ID,))
+            conn.close()
+
+
+def route_queries():
+    """(route, expected index, sql, params) for the hot route queries
+
+    The SQL is the routes' own (module-level constants in backend.py), with
+    sample parameters; the expected index may be a tuple of indexes that
+    serve the query equally well. Foreign key lookups are the ones
+    PostgreSQL itself runs when a parent row is deleted.
+    """
+    import backend
+
+    first_page = {'since': None, 'until': None, 'after_at': None, 'after_id': None, 'limit': 101}
+    later_page = dict(first_page, after_at='2025-01-01', after_id=1000)
+    application_fields = ['id', 'fullName', 'status', 'appliedAt']
+    return [
+        ('GET /api/admin/applications', 'idx_applications_applied_at_id',
+         *backend.application_page_query(application_fields, {}, ('2025-01-01', 1000), 100)),
+        ('GET /api/admin/applications?status=', 'idx_applications_status_applied_at_id',
+         *backend.application_page_query(application_fields, {'status': 'pending'}, None, 100)),
+        ('GET /api/users', 'idx_users_created_at_id', backend.USERS_PAGE_SQL, later_page),
+        ('GET /api/emails?user_id=', ('idx_emails_user_id', 'idx_emails_sent_at_id'), backend.EMAILS_PAGE_SQL,
+         dict(first_page, user_id=1, summary=True)),
+        ('GET /api/emails', 'idx_emails_sent_at_id', backend.EMAILS_PAGE_SQL,
+         dict(later_page, user_id=None, summary=True)),
+        ('GET /api/admin/all-data (projects)', 'idx_projects_user_id', backend.ADMIN_DATA_PAGE_SQL, first_page),
+        ('GET /api/intern/tasks', 'idx_intern_daily_tasks_intern_created', backend.INTERN_TASKS_SQL, (1,)),
+        ('GET /api/intern/stats', ('idx_intern_daily_tasks_stats', 'idx_intern_daily_tasks_intern_created'),
+         backend.INTERN_STATS_SQL, {'intern_id': 1}),
+        ('GET /api/intern/dashboard (submissions)', 'idx_task_submissions_intern_submitted',
+         backend.INTERN_DASHBOARD_SQL, {'intern_id': 1}),
+        ('GET /api/intern/dashboard (progress)', 'idx_intern_progress_intern_week',
+         backend.INTERN_DASHBOARD_SQL, {'intern_id': 1}),
+        ('GET /api/recruiter/applications', 'idx_recruiter_applications_recruiter_date',
+         backend.RECRUITER_APPLICATIONS_SQL, (1,)),
+        ('GET /api/recruiter/stats', ('idx_recruiter_applications_stats', 'idx_recruiter_applications_recruiter_date'),
+         backend.RECRUITER_STATS_SQL, {'id': 1}),
+        ('GET /api/recruiter/stats (no counters yet)',
+         ('idx_recruiter_applications_stats', 'idx_recruiter_applications_recruiter_date'),
+         backend.RECRUITER_STATS_COUNT_SQL, {'id': 1}),
+        ('DELETE FROM users (sessions foreign key check)', 'idx_sessions_user_id',
+         'SELECT 1 FROM sessions WHERE user_id = %s', (1,)),
+        ('DELETE /api/admin/interns/<id> (sessions)', 'idx_intern_sessions_intern_id',
+         'SELECT 1 FROM intern_sessions WHERE intern_id = %s', (1,)),
+        ('DELETE /api/admin/interns/<id> (daily submissions)', 'idx_daily_task_submissions_intern_id',
+         'SELECT 1 FROM daily_task_submissions WHERE intern_id = %s', (1,)),
+        ('DELETE /api/admin/recruiters/<id> (sessions)', 'idx_recruiter_sessions_recruiter_id',
+         'SELECT 1 FROM recruiter_sessions WHERE recruiter_id = %s', (1,)),
+    ]
+
+
+def plan_indexes(plan):
+    """Names of every index an EXPLAIN (FORMAT JSON) plan node uses"""
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= plan_indexes(child)
+    return names
+
+
+def explain_routes(cursor, queries=None):
+    """EXPLAIN each route query, returns [(route, expected indexes, indexes used, plan text)]
+
+    Sequential scans are disabled for the check: on a small dev database
+    the planner would rightly scan instead, which says nothing about
+    whether the index is usable.
+    """
+    report = []
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    for route, expected, sql, params in queries or route_queries():
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        cursor.execute('EXPLAIN ' + sql, params)
+        text = '\n'.join(row[0] for row in cursor.fetchall())
+        if isinstance(expected, str):
+            expected = (expected,)
+        report.append((route, expected, plan_indexes(plan[0]['Plan']), text))
+    return report
+
+
+def print_report(report, verbose=False):
+    missing = 0
+    for route, expected, used, text in report:
+        ok = bool(used & set(expected))
+        missing += not ok
+        print(f"{'✅' if ok else '❌'} {route}: {', '.join(sorted(used)) or 'no index'}")
+        if verbose or not ok:
+            print('    ' + text.replace('\n', '\n    '))
+    print(f"{len(report) - missing}/{len(report)} route queries use their index")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations')
+    parser.add_argument('--status', action='store_true', help='show applied and pending migrations')
+    parser.add_argument('--explain', action='store_true', help='EXPLAIN the hot route queries')
+    parser.add_argument('--verbose', action='store_true', help='with --explain: print every plan')
+    parser.add_argument('--no-concurrently', action='store_true',
+                        help='build indexes inside a transaction (locks writes; fine on small tables)')
+    args = parser.parse_args()
+
+    import backend
+    DATABASE_URL = backend.DATABASE_URL
+
+    if args.status or args.explain:
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            cursor = conn.cursor()
+            if args.explain:
+                raise SystemExit(1 if print_report(explain_routes(cursor), args.verbose) else 0)
+            ensure_version_table(cursor)
+            done = set(applied_versions(cursor))
+            for migration in MIGRATIONS:
+                print(f"{'✅' if migration.version in done else '⏳'} {migration.version}: {migration.name}")
+        finally:
+            conn.rollback()
+            conn.close()
+        return
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass('users')")
+        fresh = cursor.fetchone()[0] is None
+    finally:
+        conn.close()
+    if fresh:
+        # Migrations assume the base tables; init_db creates them and migrates
+        backend.init_db()
+        return
+
+    applied = migrate(DATABASE_URL, concurrently=not args.no_concurrently)
+    print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Schema is up to date")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Keyset (cursor) pagination helpers for the admin listing endpoints
+
+Lists are ordered by a (timestamp, id) pair, newest first. The cursor
+handed to the client is the sort key of the last row it received; the
+next page is `WHERE (ts, id) < (cursor)` which a composite index on
+(ts DESC, id DESC) answers without scanning skipped rows, unlike OFFSET.
+Cursors are opaque url-safe base64 JSON, so their layout can change.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageRequest(ValueError):
+    """Bad cursor / limit / fields / date parameter (reported as 400)"""
+
+
+def encode_cursor(*values):
+    """Opaque cursor for a sort key; datetimes are kept at full precision"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size=2):
+    """Sort key from a cursor made by encode_cursor, None for no cursor"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest('Invalid cursor')
+    return values
+
+
+def decode_time_cursor(token):
+    """(timestamp, id) sort key from a cursor, None for no cursor"""
+    values = decode_cursor(token, size=2)
+    if values is None:
+        return None
+    try:
+        return datetime.fromisoformat(values[0]), int(values[1])
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def page_limit(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Page size from a ?limit= value, clamped to 1..maximum"""
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidPageRequest('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def parse_fields(raw, allowed, required=()):
+    """Field names from a ?fields=a,b projection, in `allowed` order.
+
+    `required` fields are always included (e.g. the id the cursor needs).
+    No parameter means every allowed field.
+    """
+    if not raw:
+        return list(allowed)
+    wanted = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = wanted - set(allowed)
+    if unknown:
+        raise InvalidPageRequest(f'Unknown fields: {", ".join(sorted(unknown))}')
+    wanted.update(required)
+    return [name for name in allowed if name in wanted]
+
+
+def parse_date(raw, end=False):
+    """datetime from an ISO date or datetime parameter.
+
+    A bare date used as the end of a range covers the whole day, so the
+    returned bound is meant to be exclusive (`< end`).
+    """
+    if not raw:
+        return None
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError:
+        raise InvalidPageRequest(f'Invalid date: {raw}')
+    if end and len(raw) == 10:
+        value += timedelta(days=1)
+    return value
+
+
+def page_response(rows, limit, key):
+    """Trim the extra row fetched to detect more pages.
+
+    Queries fetch limit + 1 rows; returns (rows, next_cursor) where
+    next_cursor is None on the last page. `key(row)` gives the sort key.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,204 @@
+"""
+Password hashing
+Salted, cost-tunable hashing (scrypt, or PBKDF2-SHA256 where scrypt is
+unavailable) with transparent upgrade of legacy unsalted SHA-256 hashes.
+
+Hashes are self-describing strings, so the cost can be raised at any time;
+verify_password() reports when a stored hash should be upgraded:
+
+    scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>
+    pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+    <64 hex chars>                      legacy unsalted SHA-256
+
+Hashing runs on a small bounded thread pool so a burst of logins cannot
+tie up every request thread with CPU/memory-heavy KDF work.
+
+Run `python passwords.py --target-ms 50` to pick a cost for this machine.
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HAS_SCRYPT = hasattr(hashlib, 'scrypt')
+
+ALGORITHM = os.getenv('PASSWORD_HASH_ALGORITHM', 'scrypt' if HAS_SCRYPT else 'pbkdf2_sha256')
+SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 200000))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# At most HASH_WORKERS hashes run at once; at most HASH_MAX_PENDING may wait
+HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))
+HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued (login burst)"""
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem must cover 128 * n * r bytes plus overhead
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, dklen=HASH_BYTES)
+
+
+def _legacy_sha256(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _is_legacy(stored_hash):
+    return len(stored_hash) == 64 and all(c in '0123456789abcdef' for c in stored_hash)
+
+
+def _hash_now(password, algorithm=None):
+    algorithm = algorithm or ALGORITHM
+    salt = secrets.token_bytes(SALT_BYTES)
+    if algorithm == 'scrypt':
+        digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    if algorithm == 'pbkdf2_sha256':
+        digest = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+    raise ValueError(f'unknown password hash algorithm: {algorithm}')
+
+
+def _verify_now(password, stored_hash):
+    """Returns (matches, needs_rehash)"""
+    if not stored_hash:
+        return False, False
+    if _is_legacy(stored_hash):
+        return hmac.compare_digest(_legacy_sha256(password), stored_hash), True
+
+    parts = stored_hash.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt(password, bytes.fromhex(parts[4]), n, r, p)
+            outdated = ALGORITHM != 'scrypt' or (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+            return hmac.compare_digest(digest.hex(), parts[5]), outdated
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            iterations = int(parts[1])
+            digest = _pbkdf2(password, bytes.fromhex(parts[2]), iterations)
+            outdated = ALGORITHM != 'pbkdf2_sha256' or iterations != PBKDF2_ITERATIONS
+            return hmac.compare_digest(digest.hex(), parts[3]), outdated
+    except ValueError:
+        pass
+    return False, False
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _get_executor():
+    """Per-process pool (threads do not survive gunicorn's fork)"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS,
+                                               thread_name_prefix='password-hash')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _run_bounded(fn, *args):
+    if not _pending.acquire(timeout=HASH_QUEUE_TIMEOUT):
+        raise PasswordHasherBusy('too many password hashes in progress')
+    try:
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        _pending.release()
+
+
+def hash_password(password):
+    """Hash a password with a random salt and the configured cost"""
+    return _run_bounded(_hash_now, password)
+
+
+def verify_password(password, stored_hash):
+    """Check a password against a stored hash.
+
+    Returns (matches, needs_rehash). needs_rehash is true for legacy SHA-256
+    hashes and hashes made with an older algorithm/cost; callers should
+    store hash_password(password) after a successful login.
+    """
+    return _run_bounded(_verify_now, password, stored_hash)
+
+
+# ============================================================================
+# COST CALIBRATION
+# ============================================================================
+
+def _time_call(fn, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def calibrate(target_ms=50, rounds=3):
+    """Find the largest cost whose verify time stays under target_ms"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    results = {}
+
+    if HAS_SCRYPT:
+        n, timings = 2 ** 10, []
+        while n <= 2 ** 20:
+            elapsed = _time_call(lambda: _scrypt('benchmark', salt, n, SCRYPT_R, SCRYPT_P), rounds)
+            timings.append((n, elapsed))
+            if elapsed > target_ms:
+                break
+            n *= 2
+        fitting = [t for t in timings if t[1] <= target_ms] or timings[:1]
+        results['scrypt'] = {'n': fitting[-1][0], 'ms': round(fitting[-1][1], 1),
+                             'timings': [(n, round(ms, 1)) for n, ms in timings]}
+
+    # PBKDF2 cost is linear in iterations, so measure once and scale
+    probe = 20000
+    elapsed = _time_call(lambda: _pbkdf2('benchmark', salt, probe), rounds)
+    iterations = max(10000, int(probe * target_ms / elapsed) // 1000 * 1000)
+    results['pbkdf2_sha256'] = {
+        'iterations': iterations,
+        'ms': round(_time_call(lambda: _pbkdf2('benchmark', salt, iterations), rounds), 1),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pick password hashing cost for a target verify latency')
+    parser.add_argument('--target-ms', type=float, default=50, help='target time per verify (default 50)')
+    parser.add_argument('--rounds', type=int, default=3, help='timing rounds per setting (best is kept)')
+    args = parser.parse_args()
+
+    print(f"⏱️ Calibrating password hashing for ~{args.target_ms:g} ms per verify...")
+    results = calibrate(args.target_ms, args.rounds)
+
+    if 'scrypt' in results:
+        scrypt = results['scrypt']
+        for n, ms in scrypt['timings']:
+            print(f"   scrypt n={n:<8} r={SCRYPT_R} p={SCRYPT_P}  {ms:8.1f} ms")
+        print(f"✅ PASSWORD_HASH_ALGORITHM=scrypt PASSWORD_SCRYPT_N={scrypt['n']}  ({scrypt['ms']} ms)")
+    pbkdf2 = results['pbkdf2_sha256']
+    print(f"✅ PASSWORD_HASH_ALGORITHM=pbkdf2_sha256 PASSWORD_PBKDF2_ITERATIONS={pbkdf2['iterations']}  ({pbkdf2['ms']} ms)")
+
+
+if __name__ == '__main__':
+    main()
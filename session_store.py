@@ -0,0 +1,301 @@
+"""
+Session stores for admin and intern login tokens
+Gunicorn runs several worker processes, so a token issued by one worker
+must be visible to the others. Three interchangeable backends:
+
+- memory:   per-process dict (development / single worker only)
+- file:     one small file per token in a shared directory on this host
+            (tmpfs /dev/shm when available, so effectively shared memory)
+- postgres: shared_sessions table, fronted by a short-lived local cache
+
+All stores behave like a dict (`store[token] = data`, `token in store`,
+`store.get(token)`, `del store[token]`), so existing call sites are unchanged.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from cache import TTLCache, MISSING
+
+
+class SessionStore:
+    """Base class: dict-style access on top of get/set/delete"""
+
+    def __init__(self, namespace, ttl=43200):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, token, default=None):
+        raise NotImplementedError
+
+    def set(self, token, data, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, token):
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove expired sessions, returns how many were removed"""
+        raise NotImplementedError
+
+    def __getitem__(self, token):
+        data = self.get(token)
+        if data is None:
+            raise KeyError(token)
+        return data
+
+    def __setitem__(self, token, data):
+        self.set(token, data)
+
+    def __delitem__(self, token):
+        self.delete(token)
+
+    def __contains__(self, token):
+        return bool(token) and self.get(token) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local sessions - tokens are NOT shared between workers"""
+
+    def __init__(self, namespace, ttl=43200):
+        super().__init__(namespace, ttl)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, token, default=None):
+        entry = self._sessions.get(token)
+        if entry is None:
+            return default
+        data, expires_at = entry
+        if expires_at <= time.time():
+            self._sessions.pop(token, None)
+            return default
+        return data
+
+    def set(self, token, data, ttl=None):
+        with self._lock:
+            self._sessions[token] = (data, time.time() + (ttl or self.ttl))
+
+    def delete(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            expired = [t for t, (_, expires_at) in self._sessions.items() if expires_at <= now]
+            for token in expired:
+                del self._sessions[token]
+        return len(expired)
+
+
+def default_session_dir():
+    """Prefer tmpfs so lookups never touch a disk"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'xgenai-sessions')
+
+
+class FileSessionStore(SessionStore):
+    """Sessions shared by every worker on one host via a directory.
+
+    Each token is a JSON file named after the SHA-256 of the token (the raw
+    token never appears on disk as a filename). Writes go through a temp
+    file + os.replace, so readers never see a half-written session.
+    """
+
+    def __init__(self, namespace, ttl=43200, directory=None):
+        super().__init__(namespace, ttl)
+        self.directory = os.path.join(directory or default_session_dir(), namespace)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def _path(self, token):
+        return os.path.join(self.directory, hashlib.sha256(token.encode()).hexdigest())
+
+    def get(self, token, default=None):
+        if not token:
+            return default
+        path = self._path(token)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if entry['expires_at'] <= time.time():
+            self._remove(path)
+            return default
+        return entry['data']
+
+    def set(self, token, data, ttl=None):
+        entry = {'data': data, 'expires_at': time.time() + (ttl or self.ttl)}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(token))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def delete(self, token):
+        if token:
+            self._remove(self._path(token))
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def sweep(self):
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.startswith('.tmp-'):
+                    # Orphaned temp file from a crashed write
+                    if os.path.getmtime(path) < now - 60:
+                        self._remove(path)
+                    continue
+                with open(path) as f:
+                    expired = json.load(f)['expires_at'] <= now
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                self._remove(path)
+                removed += 1
+        return removed
+
+
+class PostgresSessionStore(SessionStore):
+    """Sessions in PostgreSQL, shared across hosts, with a hot local cache.
+
+    Verification is served from the local cache in the common case; a miss
+    costs one primary-key lookup. Deletes are immediate in this worker and
+    reach the other workers within `cache_ttl` seconds.
+
+    The shared_sessions table is created by migration 9 (migrations.py).
+    `connection_factory` returns a context manager yielding a connection;
+    writes are committed by whoever owns that connection.
+    """
+
+    def __init__(self, namespace, connection_factory, ttl=43200, cache_ttl=30,
+                 negative_ttl=2, cache_size=10000):
+        super().__init__(namespace, ttl)
+        self._connection = connection_factory
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.negative_ttl = negative_ttl
+
+    def get(self, token, default=None):
+        if not token:
+            return default
+        cached = self._cache.get(token, MISSING)
+        if cached is not MISSING:
+            return default if cached is None else cached
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT data, EXTRACT(EPOCH FROM (expires_at - CURRENT_TIMESTAMP))
+                FROM shared_sessions
+                WHERE namespace = %s AND token = %s AND expires_at > CURRENT_TIMESTAMP
+            ''', (self.namespace, token))
+            row = cursor.fetchone()
+
+        if not row:
+            self._cache.set(token, None, ttl=self.negative_ttl)
+            return default
+        data, remaining = row
+        self._cache.set(token, data, ttl=min(self._cache.ttl, float(remaining)))
+        return data
+
+    def set(self, token, data, ttl=None):
+        ttl = ttl or self.ttl
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO shared_sessions (namespace, token, data, expires_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP + %s * INTERVAL '1 second')
+                ON CONFLICT (namespace, token)
+                DO UPDATE SET data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+            ''', (self.namespace, token, json.dumps(data), ttl))
+        self._cache.set(token, data)
+
+    def delete(self, token):
+        if not token:
+            return
+        self._cache.delete(token)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM shared_sessions WHERE namespace = %s AND token = %s',
+                           (self.namespace, token))
+
+    def sweep(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM shared_sessions
+                WHERE namespace = %s AND expires_at <= CURRENT_TIMESTAMP
+            ''', (self.namespace,))
+            return cursor.rowcount
+
+
+def create_session_store(namespace, backend=None, connection_factory=None, ttl=None):
+    """Build a store from SESSION_BACKEND / SESSION_TTL / SESSION_DIR settings"""
+    backend = (backend or os.getenv('SESSION_BACKEND', 'file')).lower()
+    ttl = ttl or int(os.getenv('SESSION_TTL', 43200))
+    if backend == 'memory':
+        return MemorySessionStore(namespace, ttl=ttl)
+    if backend == 'file':
+        return FileSessionStore(namespace, ttl=ttl, directory=os.getenv('SESSION_DIR'))
+    if backend == 'postgres':
+        if connection_factory is None:
+            raise ValueError('postgres session store needs a connection factory')
+        return PostgresSessionStore(namespace, connection_factory, ttl=ttl,
+                                    cache_ttl=int(os.getenv('SESSION_CACHE_TTL', 30)))
+    raise ValueError(f'unknown SESSION_BACKEND: {backend}')
+
+
+class SessionSweeper:
+    """Background thread that periodically removes expired sessions.
+
+    Threads do not survive fork, so ensure_running() is cheap to call on
+    every request and (re)starts the thread in whichever process calls it.
+    """
+
+    def __init__(self, stores, interval=300):
+        self.stores = stores
+        self.interval = interval
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+            self._thread.start()
+
+    def sweep_once(self):
+        removed = 0
+        for store in self.stores:
+            try:
+                removed += store.sweep()
+            except Exception as e:
+                print(f"⚠️ Session sweep failed for {store.namespace}: {e}")
+        return removed
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            removed = self.sweep_once()
+            if removed:
+                print(f"🧹 Removed {removed} expired sessions")
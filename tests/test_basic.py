@@ -11,7 +11,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import Flask app
-from backend import app, hash_password, get_db_connection
+from backend import app, hash_password, verify_password, get_db_connection
 
 @pytest.fixture
 def client():
@@ -89,14 +89,16 @@ class TestSecurity:
         password = "TestPassword123"
         hashed = hash_password(password)
         assert hashed != password
-        assert len(hashed) == 64  # SHA-256
+        assert verify_password(password, hashed)[0]
     
-    def test_password_hashing_consistent(self):
-        """Test same password produces same hash"""
+    def test_password_hashing_salted(self):
+        """Test same password produces a different (salted) hash each time"""
         password = "TestPassword123"
         hash1 = hash_password(password)
         hash2 = hash_password(password)
-        assert hash1 == hash2
+        assert hash1 != hash2
+        assert verify_password(password, hash1)[0]
+        assert verify_password(password, hash2)[0]
     
     def test_different_passwords_different_hashes(self):
         """Test different passwords produce different hashes"""
@@ -0,0 +1,230 @@
+"""
+Unit tests for the resume blob store (blob_store.py) and its migration tool
+"""
+
+import pytest
+import sys
+import os
+import io
+import hashlib
+import secrets
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blob_store import LocalBlobStore, BlobTooLarge, BlobNotFound, sniff_mime_type, create_blob_store
+
+PDF = b'%PDF-1.4\n' + b'x' * 200000 + b'\n%%EOF'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalBlobStore(str(tmp_path / 'blobs'))
+
+
+class TestLocalBlobStore:
+    """Test content addressing, deduplication and limits"""
+
+    def test_put_and_open(self, store):
+        """Test a blob is keyed by the SHA-256 of its content"""
+        info = store.put(io.BytesIO(PDF))
+        assert info.sha256 == hashlib.sha256(PDF).hexdigest()
+        assert info.size == len(PDF)
+        assert info.mime_type == 'application/pdf'
+        assert store.read_bytes(info.sha256) == PDF
+
+    def test_deduplicated(self, store):
+        """Test identical uploads are stored once"""
+        first = store.put_bytes(PDF)
+        second = store.put_bytes(PDF)
+        assert first == second
+        assert list(store.keys()) == [first.sha256]
+
+    def test_too_large_stores_nothing(self, store):
+        """Test the size limit is enforced while reading"""
+        with pytest.raises(BlobTooLarge):
+            store.put(io.BytesIO(PDF), max_size=1000)
+        assert list(store.keys()) == []
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+
+    def test_writer_streams_into_store(self, store):
+        """Test a writer hashes while written and is readable before commit"""
+        writer = store.writer()
+        for i in range(0, len(PDF), 1000):
+            writer.write(PDF[i:i + 1000])
+        writer.seek(0)
+        assert writer.read(5) == b'%PDF-'
+        info = writer.commit()
+        assert info == (hashlib.sha256(PDF).hexdigest(), len(PDF), 'application/pdf')
+        assert writer.commit() == info
+        assert store.read_bytes(info.sha256) == PDF
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+
+    def test_writer_limit_and_discard(self, store):
+        """Test a writer stops at max_size and closing it uncommitted leaves nothing"""
+        writer = store.writer(max_size=10)
+        with pytest.raises(BlobTooLarge):
+            writer.write(b'x' * 11)
+        abandoned = store.writer()
+        abandoned.write(b'partial')
+        abandoned.close()
+        assert list(store.keys()) == []
+        assert os.listdir(os.path.join(store.root, 'tmp')) == []
+
+    def test_missing_blob(self, store):
+        """Test unknown and malformed keys raise BlobNotFound"""
+        with pytest.raises(BlobNotFound):
+            store.open('0' * 64)
+        with pytest.raises(BlobNotFound):
+            store.open('../../etc/passwd')
+        assert not store.exists('../../etc/passwd')
+
+    def test_delete(self, store):
+        """Test deleting a blob"""
+        info = store.put_bytes(b'hello')
+        store.delete(info.sha256)
+        assert not store.exists(info.sha256)
+
+    def test_sniff_mime_type(self):
+        """Test mime type detection from magic bytes"""
+        assert sniff_mime_type(b'%PDF-1.7') == 'application/pdf'
+        assert sniff_mime_type(b'\x89PNG\r\n\x1a\n') == 'image/png'
+        assert sniff_mime_type(b'hello') == 'application/octet-stream'
+
+    def test_create_blob_store(self, tmp_path, monkeypatch):
+        """Test BLOB_BACKEND / BLOB_DIR select the store"""
+        monkeypatch.setenv('BLOB_DIR', str(tmp_path))
+        assert create_blob_store().root == str(tmp_path)
+        with pytest.raises(ValueError):
+            create_blob_store('s3')
+
+
+class TestResumeBlobs:
+    """Test resume upload, download and migration (requires database)"""
+
+    @pytest.fixture
+    def backend_store(self, store, monkeypatch):
+        import backend
+        import migrate_resumes
+        try:
+            backend.init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        monkeypatch.setattr(backend, 'blob_store', store)
+        monkeypatch.setattr(migrate_resumes, 'blob_store', store)
+        yield store
+        with backend.db_connection() as conn:
+            conn.cursor().execute("DELETE FROM applications WHERE email LIKE 'blob-%%'")
+
+    def application_form(self, email, resume=PDF):
+        return {
+            'position': 'Engineer', 'fullName': 'Blob Tester', 'email': email, 'phone': '1',
+            'address': 'a', 'college': 'c', 'degree': 'd', 'semester': 's', 'year': 'y', 'about': 'a',
+            'resume': (io.BytesIO(resume), 'resume.pdf'),
+        }
+
+    def test_upload_stores_blob_not_bytea(self, backend_store):
+        """Test the applications row keeps only hash, size and mime type"""
+        from backend import app, db_connection
+        email = f'blob-{secrets.token_hex(4)}@example.com'
+        response = app.test_client().post('/api/applications', data=self.application_form(email),
+                                          content_type='multipart/form-data')
+        assert response.status_code == 201
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT resume_sha256, resume_size, resume_mime, resume_data FROM applications WHERE email = %s
+            ''', (email,))
+            assert cursor.fetchone() == (hashlib.sha256(PDF).hexdigest(), len(PDF), 'application/pdf', None)
+
+        application_id = response.get_json()['application_id']
+        download = app.test_client().get(f'/api/applications/{application_id}/resume')
+        assert download.status_code == 200
+        assert download.data == PDF
+
+    def test_download_range_and_etag(self, backend_store):
+        """Test resumes support Range requests and ETag revalidation"""
+        from backend import app
+        email = f'blob-{secrets.token_hex(4)}@example.com'
+        client = app.test_client()
+        response = client.post('/api/applications', data=self.application_form(email),
+                               content_type='multipart/form-data')
+        url = f"/api/applications/{response.get_json()['application_id']}/resume"
+
+        full = client.get(url)
+        etag = hashlib.sha256(PDF).hexdigest()
+        assert full.headers['ETag'] == f'"{etag}"'
+        assert full.headers['Accept-Ranges'] == 'bytes'
+        assert 'private' in full.headers['Cache-Control']
+
+        partial = client.get(url, headers={'Range': 'bytes=0-99'})
+        assert partial.status_code == 206
+        assert partial.data == PDF[:100]
+        assert partial.headers['Content-Range'] == f'bytes 0-99/{len(PDF)}'
+
+        assert client.get(url, headers={'If-None-Match': f'"{etag}"'}).status_code == 304
+        assert client.get(url, headers={'Range': f'bytes={len(PDF) + 10}-'}).status_code == 416
+
+    def test_oversized_upload_rejected(self, backend_store, monkeypatch):
+        """Test uploads over the limit are refused and not stored"""
+        import backend
+        from backend import app
+        monkeypatch.setattr(backend, 'RESUME_MAX_BYTES', 1000)
+        response = app.test_client().post(
+            '/api/applications', data=self.application_form(f'blob-{secrets.token_hex(4)}@example.com'),
+            content_type='multipart/form-data')
+        assert response.status_code == 400
+        assert list(backend_store.keys()) == []
+        assert os.listdir(os.path.join(backend_store.root, 'tmp')) == []
+
+    def test_body_limit_only_on_resume_upload(self, backend_store):
+        """Test the resume size cap does not apply to other routes"""
+        import backend
+        from backend import app
+        body = b'x' * (backend.RESUME_MAX_BYTES + 2 * 1024 * 1024)
+        with app.test_request_context('/api/applications', method='POST', data=body):
+            assert backend.request.max_content_length == backend.RESUME_MAX_BYTES + 1024 * 1024
+        with app.test_request_context('/api/intern/submit-task', method='POST', data=body):
+            assert backend.request.max_content_length is None
+            assert len(backend.request.get_data()) == len(body)
+        response = app.test_client().post('/api/applications', data=body, content_type='application/json')
+        assert response.get_json() == {'error': 'File size exceeds 10MB limit'}
+
+    def test_migrate_legacy_rows(self, backend_store):
+        """Test the migration moves resume_data into the store in batches"""
+        from backend import app, db_connection
+        from migrate_resumes import migrate_batch, collect_garbage
+        ids = []
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(3):
+                cursor.execute('''
+                    INSERT INTO applications (position, full_name, email, phone, address, college,
+                                              degree, semester, year, about, resume_name, resume_data)
+                    VALUES ('Engineer', 'Legacy', %s, '1', 'a', 'c', 'd', 's', 'y', 'a', 'r.pdf', %s)
+                    RETURNING id
+                ''', (f'blob-{secrets.token_hex(4)}@example.com', PDF if i < 2 else b'%PDF-other'))
+                ids.append(cursor.fetchone()[0])
+
+        # Legacy rows are still served from the table before migration
+        assert app.test_client().get(f'/api/applications/{ids[0]}/resume').data == PDF
+
+        while migrate_batch(2)[0]:
+            pass
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM applications WHERE id = ANY(%s) AND resume_data IS NULL AND resume_sha256 IS NOT NULL
+            ''', (ids,))
+            assert cursor.fetchone()[0] == 3
+        assert len(list(backend_store.keys())) == 2   # the two identical resumes share a blob
+        assert app.test_client().get(f'/api/applications/{ids[2]}/resume').data == b'%PDF-other'
+
+        orphan = backend_store.put_bytes(b'unreferenced')
+        assert collect_garbage(min_age=0) >= 1
+        assert not backend_store.exists(orphan.sha256)
+        assert len(list(backend_store.keys())) == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
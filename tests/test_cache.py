@@ -0,0 +1,270 @@
+"""
+Unit tests for the in-process caches (cache.py) and the session token cache
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import TTLCache, MISSING
+
+
+class TestTTLCache:
+    """Test LRU + TTL behaviour"""
+
+    def test_get_and_set(self):
+        """Test values are returned until they expire"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+
+    def test_entries_expire(self):
+        """Test entries are dropped after their TTL"""
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        assert cache.get('a', MISSING) is MISSING
+        assert len(cache) == 0
+
+    def test_per_entry_ttl(self):
+        """Test a per-entry TTL overrides the default"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('short', 1, ttl=0.01)
+        cache.set('long', 2)
+        time.sleep(0.02)
+        assert cache.get('short', MISSING) is MISSING
+        assert cache.get('long') == 2
+
+    def test_none_can_be_cached(self):
+        """Test negative results are distinguishable from misses"""
+        cache = TTLCache()
+        cache.set('bad-token', None)
+        assert cache.get('bad-token', MISSING) is None
+        assert cache.get('other', MISSING) is MISSING
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used entry is evicted at maxsize"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b', MISSING) is MISSING
+        assert cache.get('a') == 1
+        assert cache.stats()['evictions'] == 1
+
+    def test_delete_where(self):
+        """Test predicate-based invalidation"""
+        cache = TTLCache()
+        cache.set(('intern', 't1'), (7, 'a@x.com', 'A'))
+        cache.set(('intern', 't2'), (7, 'a@x.com', 'A'))
+        cache.set(('intern', 't3'), (8, 'b@x.com', 'B'))
+        removed = cache.delete_where(lambda key, value: value[0] == 7)
+        assert removed == 2
+        assert len(cache) == 1
+
+    def test_hit_miss_counters(self):
+        """Test hit/miss counters"""
+        cache = TTLCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        stats = cache.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == pytest.approx(0.6667, abs=1e-3)
+
+
+class FakeCursor:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def execute(self, sql, params=None):
+        if params is None:   # SAVEPOINT / RELEASE SAVEPOINT
+            return
+        self.calls.append(params)
+        self.token = params[0]
+
+    def fetchone(self):
+        return self.rows.get(self.token)
+
+
+class FakeConnection:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def cursor(self):
+        return FakeCursor(self.rows, self.calls)
+
+    def close(self):
+        pass
+
+
+class TestTokenCache:
+    """Test verify_user_token / verify_token caching"""
+
+    @pytest.fixture
+    def db_calls(self, monkeypatch):
+        import backend
+        calls = []
+        rows = {'good': (42, 'intern@test.com', 'Test Intern')}
+        monkeypatch.setattr(backend, 'get_db_connection', lambda: FakeConnection(rows, calls))
+        backend.token_cache.clear()
+        yield calls
+        backend.token_cache.clear()
+
+    def test_valid_token_cached(self, db_calls):
+        """Test a valid token hits the database only once"""
+        from backend import verify_user_token
+        assert verify_user_token('good', 'intern') == (42, 'intern@test.com', 'Test Intern')
+        assert verify_user_token('good', 'intern') == (42, 'intern@test.com', 'Test Intern')
+        assert len(db_calls) == 1
+
+    def test_invalid_token_negatively_cached(self, db_calls):
+        """Test unknown tokens are cached as invalid"""
+        from backend import verify_user_token
+        assert verify_user_token('bogus', 'intern') is None
+        assert verify_user_token('bogus', 'intern') is None
+        assert len(db_calls) == 1
+
+    def test_roles_cached_separately(self, db_calls):
+        """Test the same token is looked up per role"""
+        from backend import verify_user_token
+        verify_user_token('good', 'intern')
+        verify_user_token('good', 'recruiter')
+        assert len(db_calls) == 2
+
+    def test_evict_principal(self, db_calls):
+        """Test deleting an intern evicts all of their cached tokens"""
+        from backend import verify_user_token, evict_cached_principal
+        verify_user_token('good', 'intern')
+        evict_cached_principal('intern', 42)
+        verify_user_token('good', 'intern')
+        assert len(db_calls) == 2
+
+    def test_evict_token_on_logout(self, db_calls):
+        """Test logging out evicts the token"""
+        from backend import verify_user_token, evict_cached_token
+        verify_user_token('good', 'intern')
+        evict_cached_token('good')
+        verify_user_token('good', 'intern')
+        assert len(db_calls) == 2
+
+    def test_logout_with_bearer_header_evicts(self, db_calls):
+        """Test /api/intern/logout evicts a token sent as 'Bearer <token>'"""
+        from backend import app, verify_user_token
+        verify_user_token('good', 'intern')
+        response = app.test_client().post('/api/intern/logout', headers={'Authorization': 'Bearer good'})
+        assert response.status_code == 200
+        verify_user_token('good', 'intern')
+        assert len(db_calls) == 2
+
+    def test_verify_token_cached(self, db_calls):
+        """Test verify_token (user sessions) is cached too"""
+        from backend import verify_token
+        assert verify_token('good') == 42
+        assert verify_token('good') == 42
+        assert len(db_calls) == 1
+
+
+
+class FakeStatsConnection:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def execute(self, sql, params=None):
+                connection.calls.append(sql)
+
+            def fetchone(self):
+                return (10, 2, 30, 4, 5)
+        return Cursor()
+
+    def close(self):
+        pass
+
+
+class TestStatsCache:
+    """Test /api/stats caching and invalidation"""
+
+    @pytest.fixture
+    def db_calls(self, monkeypatch):
+        import backend
+        calls = []
+        monkeypatch.setattr(backend, 'get_db_connection', lambda: FakeStatsConnection(calls))
+        backend.stats_cache.clear()
+        yield calls
+        backend.stats_cache.clear()
+
+    def test_one_query_then_cached(self, db_calls):
+        """Test all counters come from one query and are reused"""
+        from backend import app
+        client = app.test_client()
+        first = client.get('/api/stats').get_json()
+        assert first == {'total_users': 10, 'today_users': 2, 'total_emails': 30,
+                         'total_applications': 4, 'active_interns': 5}
+        assert client.get('/api/stats').get_json() == first
+        assert len(db_calls) == 1
+
+    def test_writes_invalidate(self, db_calls):
+        """Test invalidate_stats forces a fresh query"""
+        from backend import app, invalidate_stats
+        client = app.test_client()
+        client.get('/api/stats')
+        invalidate_stats()
+        client.get('/api/stats')
+        assert len(db_calls) == 2
+
+    def test_counts_match_database(self):
+        """Test the combined query against real tables (requires database)"""
+        import backend
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                stats = backend.load_stats(cursor)
+                cursor.execute("SELECT COUNT(*) FROM users WHERE DATE(created_at) = CURRENT_DATE")
+                today_users = cursor.fetchone()[0]
+                cursor.execute("SELECT COUNT(*) FROM emails")
+                total_emails = cursor.fetchone()[0]
+        except Exception:
+            pytest.skip("Database not available")
+        assert stats['today_users'] == today_users
+        assert stats['total_emails'] == total_emails
+
+class TestVersionedValue:
+    """Test the version-checked snapshot used for weekly tasks"""
+
+    def test_reloads_only_on_new_version(self):
+        """Test the loader runs once per version"""
+        from cache import VersionedValue
+        cached = VersionedValue()
+        calls = []
+
+        def load(version):
+            def loader():
+                calls.append(version)
+                return version, f'value-{version}'
+            return loader
+
+        assert cached.get(1, load(1)) == 'value-1'
+        assert cached.get(1, load(1)) == 'value-1'
+        assert cached.get(2, load(2)) == 'value-2'
+        assert calls == [1, 2]
+        cached.invalidate()
+        assert cached.get(2, load(2)) == 'value-2'
+        assert cached.stats() == {'version': 2, 'hits': 1, 'loads': 3}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
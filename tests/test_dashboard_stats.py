@@ -0,0 +1,385 @@
+"""
+Tests for the recruiter and intern dashboard statistics endpoints (require database)
+"""
+
+import pytest
+import sys
+import os
+import secrets
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def recruiter():
+    """A recruiter with a session token; yields (recruiter_id, auth headers)"""
+    import backend
+    token = secrets.token_urlsafe(16)
+    try:
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO recruiters (full_name, email, password_hash)
+                VALUES ('Stats Recruiter', %s, 'x')
+                RETURNING id
+            ''', (f'recruiter-{secrets.token_hex(4)}@example.com',))
+            recruiter_id = cursor.fetchone()[0]
+            cursor.execute('INSERT INTO recruiter_sessions (recruiter_id, token) VALUES (%s, %s)',
+                           (recruiter_id, token))
+    except Exception:
+        pytest.skip("Database not available")
+    yield recruiter_id, {'Authorization': f'Bearer {token}'}
+    with backend.db_connection() as conn:
+        cursor = conn.cursor()
+        for table in ('recruiter_sessions', 'recruiter_applications'):
+            cursor.execute(f'DELETE FROM {table} WHERE recruiter_id = %s', (recruiter_id,))
+        cursor.execute('DELETE FROM recruiters WHERE id = %s', (recruiter_id,))
+
+
+@pytest.fixture
+def intern():
+    """An active intern with a session token; yields (intern_id, auth headers)"""
+    import backend
+    token = secrets.token_urlsafe(16)
+    try:
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO selected_interns (full_name, email, password_hash, position, college, status)
+                VALUES ('Stats Intern', %s, 'x', 'Engineer', 'MIT', 'active')
+                RETURNING id
+            ''', (f'intern-{secrets.token_hex(4)}@example.com',))
+            intern_id = cursor.fetchone()[0]
+            cursor.execute('INSERT INTO intern_sessions (intern_id, token) VALUES (%s, %s)', (intern_id, token))
+    except Exception:
+        pytest.skip("Database not available")
+    yield intern_id, {'Authorization': f'Bearer {token}'}
+    backend.intern_stats_cache.delete(intern_id)
+    with backend.db_connection() as conn:
+        cursor = conn.cursor()
+        for table in ('daily_task_submissions', 'intern_daily_tasks', 'intern_sessions'):
+            cursor.execute(f'DELETE FROM {table} WHERE intern_id = %s', (intern_id,))
+        cursor.execute('DELETE FROM selected_interns WHERE id = %s', (intern_id,))
+
+
+class TestRecruiterStats:
+    """Test /api/recruiter/stats and its counters row"""
+
+    def job(self, status, days_ago=0):
+        return {'company_name': 'Acme', 'position': 'Engineer', 'status': status,
+                'application_date': (date.today() - timedelta(days=days_ago)).isoformat()}
+
+    def counters(self, recruiter_id):
+        import backend
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT total, offers, interviewing FROM recruiter_stats_counters WHERE recruiter_id = %s',
+                           (recruiter_id,))
+            return cursor.fetchone()
+
+    def test_counters_follow_writes(self, recruiter):
+        """Test create, status change and delete keep the counters exact"""
+        from backend import app
+        recruiter_id, headers = recruiter
+        client = app.test_client()
+        ids = []
+        for status, days_ago in (('offer', 0), ('interviewing', 2), ('applied', 30)):
+            response = client.post('/api/recruiter/applications', json=self.job(status, days_ago), headers=headers)
+            assert response.status_code == 201
+            ids.append(response.get_json()['application_id'])
+        assert self.counters(recruiter_id) == (3, 1, 1)
+        assert client.get('/api/recruiter/stats', headers=headers).get_json() == {
+            'total': 3, 'offers': 1, 'interviewing': 1, 'this_week': 2}
+
+        client.put(f'/api/recruiter/applications/{ids[1]}', json=self.job('offer', 2), headers=headers)
+        assert self.counters(recruiter_id) == (3, 2, 0)
+        client.put(f'/api/recruiter/applications/{ids[1]}', json=self.job('offer', 2), headers=headers)
+        assert self.counters(recruiter_id) == (3, 2, 0)
+
+        client.delete(f'/api/recruiter/applications/{ids[0]}', headers=headers)
+        client.delete(f'/api/recruiter/applications/{ids[0]}', headers=headers)
+        assert self.counters(recruiter_id) == (2, 1, 0)
+        assert client.get('/api/recruiter/stats', headers=headers).get_json() == {
+            'total': 2, 'offers': 1, 'interviewing': 0, 'this_week': 1}
+
+    def test_rows_before_counters_existed(self, recruiter):
+        """Test stats fall back to a grouped query and the first write backfills the counters"""
+        import backend
+        recruiter_id, headers = recruiter
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for status in ('offer', 'offer', 'rejected'):
+                cursor.execute('''
+                    INSERT INTO recruiter_applications (recruiter_id, company_name, position, application_date, status)
+                    VALUES (%s, 'Old Co', 'Engineer', CURRENT_DATE - 40, %s)
+                ''', (recruiter_id, status))
+        client = backend.app.test_client()
+        assert client.get('/api/recruiter/stats', headers=headers).get_json() == {
+            'total': 3, 'offers': 2, 'interviewing': 0, 'this_week': 0}
+        assert self.counters(recruiter_id) is None
+
+        client.post('/api/recruiter/applications', json=self.job('interviewing'), headers=headers)
+        assert self.counters(recruiter_id) == (4, 2, 1)
+
+    def test_migration_backfills_counters(self, recruiter):
+        """Test the counters migration fills rows for existing applications"""
+        import backend
+        from migrations import MIGRATIONS, migrate
+        recruiter_id, _ = recruiter
+        versions = f'schema_version_test_{secrets.token_hex(4)}'
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for status in ('offer', 'interviewing', 'applied'):
+                cursor.execute('''
+                    INSERT INTO recruiter_applications (recruiter_id, company_name, position, application_date, status)
+                    VALUES (%s, 'Old Co', 'Engineer', CURRENT_DATE - 40, %s)
+                ''', (recruiter_id, status))
+        assert self.counters(recruiter_id) is None
+        counters = [m for m in MIGRATIONS if m.name == 'recruiter stats counters']
+        try:
+            assert migrate(backend.DATABASE_URL, counters, table=versions) == [counters[0].version]
+        finally:
+            with backend.db_connection() as conn:
+                conn.cursor().execute(f'DROP TABLE IF EXISTS {versions}')
+        assert self.counters(recruiter_id) == (3, 1, 1)
+
+
+class TestInternStats:
+    """Test /api/intern/stats aggregation and per-intern caching"""
+
+    def test_stats_cached_and_invalidated(self, intern):
+        """Test creating, completing and submitting tasks refresh the cached stats"""
+        from backend import app, intern_stats_cache
+        intern_id, headers = intern
+        client = app.test_client()
+        today = date.today().isoformat()
+        task_ids = []
+        for title in ('One', 'Two', 'Three', 'Four'):
+            response = client.post('/api/intern/tasks', json={'title': title, 'due_date': today}, headers=headers)
+            task_ids.append(response.get_json()['task_id'])
+
+        stats = client.get('/api/intern/stats', headers=headers).get_json()
+        assert stats['total_tasks'] == 4
+        assert stats['pending_tasks'] == 4
+        assert intern_stats_cache.get(intern_id) == stats
+
+        client.put(f'/api/intern/tasks/{task_ids[0]}/complete', headers=headers)
+        assert intern_stats_cache.get(intern_id) is None
+        client.post(f'/api/intern/tasks/{task_ids[1]}/submit', json={'notes': 'done', 'hours_spent': 2},
+                    headers=headers)
+        stats = client.get('/api/intern/stats', headers=headers).get_json()
+        assert stats == {'total_tasks': 4, 'completed_tasks': 2, 'pending_tasks': 2, 'in_progress_tasks': 0,
+                         'completion_rate': '50%', 'weekly_progress': 50}
+
+        client.post('/api/intern/tasks', json={'title': 'Five', 'due_date': today}, headers=headers)
+        assert client.get('/api/intern/stats', headers=headers).get_json()['total_tasks'] == 5
+
+
+
+class CountingConnection:
+    """Wraps a connection and records every statement executed through it"""
+
+    def __init__(self, conn, statements):
+        self.conn = conn
+        self.statements = statements
+
+    def cursor(self):
+        return CountingCursor(self.conn.cursor(), self.statements)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class CountingCursor:
+    def __init__(self, cursor, statements):
+        self.cursor = cursor
+        self.statements = statements
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        return self.cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class TestInternBootstrap:
+    """Test /api/intern/bootstrap"""
+
+    def test_payload_in_two_queries(self, intern, monkeypatch):
+        """Test tasks, stats and application status come from one connection and two queries"""
+        import backend
+        intern_id, headers = intern
+        client = backend.app.test_client()
+        client.post('/api/intern/tasks', json={'title': 'One', 'due_date': date.today().isoformat()},
+                    headers=headers)
+        backend.verify_user_token(headers['Authorization'][7:], 'intern')   # warm the token cache
+
+        connections, statements = [], []
+        original = backend.get_db_connection
+
+        def counting_connection():
+            connections.append(1)
+            return CountingConnection(original(), statements)
+        monkeypatch.setattr(backend, 'get_db_connection', counting_connection)
+
+        response = client.get('/api/intern/bootstrap', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [task['title'] for task in data['tasks']] == ['One']
+        assert data['stats']['total_tasks'] == 1
+        assert data['application_status'] == {'position': 'Engineer', 'college': 'MIT', 'status': 'selected',
+                                               'applied_at': None}
+        assert len(connections) == 1
+        assert len(statements) == 2
+
+    def test_etag_revalidation(self, intern):
+        """Test an unchanged dashboard answers 304 and a change produces a new ETag"""
+        from backend import app
+        intern_id, headers = intern
+        client = app.test_client()
+        first = client.get('/api/intern/bootstrap', headers=headers)
+        etag = first.headers['ETag']
+        assert 'private' in first.headers['Cache-Control']
+
+        again = client.get('/api/intern/bootstrap', headers=dict(headers, **{'If-None-Match': etag}))
+        assert again.status_code == 304
+        assert again.data == b''
+
+        client.post('/api/intern/tasks', json={'title': 'New', 'due_date': date.today().isoformat()},
+                    headers=headers)
+        changed = client.get('/api/intern/bootstrap', headers=dict(headers, **{'If-None-Match': etag}))
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    def test_requires_intern_token(self):
+        """Test the endpoint rejects missing tokens"""
+        from backend import app
+        assert app.test_client().get('/api/intern/bootstrap').status_code == 401
+
+
+
+class TestInternWeeklyDashboard:
+    """Test /api/intern/dashboard (weekly tasks programme)"""
+
+    @pytest.fixture
+    def dashboard(self, intern):
+        import backend
+        intern_id, _ = intern
+        token = secrets.token_urlsafe(16)
+        backend.intern_sessions[token] = {'intern_id': intern_id, 'email': 'intern@test.com'}
+        task_ids = []
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for week, title in ((2, 'Week two A'), (2, 'Week two B'), (3, 'Week three')):
+                cursor.execute('''
+                    INSERT INTO weekly_tasks (week_number, task_title, task_description, due_date)
+                    VALUES (%s, %s, 'desc', CURRENT_DATE) RETURNING id
+                ''', (week, title))
+                task_ids.append(cursor.fetchone()[0])
+            backend.bump_cache_version(cursor, 'weekly_tasks')
+        yield intern_id, {'Authorization': token}, task_ids
+        del backend.intern_sessions[token]
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM task_submissions WHERE intern_id = %s', (intern_id,))
+            cursor.execute('DELETE FROM intern_progress WHERE intern_id = %s', (intern_id,))
+            cursor.execute('DELETE FROM weekly_tasks WHERE id = ANY(%s)', (task_ids,))
+            backend.bump_cache_version(cursor, 'weekly_tasks')
+
+    def set_start_date(self, intern_id, start_date):
+        import backend
+        with backend.db_connection() as conn:
+            conn.cursor().execute('UPDATE selected_interns SET start_date = %s WHERE id = %s', (start_date, intern_id))
+
+    def test_week_from_date_difference(self, dashboard):
+        """Test the week counts whole weeks since start_date, also across New Year"""
+        from backend import app
+        intern_id, headers, task_ids = dashboard
+        client = app.test_client()
+
+        self.set_start_date(intern_id, date.today() - timedelta(days=10))
+        data = client.get('/api/intern/dashboard', headers=headers).get_json()
+        assert data['current_week'] == 2
+        assert [task['title'] for task in data['tasks']] == ['Week two A', 'Week two B']
+        assert data['progress'] == {'completed': 0, 'total': 2}
+
+        start = date(date.today().year - 1, 12, 29)
+        self.set_start_date(intern_id, start)
+        data = client.get('/api/intern/dashboard', headers=headers).get_json()
+        assert data['current_week'] == (date.today() - start).days // 7 + 1
+
+        self.set_start_date(intern_id, date.today() + timedelta(days=30))
+        assert client.get('/api/intern/dashboard', headers=headers).get_json()['current_week'] == 1
+
+    def test_weekly_tasks_cached_until_version_bump(self, dashboard):
+        """Test tasks come from the worker cache and reload once another worker bumps the version"""
+        import backend
+        intern_id, headers, task_ids = dashboard
+        self.set_start_date(intern_id, date.today() - timedelta(days=10))
+        client = backend.app.test_client()
+        client.get('/api/intern/dashboard', headers=headers)
+        loads = backend.weekly_tasks_cache.loads
+
+        # A write without a bump (or a bump this process never hears about)
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO weekly_tasks (week_number, task_title, task_description, due_date)
+                VALUES (2, 'Week two C', 'desc', CURRENT_DATE) RETURNING id
+            ''')
+            task_ids.append(cursor.fetchone()[0])
+        data = client.get('/api/intern/dashboard', headers=headers).get_json()
+        assert [task['title'] for task in data['tasks']] == ['Week two A', 'Week two B']
+        assert backend.weekly_tasks_cache.loads == loads
+
+        with backend.db_connection() as conn:
+            backend.bump_cache_version(conn.cursor(), 'weekly_tasks')
+        data = client.get('/api/intern/dashboard', headers=headers).get_json()
+        assert [task['title'] for task in data['tasks']] == ['Week two A', 'Week two B', 'Week two C']
+        assert backend.weekly_tasks_cache.loads == loads + 1
+
+    def test_create_weekly_task_bumps_version(self, dashboard, monkeypatch):
+        """Test tasks created through the admin API show up on the next dashboard load"""
+        import backend
+        intern_id, headers, task_ids = dashboard
+        self.set_start_date(intern_id, date.today() - timedelta(days=17))
+        monkeypatch.setattr(backend, 'verify_admin_token', lambda token: True)
+        client = backend.app.test_client()
+        assert client.get('/api/intern/dashboard', headers=headers).get_json()['current_week'] == 3
+        response = client.post('/api/admin/weekly-task', json={
+            'week_number': 3, 'task_title': 'Week three B', 'task_description': 'desc'})
+        assert response.status_code == 200
+        task_ids.append(response.get_json()['task_id'])
+        data = client.get('/api/intern/dashboard', headers=headers).get_json()
+        assert [task['title'] for task in data['tasks']] == ['Week three', 'Week three B']
+
+    def test_submissions_and_progress(self, dashboard):
+        """Test recent submissions and the week's progress row come back with the tasks"""
+        import backend
+        intern_id, headers, task_ids = dashboard
+        self.set_start_date(intern_id, date.today() - timedelta(days=14))
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(12):
+                cursor.execute('''
+                    INSERT INTO task_submissions (intern_id, task_id, submission_type, submitted_at)
+                    VALUES (%s, %s, 'link', TIMESTAMP '2025-01-01' + %s * INTERVAL '1 hour')
+                ''', (intern_id, task_ids[2], i))
+            cursor.execute('''
+                INSERT INTO intern_progress (intern_id, week_number, tasks_completed, tasks_total)
+                VALUES (%s, 3, 1, 4)
+            ''', (intern_id,))
+        data = backend.app.test_client().get('/api/intern/dashboard', headers=headers).get_json()
+        assert data['current_week'] == 3
+        assert [task['title'] for task in data['tasks']] == ['Week three']
+        assert len(data['submissions']) == 10
+        assert data['submissions'][0]['submitted_at'] == '2025-01-01 11:00:00'
+        assert data['submissions'][0]['task_title'] == 'Week three'
+        assert data['progress'] == {'completed': 1, 'total': 4}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
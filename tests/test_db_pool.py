@@ -0,0 +1,327 @@
+"""
+Unit tests for the PostgreSQL connection pool (db_pool.py)
+Uses fake connections so no database is required
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_pool
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            self.conn.closed = 2
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.conn.pings += 1
+        self.conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+        self.autocommit = True
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.commits += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened():
+    """List of every fake connection the pool opened"""
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def connect(dsn):
+        conn = FakeConnection(dsn)
+        opened.append(conn)
+        return conn
+
+    def factory(**kwargs):
+        kwargs.setdefault('minconn', 0)
+        kwargs.setdefault('maxconn', 2)
+        kwargs.setdefault('timeout', 0.2)
+        return ConnectionPool('postgresql://test', connect=connect, **kwargs)
+    return factory
+
+
+class TestConnectionPool:
+    """Test pool checkout, return and sizing"""
+
+    def test_connection_is_reused(self, make_pool, opened):
+        """Test closing a pooled connection returns it for reuse"""
+        pool = make_pool()
+        conn = pool.get()
+        conn.close()
+        conn2 = pool.get()
+        assert conn2.raw is opened[0]
+        assert len(opened) == 1
+        assert opened[0].autocommit is False
+
+    def test_minconn_opened_eagerly(self, make_pool, opened):
+        """Test minconn connections are opened when the pool is built"""
+        pool = make_pool(minconn=2, maxconn=3)
+        assert len(opened) == 2
+        assert pool.status()['idle'] == 2
+
+    def test_maxconn_blocks_then_times_out(self, make_pool):
+        """Test checkout fails with PoolTimeout when the pool is exhausted"""
+        pool = make_pool(maxconn=1, timeout=0.05)
+        pool.get()
+        with pytest.raises(PoolTimeout):
+            pool.get()
+        assert pool.status()['timeouts'] == 1
+
+    def test_waiter_gets_returned_connection(self, make_pool, opened):
+        """Test a blocked checkout is woken up when a connection is returned"""
+        pool = make_pool(maxconn=1, timeout=2)
+        conn = pool.get()
+        result = {}
+
+        def worker():
+            result['conn'] = pool.get()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        time.sleep(0.05)
+        conn.close()
+        thread.join(1)
+        assert result['conn'].raw is opened[0]
+
+    def test_close_is_idempotent(self, make_pool):
+        """Test closing twice does not return the connection twice"""
+        pool = make_pool()
+        conn = pool.get()
+        conn.close()
+        conn.close()
+        assert pool.status()['idle'] == 1
+
+    def test_released_proxy_cannot_be_used(self, make_pool):
+        """Test a returned connection cannot be used through the old proxy"""
+        pool = make_pool()
+        conn = pool.get()
+        conn.close()
+        with pytest.raises(psycopg2.InterfaceError):
+            conn.cursor()
+
+    def test_open_transaction_rolled_back_on_return(self, make_pool, opened):
+        """Test uncommitted work is rolled back before reuse"""
+        pool = make_pool()
+        conn = pool.get()
+        conn.cursor().execute('UPDATE users SET name = name')
+        conn.close()
+        assert opened[0].rollbacks == 1
+
+
+class TestConnectionHealth:
+    """Test recycling and broken connection handling"""
+
+    def test_old_connections_recycled(self, make_pool, opened):
+        """Test connections older than max_age are replaced on checkout"""
+        pool = make_pool(max_age=0.01)
+        pool.get().close()
+        time.sleep(0.02)
+        conn = pool.get()
+        assert conn.raw is opened[1]
+        assert opened[0].closed
+        assert pool.status()['recycled'] == 1
+
+    def test_stale_connection_pinged(self, make_pool, opened):
+        """Test idle connections are pinged before being handed out"""
+        pool = make_pool(health_check_interval=0)
+        pool.get().close()
+        pool.get()
+        assert opened[0].pings == 1
+
+    def test_dead_connection_replaced(self, make_pool, opened):
+        """Test a connection that fails its ping is replaced"""
+        pool = make_pool(health_check_interval=0)
+        pool.get().close()
+        opened[0].broken = True
+        conn = pool.get()
+        assert conn.raw is opened[1]
+        assert pool.status()['size'] == 1
+
+    def test_context_manager_commits(self, make_pool, opened):
+        """Test the context manager commits and returns the connection"""
+        pool = make_pool()
+        with pool.connection() as conn:
+            conn.cursor().execute('INSERT INTO users VALUES (1)')
+        assert opened[0].commits == 1
+        assert pool.status()['in_use'] == 0
+
+    def test_context_manager_returns_on_exception(self, make_pool, opened):
+        """Test the connection is rolled back and returned when the body raises"""
+        pool = make_pool()
+        with pytest.raises(ValueError):
+            with pool.connection() as conn:
+                conn.cursor().execute('INSERT INTO users VALUES (1)')
+                raise ValueError('boom')
+        assert opened[0].rollbacks == 1
+        assert pool.status()['idle'] == 1
+
+    def test_operational_error_discards_connection(self, make_pool, opened):
+        """Test a connection that raised OperationalError is not reused"""
+        pool = make_pool()
+        with pytest.raises(psycopg2.OperationalError):
+            with pool.connection() as conn:
+                opened[0].broken = True
+                conn.cursor().execute('SELECT 1')
+        assert pool.status()['size'] == 0
+        assert pool.status()['discarded'] == 1
+        assert pool.get().raw is opened[1]
+
+    def test_idle_connections_checked_after_failure(self, make_pool, opened):
+        """Test idle connections are pinged after another connection broke"""
+        pool = make_pool(health_check_interval=3600)
+        first, second = pool.get(), pool.get()
+        first.close()
+        second.close(discard=True)
+        pool.get()
+        assert opened[0].pings == 1
+
+
+class TestPerProcessPool:
+    """Test the pool is rebuilt after fork"""
+
+    def test_pool_rebuilt_in_child_process(self, monkeypatch):
+        """Test a forked worker gets its own pool and keeps the parent's open"""
+        monkeypatch.setattr(db_pool, '_pool', None)
+        monkeypatch.setattr(db_pool, '_inherited_pools', [])
+        kwargs = {'minconn': 0, 'connect': FakeConnection}
+        parent = db_pool.get_pool('postgresql://test', **kwargs)
+        assert db_pool.get_pool('postgresql://test', **kwargs) is parent
+
+        monkeypatch.setattr(db_pool.os, 'getpid', lambda: parent.pid + 1)
+        child = db_pool.get_pool('postgresql://test', **kwargs)
+        assert child is not parent
+        assert parent in db_pool._inherited_pools
+
+
+class TestRequestScopedConnection:
+    """Test one shared connection and transaction per request"""
+
+    @pytest.fixture
+    def fake_pool(self, make_pool, monkeypatch):
+        import backend
+        pool = make_pool()
+        monkeypatch.setattr(backend, 'get_pool', lambda dsn, **kwargs: pool)
+        return pool
+
+    def test_helpers_share_one_checkout(self, fake_pool, opened):
+        """Test repeated get_db_connection calls reuse the request connection"""
+        from backend import app, get_db_connection
+        with app.test_request_context('/'):
+            first = get_db_connection()
+            first.close()
+            second = get_db_connection()
+            assert second is first
+            assert fake_pool.status()['checkouts'] == 1
+        assert fake_pool.status()['in_use'] == 0
+        assert len(opened) == 1
+
+    def test_commit_deferred_to_end_of_request(self, fake_pool, opened):
+        """Test handler commits are applied once after the response"""
+        from backend import app, get_db_connection
+        with app.test_request_context('/'):
+            conn = get_db_connection()
+            conn.cursor().execute('INSERT INTO users VALUES (1)')
+            conn.commit()
+            conn.cursor().execute('INSERT INTO emails VALUES (1)')
+            conn.commit()
+            assert opened[0].commits == 0
+            app.process_response(app.response_class('ok'))
+        assert opened[0].commits == 1
+        assert opened[0].rollbacks == 0
+
+    def test_server_error_rolls_back(self, fake_pool, opened):
+        """Test a 5xx response rolls the request transaction back"""
+        from backend import app, get_db_connection
+        with app.test_request_context('/'):
+            get_db_connection().cursor().execute('INSERT INTO users VALUES (1)')
+            app.process_response(app.response_class('error', status=500))
+        assert opened[0].commits == 0
+        assert opened[0].rollbacks == 1
+        assert fake_pool.status()['idle'] == 1
+
+    def test_client_error_rolls_back(self, fake_pool, opened):
+        """Test a 4xx response does not keep what the handler wrote"""
+        from backend import app, get_db_connection
+        with app.test_request_context('/'):
+            get_db_connection().cursor().execute('UPDATE users SET password_hash = %s', ('x',))
+            app.process_response(app.response_class('forbidden', status=403))
+        assert opened[0].commits == 0
+        assert opened[0].rollbacks == 1
+
+    def test_savepoint_keeps_transaction_usable(self):
+        """Test a swallowed error inside savepoint() does not abort the request transaction"""
+        import psycopg2
+        from backend import app, get_db_connection, verify_token
+        from db_pool import savepoint
+        with app.test_request_context('/'):
+            try:
+                conn = get_db_connection()
+                conn.cursor().execute('SELECT 1')
+            except Exception:
+                pytest.skip("Database not available")
+            with pytest.raises(psycopg2.Error):
+                with savepoint(conn):
+                    conn.cursor().execute('SELECT * FROM no_such_table')
+            assert verify_token('no-such-token') is None
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            assert cursor.fetchone() == (1,)
+            app.process_response(app.response_class('ok'))
+
+    def test_no_checkout_without_queries(self, fake_pool):
+        """Test requests that never touch the database do not check out"""
+        from backend import app
+        with app.test_request_context('/'):
+            app.process_response(app.response_class('ok'))
+        assert fake_pool.status()['checkouts'] == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,313 @@
+"""
+Unit tests for the streaming Excel export (email_export.py)
+"""
+
+import pytest
+import sys
+import os
+import secrets
+import tracemalloc
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import openpyxl
+import email_export
+from email_export import ColumnWidths, write_excel, iter_batches, MAX_COLUMN_WIDTH
+
+HEADERS = ['Full Name', 'Email', 'Phone', 'Address', 'Signup Date']
+
+
+def user_batches(count, batch_size=1000, first=0):
+    for start in range(first, first + count, batch_size):
+        yield [[f'Name {i}', f'user{i}@example.com', '555-0100', 'Main street', '2025-01-01 10:00:00']
+               for i in range(start, min(first + count, start + batch_size))]
+
+
+class TestWriteExcel:
+    """Test the write-only workbook writer"""
+
+    def test_styles_widths_and_rows(self, tmp_path):
+        """Test header/cell named styles, column widths and every row written"""
+        filename = str(tmp_path / 'users.xlsx')
+        assert write_excel(filename, HEADERS, user_batches(2500)) == 2500
+
+        ws = openpyxl.load_workbook(filename).active
+        assert [cell.value for cell in ws[1]] == HEADERS
+        assert ws['A1'].style == 'export_header'
+        assert ws['A1'].font.bold
+        assert ws['B2'].style == 'export_cell'
+        assert ws['B2'].value == 'user0@example.com'
+        assert ws['B2501'].value == 'user2499@example.com'
+        assert ws.max_row == 2501
+        assert ws.column_dimensions['B'].width == len('user999@example.com') + 2
+        assert ws.column_dimensions['C'].width == len('555-0100') + 2
+
+    def test_column_widths(self):
+        """Test widths track the longest value and are capped"""
+        widths = ColumnWidths(['Name', 'About'])
+        widths.update(['Al', 'x' * 200])
+        widths.update([None, 'short'])
+        assert widths.widths() == [len('Name') + 2, MAX_COLUMN_WIDTH]
+
+    def test_memory_flat(self, tmp_path):
+        """Test peak memory does not grow with the number of rows"""
+        peaks = []
+        for count in (2000, 8000):
+            tracemalloc.start()
+            write_excel(str(tmp_path / f'users_{count}.xlsx'), HEADERS, user_batches(count))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        assert peaks[1] < peaks[0] * 1.5
+
+
+class TestExportQueries:
+    """Test exports read through a server-side cursor (requires database)"""
+
+    @pytest.fixture
+    def users(self, tmp_path, monkeypatch):
+        import backend
+        prefix = f'export-{secrets.token_hex(4)}'
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                for i in range(5):
+                    cursor.execute('''
+                        INSERT INTO users (name, email, phone, address, password_hash)
+                        VALUES (%s, %s, '1', 'a', 'x')
+                    ''', (f'Export {i}', f'{prefix}-{i}@example.com'))
+        except Exception:
+            pytest.skip("Database not available")
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('exports')
+        yield prefix
+        with backend.db_connection() as conn:
+            conn.cursor().execute('DELETE FROM users WHERE email LIKE %s', (f'{prefix}-%',))
+
+    def test_iter_batches_named_cursor(self, users):
+        """Test rows arrive in batches of the requested size"""
+        conn = email_export.get_db_connection()
+        try:
+            batches = list(iter_batches(conn, 'SELECT email FROM users WHERE email LIKE %s ORDER BY email',
+                                        (f'{users}-%',), batch_size=2))
+        finally:
+            conn.close()
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[0][0][0] == f'{users}-0@example.com'
+
+    def test_export_user_signups(self, users):
+        """Test the cron export streams the users table into one workbook"""
+        email_export.export_user_signups()
+        files = os.listdir('exports')
+        assert len(files) == 1 and files[0].startswith('user_signups_')
+        ws = openpyxl.load_workbook(os.path.join('exports', files[0])).active
+        emails = {row[1] for row in ws.iter_rows(min_row=2, values_only=True)}
+        assert {f'{users}-{i}@example.com' for i in range(5)} <= emails
+
+    def test_run_exports_reports_progress(self, users):
+        """Test progress is reported against the counted total across tables"""
+        reports = []
+        files = email_export.run_exports(['users', 'applications'], lambda rows, total: reports.append((rows, total)))
+        assert all(name.startswith(os.path.join('exports', '')) for name in files)
+        rows, total = reports[-1]
+        assert rows == total >= 5
+        assert [r for r, _ in reports] == sorted(r for r, _ in reports)
+
+
+class TestMergeShards:
+    """Test shard workbooks are joined into one workbook"""
+
+    def test_rows_styles_and_widths(self, tmp_path):
+        """Test merged rows keep their order and styles, headers appear once"""
+        shards = []
+        for i, (first, rows) in enumerate([(0, 1500), (1500, 1500), (3000, 7)]):
+            shards.append(str(tmp_path / f'part{i}.xlsx'))
+            write_excel(shards[-1], HEADERS, user_batches(rows, first=first))
+        merged = str(tmp_path / 'merged.xlsx')
+        email_export.merge_shards(merged, shards)
+
+        ws = openpyxl.load_workbook(merged).active
+        assert ws.max_row == 3008
+        assert [cell.value for cell in ws[1]] == HEADERS
+        assert ws['A1'].style == 'export_header'
+        assert [ws.cell(row, 2).value for row in (2, 1502, 3008)] == [
+            'user0@example.com', 'user1500@example.com', 'user3006@example.com']
+        assert ws['B1502'].style == 'export_cell'
+        assert ws.column_dimensions['B'].width == len('user999@example.com') + 2
+        emails = [row[1] for row in email_export.read_export_rows(merged)]
+        assert emails == [f'user{i}@example.com' for i in range(3007)]
+
+
+class TestParallelExport:
+    """Test sharded exports on a process pool match the serial export (requires database)"""
+
+    @pytest.fixture
+    def scratch_table(self, tmp_path, monkeypatch):
+        import backend
+        table = f'export_parallel_{secrets.token_hex(4)}'
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    CREATE TABLE {table} (id SERIAL PRIMARY KEY, name TEXT, email TEXT, phone TEXT,
+                                          address TEXT, created_at TIMESTAMP)
+                ''')
+                # Gaps in the ids: shards must still be even
+                cursor.execute(f'''
+                    INSERT INTO {table} (name, email, phone, address, created_at)
+                    SELECT 'N' || i, 'n' || i || '@example.com', '1', 'a', TIMESTAMP '2025-01-01' + (i / 3) * INTERVAL '1 day'
+                    FROM generate_series(1, 14) AS i
+                ''')
+                cursor.execute(f'DELETE FROM {table} WHERE id IN (4, 5, 9)')
+        except Exception:
+            pytest.skip("Database not available")
+        users = email_export.FULL_EXPORTS['users']
+        spec = users._replace(prefix=table, table=table)
+        monkeypatch.setitem(email_export.FULL_EXPORTS, table, spec)
+        monkeypatch.setattr(email_export, 'EXPORT_DIR', str(tmp_path))
+        yield table
+        with backend.db_connection() as conn:
+            conn.cursor().execute(f'DROP TABLE {table}')
+
+    def test_shard_ranges(self, scratch_table):
+        """Test id ranges split the rows evenly, newest range first"""
+        conn = email_export.get_db_connection()
+        try:
+            ranges = email_export.shard_ranges(conn.cursor(), scratch_table, 3)
+        finally:
+            conn.close()
+        assert ranges == [(12, 14), (9, 12), (5, 8), (0, 3)]
+
+    def test_matches_serial(self, scratch_table, tmp_path):
+        """Test a table split into shards exports the same rows as the serial path"""
+        count, serial = email_export.run_full_export(scratch_table)
+        expected = list(email_export.read_export_rows(serial))
+        os.remove(serial)
+
+        results = email_export.export_parallel([scratch_table], processes=2, shard_rows=3)
+        count, filename = results[scratch_table]
+        assert count == 11
+        assert list(email_export.read_export_rows(filename)) == expected
+        assert os.listdir(tmp_path) == [os.path.basename(filename)]
+
+    def test_benchmark(self):
+        """Test the benchmark times both paths on a synthetic table"""
+        import backend
+        try:
+            with backend.db_connection() as conn:
+                conn.cursor().execute('SELECT 1')
+        except Exception:
+            pytest.skip("Database not available")
+        [(rows, serial, parallel)] = email_export.benchmark([20], processes=2, shard_rows=8)
+        assert rows == 20 and serial > 0 and parallel > 0
+
+
+class TestIncrementalExport:
+    """Test watermark deltas and compaction (requires database)"""
+
+    @pytest.fixture
+    def scratch_export(self, tmp_path, monkeypatch):
+        import backend
+        name = f'export_test_{secrets.token_hex(4)}'
+        try:
+            backend.init_db()
+            with backend.db_connection() as conn:
+                conn.cursor().execute(f'''
+                    CREATE TABLE {name} (id SERIAL PRIMARY KEY, name TEXT, email TEXT, phone TEXT,
+                                         address TEXT, created_at TIMESTAMP)
+                ''')
+        except Exception:
+            pytest.skip("Database not available")
+        spec = email_export.IncrementalExport(
+            name, 'created_at', 'name, email, phone, address, created_at',
+            email_export.INCREMENTAL_EXPORTS['user_signups'].headers, email_export.format_user)
+        monkeypatch.setitem(email_export.INCREMENTAL_EXPORTS, name, spec)
+        monkeypatch.setattr(email_export, 'EXPORT_DIR', str(tmp_path))
+        monkeypatch.setattr(email_export, 'EXPORT_SETTLE_SECONDS', 0)
+        yield backend, name
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'DROP TABLE {name}')
+            cursor.execute('DELETE FROM export_watermarks WHERE name = %s', (name,))
+
+    def insert(self, backend, name, created_at):
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for ts in created_at:
+                cursor.execute(f'''
+                    INSERT INTO {name} (name, email, phone, address, created_at)
+                    VALUES ('N', 'n@example.com', '1', 'a', {ts})
+                ''')
+
+    def exported_ids(self, filename):
+        return [row[0] for row in email_export.read_export_rows(filename)]
+
+    def test_deltas_follow_watermark(self, scratch_export, monkeypatch):
+        """Test each run exports only rows past the watermark, settled rows only"""
+        backend, name = scratch_export
+        self.insert(backend, name, ["'2025-01-01 10:00:00'", "'2025-01-01 10:00:00'", "'2025-01-02 09:00:00'"])
+        count, first = email_export.export_incremental(name)
+        assert count == 3
+        assert self.exported_ids(first) == [1, 2, 3]
+        assert email_export.export_incremental(name) == (0, None)
+
+        monkeypatch.setattr(email_export, 'EXPORT_SETTLE_SECONDS', 300)
+        self.insert(backend, name, ["'2025-01-03 09:00:00'", 'LOCALTIMESTAMP'])
+        count, second = email_export.export_incremental(name)
+        assert self.exported_ids(second) == [4]
+
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT last_id, rows_exported FROM export_watermarks WHERE name = %s', (name,))
+            assert cursor.fetchone() == (4, 4)
+
+    def test_compaction_merges_and_dedupes(self, scratch_export):
+        """Test compaction folds deltas into one snapshot and drops rows exported twice"""
+        backend, name = scratch_export
+        self.insert(backend, name, ["'2025-01-01 10:00:00'", "'2025-01-01 11:00:00'"])
+        email_export.export_incremental(name)
+        # A run that died before committing its watermark: the rows come out again
+        with backend.db_connection() as conn:
+            conn.cursor().execute('UPDATE export_watermarks SET last_at = NULL, last_id = NULL WHERE name = %s', (name,))
+        self.insert(backend, name, ["'2025-01-02 10:00:00'"])
+        email_export.export_incremental(name)
+
+        snapshot = email_export.compact_exports(name)
+        assert self.exported_ids(snapshot) == [1, 2, 3]
+        assert os.listdir(email_export.EXPORT_DIR) == [os.path.basename(snapshot)]
+        assert email_export.compact_exports(name) is None
+
+        self.insert(backend, name, ["'2025-01-03 10:00:00'"])
+        email_export.export_incremental(name)
+        merged = email_export.compact_exports(name)
+        assert self.exported_ids(merged) == [1, 2, 3, 4]
+        assert os.listdir(email_export.EXPORT_DIR) == [os.path.basename(merged)]
+        ws = openpyxl.load_workbook(merged).active
+        assert [cell.value for cell in ws[1]][:2] == ['ID', 'Full Name']
+
+    def test_updated_rows_exported_again(self, scratch_export, monkeypatch):
+        """Test an edited row comes out in the next delta and compaction keeps its latest version"""
+        backend, name = scratch_export
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'ALTER TABLE {name} ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+            cursor.execute(f'CREATE TRIGGER {name}_set_updated_at BEFORE UPDATE ON {name} '
+                           f'FOR EACH ROW EXECUTE FUNCTION set_updated_at()')
+        spec = email_export.INCREMENTAL_EXPORTS[name]._replace(time_column='updated_at')
+        monkeypatch.setitem(email_export.INCREMENTAL_EXPORTS, name, spec)
+        self.insert(backend, name, ["'2025-01-01 10:00:00'", "'2025-01-01 11:00:00'"])
+        assert self.exported_ids(email_export.export_incremental(name)[1]) == [1, 2]
+
+        with backend.db_connection() as conn:
+            conn.cursor().execute(f"UPDATE {name} SET name = 'Renamed' WHERE id = 1")
+        count, delta = email_export.export_incremental(name)
+        assert self.exported_ids(delta) == [1]
+
+        snapshot = email_export.compact_exports(name)
+        rows = list(email_export.read_export_rows(snapshot))
+        assert [row[0] for row in rows] == [2, 1]
+        assert rows[1][1] == 'Renamed'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
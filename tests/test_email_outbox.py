@@ -0,0 +1,422 @@
+"""
+Unit tests for the outbound email queue (email_outbox.py)
+Delivery is tested against a local HTTP stand-in for the Mailgun API.
+"""
+
+import pytest
+import sys
+import os
+import json
+import time
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from email_outbox import (MailgunTransport, EmailOutbox, EmailDispatcher, DomainRateLimiter,
+                          DeliveryError, backoff_delay, batch_chunks)
+
+
+class FakeMailgun(ThreadingHTTPServer):
+    """Records posted messages; replies with queued status codes (default 200)"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeMailgunHandler)
+        self.messages = []
+        self.statuses = []
+        self.delay = 0
+        self.calls = 0
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v3'
+
+
+class FakeMailgunHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real API
+
+    def do_POST(self):
+        server = self.server
+        server.calls += 1
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        time.sleep(server.delay)
+        status = server.statuses.pop(0) if server.statuses else 200
+        if status == 200:
+            server.messages.append({'path': self.path, 'auth': self.headers.get('Authorization'), **form})
+        body = json.dumps({'message': 'Queued. Thank you.' if status == 200 else 'error'}).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # client gave up (timeout test)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mailgun():
+    server = FakeMailgun()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def transport(mailgun):
+    return MailgunTransport('key-test', 'mg.example.test', 'noreply@example.test',
+                            base_url=mailgun.base_url, timeout=(1, 0.5), retry_backoff=0.001)
+
+
+class TestMailgunTransport:
+    """Test the HTTP transport against the stand-in"""
+
+    def test_send(self, mailgun, transport):
+        """Test a message is posted to the domain's messages endpoint"""
+        transport.send('user@example.com', 'Hello', 'Line 1\nLine 2')
+        message = mailgun.messages[0]
+        assert message['path'] == '/v3/mg.example.test/messages'
+        assert message['to'] == ['user@example.com']
+        assert message['html'] == ['Line 1<br>Line 2']
+        assert message['auth'].startswith('Basic ')
+
+    def test_server_error_is_retryable(self, mailgun, transport):
+        """Test 5xx and 429 are temporary failures once in-call retries run out"""
+        mailgun.statuses = [503] * 3 + [429] * 3
+        for _ in range(2):
+            with pytest.raises(DeliveryError) as exc:
+                transport.send('user@example.com', 'Hello', 'Body')
+            assert exc.value.retryable
+        assert mailgun.calls == 6
+
+    def test_throttling_retried_in_call(self, mailgun, transport):
+        """Test a 429/503 blip is retried with backoff inside the same send"""
+        mailgun.statuses = [429, 503]
+        transport.send('user@example.com', 'Hello', 'Body')
+        assert mailgun.calls == 3
+        stats = transport.stats()
+        assert stats['retries'] == 2
+        assert stats['statuses'] == {'429': 1, '503': 1, '200': 1}
+
+    def test_server_500_not_retried_in_call(self, mailgun, transport):
+        """Test a plain 500 (message may be accepted) is left to the outbox"""
+        mailgun.statuses = [500]
+        with pytest.raises(DeliveryError) as exc:
+            transport.send('user@example.com', 'Hello', 'Body')
+        assert exc.value.retryable
+        assert mailgun.calls == 1
+
+    def test_connections_reused(self, mailgun, transport):
+        """Test a burst of sends reuses one keep-alive connection"""
+        for i in range(20):
+            transport.send(f'user{i}@example.com', 'Hello', 'Body')
+        assert len(mailgun.messages) == 20
+        assert transport.connections_opened() == 1
+
+    def test_latency_histogram(self, mailgun, transport):
+        """Test every call is timed per call type"""
+        transport.send('user@example.com', 'Hello', 'Body')
+        transport.send_batch([('a@example.com', 's', 'b')])
+        latency = transport.stats()['latency']
+        assert latency['send']['count'] == 1
+        assert latency['send_batch']['count'] == 1
+        assert sum(latency['send']['buckets'].values()) == 1
+
+    def test_client_error_is_permanent(self, mailgun, transport):
+        """Test other 4xx responses are not retried"""
+        mailgun.statuses = [400]
+        with pytest.raises(DeliveryError) as exc:
+            transport.send('user@example.com', 'Hello', 'Body')
+        assert not exc.value.retryable
+
+    def test_read_timeout(self, mailgun, transport):
+        """Test a slow provider fails fast instead of holding the thread"""
+        mailgun.delay = 1
+        start = time.monotonic()
+        with pytest.raises(DeliveryError) as exc:
+            transport.send('user@example.com', 'Hello', 'Body')
+        assert exc.value.retryable
+        assert time.monotonic() - start < 1
+
+    def test_send_batch(self, mailgun, transport):
+        """Test a batch is one call personalised with recipient-variables"""
+        transport.send_batch([('a@example.com', 'Hi A', 'Dear A'), ('b@example.com', 'Hi B', 'Dear B')])
+        assert mailgun.calls == 1
+        message = mailgun.messages[0]
+        assert message['to'] == ['a@example.com', 'b@example.com']
+        assert message['subject'] == ['%recipient.subject%']
+        variables = json.loads(message['recipient-variables'][0])
+        assert variables['b@example.com'] == {'subject': 'Hi B', 'text': 'Dear B', 'html': 'Dear B'}
+
+    def test_batch_limit(self, transport):
+        """Test batches above Mailgun's recipient limit are refused"""
+        with pytest.raises(ValueError):
+            transport.send_batch([(f'u{i}@example.com', 's', 'b') for i in range(1001)])
+
+    def test_not_configured(self):
+        """Test a missing API key is a permanent failure"""
+        with pytest.raises(DeliveryError) as exc:
+            MailgunTransport('', '', 'noreply@example.test').send('a@b.com', 's', 'b')
+        assert not exc.value.retryable
+
+
+class TestBackoffAndRateLimit:
+    """Test retry scheduling and per-domain throttling"""
+
+    def test_backoff_grows_and_caps(self):
+        """Test delays double per attempt, with jitter, up to the cap"""
+        for attempts in range(1, 5):
+            delay = backoff_delay(attempts, base=10, maximum=1000)
+            assert 10 * 2 ** (attempts - 1) / 2 <= delay <= 10 * 2 ** (attempts - 1)
+        assert backoff_delay(20, base=10, maximum=100) <= 100
+
+    def test_batch_chunks(self):
+        """Test chunks respect the limit and never repeat an address"""
+        rows = [(i, f'user{i % 3}@example.com') for i in range(7)]
+        chunks = batch_chunks(rows, limit=2)
+        assert all(len(chunk) <= 2 for chunk in chunks)
+        assert all(len({row[1] for row in chunk}) == len(chunk) for chunk in chunks)
+        assert sorted(row for chunk in chunks for row in chunk) == rows
+
+    def test_rate_limit_per_domain(self):
+        """Test the burst is enforced per recipient domain"""
+        limiter = DomainRateLimiter(per_minute=60, burst=2)
+        assert limiter.acquire('gmail.com') == 0
+        assert limiter.acquire('gmail.com') == 0
+        assert limiter.acquire('gmail.com') > 0
+        assert limiter.acquire('example.com') == 0
+
+    def test_rate_limit_shared_between_processes(self):
+        """Test each worker process gets its share of the domain limit"""
+        limiter = DomainRateLimiter(per_minute=60, burst=10, processes=4)
+        assert (limiter.rate, limiter.burst) == (0.25, 2)
+        assert [limiter.acquire('gmail.com') for _ in range(2)] == [0, 0]
+        assert limiter.acquire('gmail.com') > 0
+
+
+class TestEmailDispatcher:
+    """Test draining the outbox (requires database)"""
+
+    @pytest.fixture
+    def outbox(self):
+        from backend import db_connection, init_db
+        outbox = EmailOutbox(db_connection)
+        try:
+            init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        yield outbox
+        with db_connection() as conn:
+            conn.cursor().execute("DELETE FROM emails WHERE to_email LIKE 'outbox-%%'")
+
+    def enqueue(self, outbox, domain='example.com'):
+        from backend import db_connection
+        to_email = f'outbox-{secrets.token_hex(4)}@{domain}'
+        with db_connection() as conn:
+            email_id = outbox.enqueue(conn.cursor(), to_email, 'Subject', 'Body')
+        return email_id, to_email
+
+    def row(self, email_id):
+        from backend import db_connection
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT status, attempts, last_error, delivered_at FROM emails WHERE id = %s',
+                           (email_id,))
+            return cursor.fetchone()
+
+    def dispatcher(self, outbox, transport, **kwargs):
+        kwargs.setdefault('backoff_base', 0.01)
+        return EmailDispatcher(outbox, transport, workers=2, batch_size=50, **kwargs)
+
+    def test_pending_email_sent(self, outbox, transport, mailgun):
+        """Test a queued email is delivered and marked sent"""
+        email_id, to_email = self.enqueue(outbox)
+        assert self.row(email_id)[0] == 'pending'
+        self.dispatcher(outbox, transport).dispatch_once()
+        status, attempts, last_error, delivered_at = self.row(email_id)
+        assert (status, attempts, last_error) == ('sent', 1, None)
+        assert delivered_at is not None
+        assert [to_email] in [m['to'] for m in mailgun.messages]
+
+    def test_temporary_failure_retried(self, outbox, transport, mailgun):
+        """Test a 5xx is retried with backoff and then succeeds"""
+        email_id, _ = self.enqueue(outbox)
+        mailgun.statuses = [503] * 50
+        dispatcher = self.dispatcher(outbox, transport)
+        dispatcher.dispatch_once()
+        status, attempts, last_error, _ = self.row(email_id)
+        assert (status, attempts) == ('pending', 1)
+        assert '503' in last_error
+
+        mailgun.statuses = []
+        time.sleep(0.05)
+        dispatcher.dispatch_once()
+        assert self.row(email_id)[:2] == ('sent', 2)
+
+    def test_gives_up_after_max_attempts(self, outbox, transport, mailgun):
+        """Test retries stop at max_attempts"""
+        email_id, _ = self.enqueue(outbox)
+        mailgun.statuses = [500] * 100
+        dispatcher = self.dispatcher(outbox, transport, max_attempts=2)
+        dispatcher.dispatch_once()
+        time.sleep(0.05)
+        dispatcher.dispatch_once()
+        assert self.row(email_id)[:2] == ('failed', 2)
+
+    def test_permanent_failure(self, outbox, transport, mailgun):
+        """Test a 4xx marks the email failed without retrying"""
+        email_id, _ = self.enqueue(outbox)
+        mailgun.statuses = [400] * 50
+        self.dispatcher(outbox, transport).dispatch_once()
+        assert self.row(email_id)[:2] == ('failed', 1)
+
+    def test_rate_limited_email_postponed(self, outbox, transport, mailgun):
+        """Test emails over the domain rate wait without using an attempt"""
+        domain = f'{secrets.token_hex(4)}.example.com'
+        first, _ = self.enqueue(outbox, domain)
+        second, _ = self.enqueue(outbox, domain)
+        limiter = DomainRateLimiter(per_minute=1, burst=1)
+        self.dispatcher(outbox, transport, rate_limiter=limiter).dispatch_once()
+        assert sorted([self.row(first)[:2], self.row(second)[:2]]) == [('pending', 0), ('sent', 1)]
+
+    def test_batch_sent_in_one_call(self, outbox, transport, mailgun):
+        """Test emails queued as a batch go out in one API call"""
+        from backend import db_connection
+        batch_id = secrets.token_hex(8)
+        messages = [(f'outbox-{secrets.token_hex(4)}@example.com', f'Subject {i}', f'Body {i}', None)
+                    for i in range(25)]
+        with db_connection() as conn:
+            email_ids = outbox.enqueue_many(conn.cursor(), messages, batch_id=batch_id)
+        assert len(email_ids) == 25
+
+        self.dispatcher(outbox, transport).dispatch_once()
+        batch_calls = [m for m in mailgun.messages if 'recipient-variables' in m]
+        assert len(batch_calls) == 1
+        assert len(batch_calls[0]['to']) == 25
+        assert all(self.row(email_id)[:2] == ('sent', 1) for email_id in email_ids)
+
+    def test_failed_batch_retried(self, outbox, transport, mailgun):
+        """Test a failed batch call schedules every email for retry"""
+        from backend import db_connection
+        with db_connection() as conn:
+            email_ids = outbox.enqueue_many(conn.cursor(), [
+                (f'outbox-{secrets.token_hex(4)}@example.com', 'S', 'B', None) for _ in range(3)
+            ], batch_id=secrets.token_hex(8))
+        mailgun.statuses = [502] * 50
+        self.dispatcher(outbox, transport).dispatch_once()
+        assert all(self.row(email_id)[:2] == ('pending', 1) for email_id in email_ids)
+
+    def test_claimed_email_not_sent_twice(self, outbox, transport, mailgun):
+        """Test a leased email is skipped by other dispatchers"""
+        email_id, _ = self.enqueue(outbox)
+        claimed = outbox.claim(1000, lease=60)
+        assert email_id in [row[0] for row in claimed]
+        assert email_id not in [row[0] for row in outbox.claim(1000, lease=60)]
+
+
+class TestHandlersOnlyEnqueue:
+    """Test request handlers queue instead of calling Mailgun (requires database)"""
+
+    def test_send_application_email_queues(self, monkeypatch):
+        """Test the admin email endpoint returns without contacting Mailgun"""
+        import backend
+        calls = []
+        monkeypatch.setattr(backend.email_transport, 'send', lambda *args: calls.append(args))
+        token = secrets.token_urlsafe(16)
+        backend.admin_sessions[token] = {'email': 'admin@test.com', 'role': 'admin'}
+        to_email = f'outbox-{secrets.token_hex(4)}@example.com'
+        try:
+            response = backend.app.test_client().post(
+                '/api/admin/send-application-email',
+                json={'applicationId': 1, 'email': to_email, 'subject': 'Status', 'body': 'Hi'},
+                headers={'Authorization': f'Bearer {token}'})
+            if response.status_code == 500:
+                pytest.skip("Database not available")
+            assert response.status_code == 200
+            assert calls == []
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT status FROM emails WHERE id = %s', (response.get_json()['email_id'],))
+                assert cursor.fetchone()[0] == 'pending'
+                cursor.execute('DELETE FROM emails WHERE to_email = %s', (to_email,))
+        finally:
+            del backend.admin_sessions[token]
+
+    def test_bulk_status_change(self, monkeypatch):
+        """Test the bulk endpoint updates all applications and queues one batch"""
+        import backend
+        monkeypatch.setattr(backend.email_transport, 'send_batch', lambda *args: pytest.fail('sent inline'))
+        token = secrets.token_urlsafe(16)
+        backend.admin_sessions[token] = {'email': 'admin@test.com', 'role': 'admin'}
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                app_ids = []
+                for i in range(3):
+                    cursor.execute('''
+                        INSERT INTO applications (position, full_name, email, phone, address, college,
+                                                  degree, semester, year, about, resume_name)
+                        VALUES ('Engineer', %s, %s, '1', 'a', 'c', 'd', 's', 'y', 'a', 'r.pdf')
+                        RETURNING id
+                    ''', (f'Applicant {i}', f'outbox-{secrets.token_hex(4)}@example.com'))
+                    app_ids.append(cursor.fetchone()[0])
+        except Exception:
+            pytest.skip("Database not available")
+        try:
+            response = backend.app.test_client().post(
+                '/api/admin/applications/bulk-status',
+                json={'application_ids': app_ids + [999999999], 'status': 'rejected',
+                      'subject': 'Update - {position}', 'body': 'Dear {name},\nThank you.'},
+                headers={'Authorization': f'Bearer {token}'})
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['updated'] == 3
+            assert data['not_found'] == [999999999]
+            assert data['emails_queued'] == 3
+
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT DISTINCT status FROM applications WHERE id = ANY(%s)', (app_ids,))
+                assert cursor.fetchall() == [('rejected',)]
+                cursor.execute('''
+                    SELECT subject, body, status FROM emails WHERE batch_id = %s ORDER BY id
+                ''', (data['batch_id'],))
+                emails = cursor.fetchall()
+                assert emails[0] == ('Update - Engineer', 'Dear Applicant 0,\nThank you.', 'pending')
+                assert len(emails) == 3
+        finally:
+            del backend.admin_sessions[token]
+            with backend.db_connection() as conn:
+                conn.cursor().execute('DELETE FROM applications WHERE id = ANY(%s)', (app_ids,))
+
+    def test_bulk_status_validation(self):
+        """Test bad bulk requests are rejected"""
+        import backend
+        token = secrets.token_urlsafe(16)
+        backend.admin_sessions[token] = {'email': 'admin@test.com', 'role': 'admin'}
+        client = backend.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        try:
+            for payload in ({'application_ids': [1], 'status': 'bogus'},
+                            {'application_ids': [], 'status': 'rejected'},
+                            {'application_ids': ['1'], 'status': 'rejected'},
+                            {'application_ids': [1], 'status': 'rejected', 'subject': 'only subject'}):
+                response = client.post('/api/admin/applications/bulk-status', json=payload, headers=headers)
+                assert response.status_code == 400
+        finally:
+            del backend.admin_sessions[token]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,158 @@
+"""
+Unit tests for streamed table exports (export_formats.py) and /api/admin/export/stream
+"""
+
+import pytest
+import sys
+import os
+import io
+import csv
+import gzip
+import json
+import secrets
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from export_formats import FORMATS, EXPORT_TABLES, encode_column, read_columnar
+
+COLUMNS = ['id', 'email', 'status', 'applied_at']
+
+
+def batches(count, batch_size=100):
+    for start in range(0, count, batch_size):
+        yield [(i, f'user{i}@example.com', 'pending' if i % 3 else 'selected', datetime(2025, 1, 1, 10, 0, i % 60))
+               for i in range(start, min(count, start + batch_size))]
+
+
+def encoded(fmt, count=250, batch_size=100):
+    chunks = list(FORMATS[fmt].encode(COLUMNS, batches(count, batch_size)))
+    return chunks, b''.join(chunks)
+
+
+class TestFormats:
+    """Test each format encodes every row and streams in chunks"""
+
+    def test_csv(self):
+        """Test CSV has a header row, ISO datetimes and one chunk per batch"""
+        chunks, data = encoded('csv')
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+        assert rows[0] == COLUMNS
+        assert len(rows) == 251
+        assert rows[1] == ['0', 'user0@example.com', 'selected', '2025-01-01T10:00:00']
+        assert len(chunks) == 3
+
+    def test_ndjson_gzip(self):
+        """Test NDJSON is a single valid gzip stream of one object per line"""
+        chunks, data = encoded('ndjson')
+        lines = gzip.decompress(data).decode('utf-8').splitlines()
+        assert len(lines) == 250
+        assert json.loads(lines[2]) == {'id': 2, 'email': 'user2@example.com', 'status': 'pending',
+                                         'applied_at': '2025-01-01T10:00:02'}
+
+    def test_columnar_round_trip(self):
+        """Test columnar row groups read back as the original rows"""
+        _, data = encoded('columnar', count=250, batch_size=100)
+        columns, rows = read_columnar(io.BytesIO(data))
+        rows = list(rows)
+        assert columns == COLUMNS
+        assert len(rows) == 250
+        assert rows[4] == (4, 'user4@example.com', 'pending', '2025-01-01T10:00:04')
+
+        groups = gzip.decompress(data).decode('utf-8').splitlines()[1:]
+        assert [json.loads(group)['rows'] for group in groups] == [100, 100, 50]
+
+    def test_columnar_smaller_than_ndjson(self):
+        """Test the columnar layout compresses better than row-wise NDJSON"""
+        assert len(encoded('columnar', 5000, 1000)[1]) < len(encoded('ndjson', 5000, 1000)[1])
+
+    def test_dictionary_encoding(self):
+        """Test low-cardinality columns are dictionary-encoded, unique ones are not"""
+        assert encode_column(['a', 'b', 'a', 'a']) == {'dict': ['a', 'b'], 'codes': [0, 1, 0, 0]}
+        assert encode_column([1, 2, 3]) == {'values': [1, 2, 3]}
+
+    def test_empty_table(self):
+        """Test an empty table still produces a readable file"""
+        assert b''.join(FORMATS['csv'].encode(COLUMNS, [])).decode('utf-8').strip() == ','.join(COLUMNS)
+        assert gzip.decompress(b''.join(FORMATS['ndjson'].encode(COLUMNS, []))) == b''
+        columns, rows = read_columnar(io.BytesIO(b''.join(FORMATS['columnar'].encode(COLUMNS, []))))
+        assert columns == COLUMNS and list(rows) == []
+
+    def test_no_secrets_exported(self):
+        """Test password hashes and resume contents are never exported"""
+        assert 'password_hash' not in EXPORT_TABLES['users']
+        assert 'resume_data' not in EXPORT_TABLES['applications']
+
+
+class TestStreamEndpoint:
+    """Test /api/admin/export/stream/<table> (requires database)"""
+
+    @pytest.fixture
+    def client(self):
+        import backend
+        prefix = f'stream-{secrets.token_hex(4)}'
+        try:
+            backend.init_db()
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                for i in range(3):
+                    cursor.execute('''
+                        INSERT INTO users (name, email, phone, address, password_hash)
+                        VALUES (%s, %s, '1', 'a', 'secret-hash')
+                    ''', (f'Stream {i}', f'{prefix}-{i}@example.com'))
+        except Exception:
+            pytest.skip("Database not available")
+        token = secrets.token_urlsafe(16)
+        backend.admin_sessions[token] = {'email': 'admin@xgenai.com', 'role': 'admin'}
+        client = backend.app.test_client()
+        client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        yield client, prefix
+        del backend.admin_sessions[token]
+        with backend.db_connection() as conn:
+            conn.cursor().execute('DELETE FROM users WHERE email LIKE %s', (f'{prefix}-%',))
+
+    def test_stream_csv(self, client):
+        """Test the users table streams as CSV without password hashes"""
+        client, prefix = client
+        response = client.get('/api/admin/export/stream/users?format=csv')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'attachment; filename=users_' in response.headers['Content-Disposition']
+        body = response.get_data(as_text=True)
+        assert 'secret-hash' not in body
+        emails = {row['email'] for row in csv.DictReader(io.StringIO(body))}
+        assert {f'{prefix}-{i}@example.com' for i in range(3)} <= emails
+
+    def test_stream_columnar(self, client):
+        """Test the columnar stream reads back with read_columnar"""
+        client, prefix = client
+        response = client.get('/api/admin/export/stream/users?format=columnar')
+        assert response.status_code == 200
+        assert response.headers['Content-Disposition'].endswith('.cols.gz')
+        columns, rows = read_columnar(io.BytesIO(response.get_data()))
+        emails = {row[columns.index('email')] for row in rows}
+        assert f'{prefix}-0@example.com' in emails
+
+    def test_unknown_table_or_format(self, client):
+        """Test only whitelisted tables and formats are accepted"""
+        client, _ = client
+        assert client.get('/api/admin/export/stream/sessions').status_code == 404
+        assert client.get('/api/admin/export/stream/users?format=xml').status_code == 400
+
+    def test_requires_admin(self, client):
+        """Test the stream is refused without a valid admin token"""
+        import backend
+        client, prefix = client
+        anonymous = backend.app.test_client()
+        response = anonymous.get('/api/admin/export/stream/emails?format=csv')
+        assert response.status_code == 401
+        assert response.get_json() == {'error': 'Unauthorized'}
+        forged = anonymous.get('/api/admin/export/stream/users', headers={'Authorization': 'Bearer forged'})
+        assert forged.status_code == 401
+        assert prefix not in forged.get_data(as_text=True)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,177 @@
+"""
+Unit tests for background export jobs (export_jobs.py) and the export endpoints
+"""
+
+import pytest
+import sys
+import os
+import time
+import secrets
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from export_jobs import ExportJobs, DONE, FAILED, RUNNING
+
+
+def wait_for(jobs, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get(job_id)
+        if job['status'] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+class TestExportJobs:
+    """Test job submission, deduplication and progress (requires database)"""
+
+    @pytest.fixture
+    def jobs(self):
+        import backend
+        kind = f'test-{secrets.token_hex(4)}'
+        try:
+            backend.init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        release = threading.Event()
+        calls = []
+
+        def runner(progress):
+            calls.append(1)
+            progress(5, 10)
+            release.wait(10)
+            progress(10, 10)
+            return ['exports/test_export.xlsx']
+
+        jobs = ExportJobs(backend.db_connection, {kind: runner}, workers=2)
+        yield jobs, kind, release, calls
+        release.set()
+        with backend.db_connection() as conn:
+            conn.cursor().execute('DELETE FROM export_jobs WHERE kind = %s', (kind,))
+
+    def test_duplicate_requests_share_job(self, jobs):
+        """Test a second request while a job is in flight joins it"""
+        jobs, kind, release, calls = jobs
+        first, created = jobs.submit(kind)
+        second, created_again = jobs.submit(kind)
+        assert created and not created_again
+        assert second['id'] == first['id']
+
+        release.set()
+        assert wait_for(jobs, first['id'])['status'] == DONE
+        assert calls == [1]
+
+        third, created = jobs.submit(kind)
+        assert created and third['id'] != first['id']
+        wait_for(jobs, third['id'])
+
+    def test_progress_and_files(self, jobs):
+        """Test rows written are reported while running and files once done"""
+        jobs, kind, release, calls = jobs
+        job, _ = jobs.submit(kind)
+        deadline = time.time() + 10
+        while jobs.get(job['id'])['rows_written'] != 5 and time.time() < deadline:
+            time.sleep(0.02)
+        running = jobs.get(job['id'])
+        assert running['status'] == RUNNING
+        assert (running['rows_written'], running['total_rows'], running['progress']) == (5, 10, 0.5)
+
+        release.set()
+        done = wait_for(jobs, job['id'])
+        assert done['progress'] == 1.0
+        assert done['files'] == ['test_export.xlsx']
+        assert done['finished_at'] is not None
+
+    def test_failure_recorded(self, jobs):
+        """Test an exception in the runner marks the job failed"""
+        jobs, kind, release, calls = jobs
+
+        def broken(progress):
+            raise RuntimeError('disk full')
+
+        jobs.runners[kind] = broken
+        job, _ = jobs.submit(kind)
+        failed = wait_for(jobs, job['id'])
+        assert (failed['status'], failed['error']) == (FAILED, 'disk full')
+
+    def test_stale_job_is_replaced(self, jobs):
+        """Test a job whose worker stopped heartbeating no longer blocks new ones"""
+        import backend
+        jobs, kind, release, calls = jobs
+        with backend.db_connection() as conn:
+            conn.cursor().execute('''
+                INSERT INTO export_jobs (id, kind, status, heartbeat_at)
+                VALUES ('lost-job', %s, 'running', LOCALTIMESTAMP - INTERVAL '1 hour')
+            ''', (kind,))
+        job, created = jobs.submit(kind)
+        assert created and job['id'] != 'lost-job'
+        assert jobs.get('lost-job')['status'] == FAILED
+        release.set()
+        wait_for(jobs, job['id'])
+
+    def test_unknown_kind(self, jobs):
+        """Test only configured exports can be submitted"""
+        jobs, kind, release, calls = jobs
+        with pytest.raises(ValueError):
+            jobs.submit('passwords')
+
+
+class TestExportEndpoints:
+    """Test /api/admin/export/* return a job to poll (requires database)"""
+
+    def test_export_returns_job(self, monkeypatch):
+        import backend
+        try:
+            backend.init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        monkeypatch.setitem(backend.export_jobs.runners, 'users',
+                            lambda progress: progress(3, 3) or ['exports/user_signups_test.xlsx'])
+        client = backend.app.test_client()
+        try:
+            response = client.get('/api/admin/export/users')
+            assert response.status_code == 202
+            data = response.get_json()
+            assert data['status_url'] == f"/api/admin/export/jobs/{data['job_id']}"
+
+            wait_for(backend.export_jobs, data['job_id'])
+            job = client.get(data['status_url']).get_json()
+            assert job['status'] == DONE
+            assert job['rows_written'] == 3
+            assert job['files'] == [{'name': 'user_signups_test.xlsx',
+                                     'download_url': '/api/admin/export/download/user_signups_test.xlsx'}]
+            assert client.get('/api/admin/export/jobs/nope').status_code == 404
+        finally:
+            with backend.db_connection() as conn:
+                conn.cursor().execute("DELETE FROM export_jobs WHERE kind = 'users'")
+
+    def test_export_on_database_without_job_table(self, monkeypatch):
+        """Test an existing database gets export_jobs before the first export request"""
+        import backend
+        try:
+            backend.init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DROP TABLE export_jobs')
+            cursor.execute("DELETE FROM schema_version WHERE name = 'export jobs'")
+        monkeypatch.setattr(backend, '_db_initialized', False)
+        monkeypatch.setattr(backend, '_db_init_failed_at', 0.0)
+        monkeypatch.setitem(backend.export_jobs.runners, 'applications',
+                            lambda progress: ['exports/intern_applications_test.xlsx'])
+        client = backend.app.test_client()
+        try:
+            response = client.get('/api/admin/export/applications')
+            assert response.status_code == 202
+            assert wait_for(backend.export_jobs, response.get_json()['job_id'])['status'] == DONE
+        finally:
+            with backend.db_connection() as conn:
+                conn.cursor().execute("DELETE FROM export_jobs WHERE kind = 'applications'")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
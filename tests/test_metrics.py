@@ -0,0 +1,47 @@
+"""
+Unit tests for in-process metrics (metrics.py)
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import LatencyHistogram
+
+
+class TestLatencyHistogram:
+    """Test bucket counts and percentile estimates"""
+
+    def test_empty(self):
+        """Test an unused histogram reports no percentiles"""
+        snapshot = LatencyHistogram().snapshot()
+        assert snapshot['count'] == 0
+        assert snapshot['p95_ms'] is None
+
+    def test_buckets(self):
+        """Test observations land in the first bucket that fits"""
+        hist = LatencyHistogram(buckets_ms=(10, 100))
+        for seconds in (0.001, 0.010, 0.050, 2.0):
+            hist.observe(seconds)
+        snapshot = hist.snapshot()
+        assert snapshot['buckets'] == {'<=10ms': 2, '<=100ms': 1, '>100ms': 1}
+        assert snapshot['count'] == 4
+        assert snapshot['max_ms'] == 2000.0
+
+    def test_percentiles(self):
+        """Test percentiles report the bucket upper bound"""
+        hist = LatencyHistogram(buckets_ms=(10, 100, 1000))
+        for _ in range(90):
+            hist.observe(0.005)
+        for _ in range(10):
+            hist.observe(0.5)
+        assert hist.percentile(50) == 10
+        assert hist.percentile(95) == 1000
+        assert hist.percentile(100) == 1000
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,209 @@
+"""
+Unit tests for the versioned migration runner (migrations.py)
+"""
+
+import pytest
+import sys
+import os
+import secrets
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from migrations import (Index, Migration, MIGRATIONS, check_order, migrate, explain_routes, plan_indexes,
+                        route_queries)
+
+
+class TestMigrationDefinitions:
+    """Test migration ordering and index SQL"""
+
+    def test_index_sql(self):
+        """Test index steps render with and without CONCURRENTLY"""
+        index = Index('idx_t_a', 't', 'a, b DESC')
+        assert index.sql() == 'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_t_a ON t (a, b DESC)'
+        assert index.sql(concurrently=False) == 'CREATE INDEX IF NOT EXISTS idx_t_a ON t (a, b DESC)'
+        partial = Index('idx_t_u', 't', 'email', where="status = 'active'", unique=True)
+        assert partial.sql(False) == "CREATE UNIQUE INDEX IF NOT EXISTS idx_t_u ON t (email) WHERE status = 'active'"
+
+    def test_versions_ordered(self):
+        """Test versions must be unique and increasing"""
+        check_order(MIGRATIONS)
+        with pytest.raises(ValueError):
+            check_order([Migration(2, 'b', []), Migration(1, 'a', [])])
+        with pytest.raises(ValueError):
+            check_order([Migration(1, 'a', []), Migration(1, 'b', [])])
+
+    def test_plan_indexes(self):
+        """Test index names are collected from nested plan nodes"""
+        plan = {'Node Type': 'Nested Loop', 'Plans': [
+            {'Node Type': 'Index Scan', 'Index Name': 'idx_a'},
+            {'Node Type': 'Bitmap Heap Scan', 'Plans': [{'Node Type': 'Bitmap Index Scan', 'Index Name': 'idx_b'}]},
+        ]}
+        assert plan_indexes(plan) == {'idx_a', 'idx_b'}
+
+    def test_route_queries_are_the_routes_sql(self):
+        """Test the index report EXPLAINs the SQL the routes run, not a copy"""
+        import backend
+        sqls = {sql for _, _, sql, _ in route_queries()}
+        for name in ('USERS_PAGE_SQL', 'EMAILS_PAGE_SQL', 'ADMIN_DATA_PAGE_SQL', 'INTERN_TASKS_SQL',
+                     'INTERN_STATS_SQL', 'INTERN_DASHBOARD_SQL', 'RECRUITER_APPLICATIONS_SQL',
+                     'RECRUITER_STATS_SQL', 'RECRUITER_STATS_COUNT_SQL'):
+            assert getattr(backend, name) in sqls
+
+
+class TestMigrationRunner:
+    """Test applying migrations against the database (requires database)"""
+
+    @pytest.fixture
+    def scratch(self):
+        import backend
+        suffix = secrets.token_hex(4)
+        table, versions = f'migration_test_{suffix}', f'schema_version_test_{suffix}'
+        try:
+            with backend.db_connection() as conn:
+                conn.cursor().execute(f'CREATE TABLE {table} (id SERIAL PRIMARY KEY, email TEXT)')
+        except Exception:
+            pytest.skip("Database not available")
+        yield backend, table, versions
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(f'DROP TABLE IF EXISTS {versions}')
+
+    def index_valid(self, backend, name):
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = %s
+            ''', (name,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def test_applies_in_order_once(self, scratch):
+        """Test pending migrations run in order and are recorded"""
+        backend, table, versions = scratch
+        steps = [
+            Migration(1, 'add column', [f'ALTER TABLE {table} ADD COLUMN status TEXT']),
+            Migration(2, 'index', [Index(f'idx_{table}_status', table, 'status')]),
+        ]
+        assert migrate(backend.DATABASE_URL, steps, table=versions) == [1, 2]
+        assert migrate(backend.DATABASE_URL, steps, table=versions) == []
+        assert self.index_valid(backend, f'idx_{table}_status') is True
+
+        steps.append(Migration(3, 'broken', [f'ALTER TABLE {table} ADD COLUMN status TEXT']))
+        with pytest.raises(Exception):
+            migrate(backend.DATABASE_URL, steps, table=versions)
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT version, name FROM {versions} ORDER BY version')
+            assert cursor.fetchall() == [(1, 'add column'), (2, 'index')]
+
+    def test_failed_concurrent_build_is_rebuilt(self, scratch):
+        """Test an INVALID index from a failed concurrent build is dropped and built again"""
+        backend, table, versions = scratch
+        name = f'idx_{table}_email'
+        with backend.db_connection() as conn:
+            conn.cursor().execute(f"INSERT INTO {table} (email) VALUES ('a@x.com'), ('a@x.com')")
+        steps = [Migration(1, 'unique email', [Index(name, table, 'email', unique=True)])]
+
+        with pytest.raises(Exception):
+            migrate(backend.DATABASE_URL, steps, table=versions)
+        assert self.index_valid(backend, name) is False
+
+        with backend.db_connection() as conn:
+            conn.cursor().execute(f"DELETE FROM {table} WHERE id = (SELECT MAX(id) FROM {table})")
+        assert migrate(backend.DATABASE_URL, steps, table=versions) == [1]
+        assert self.index_valid(backend, name) is True
+
+    def test_init_db_records_migrations(self, scratch):
+        """Test init_db leaves every migration applied"""
+        backend, _, _ = scratch
+        backend.init_db()
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version FROM schema_version ORDER BY version')
+            assert [row[0] for row in cursor.fetchall()] == [m.version for m in MIGRATIONS]
+
+    def test_existing_database_is_migrated(self, scratch, monkeypatch):
+        """Test a database from before the migrations gets them on the first request"""
+        backend, _, _ = scratch
+        backend.init_db()
+        # What a deployed database looked like: base tables only
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DROP TABLE schema_version')
+            for table in ('export_jobs', 'export_watermarks', 'recruiter_stats_counters', 'cache_versions',
+                          'shared_sessions'):
+                cursor.execute(f'DROP TABLE {table}')
+            cursor.execute('DROP INDEX idx_users_created_at_id')
+            cursor.execute('''
+                ALTER TABLE emails DROP COLUMN status, DROP COLUMN attempts, DROP COLUMN next_attempt_at,
+                DROP COLUMN last_error, DROP COLUMN delivered_at, DROP COLUMN batch_id
+            ''')
+            cursor.execute('ALTER TABLE applications DROP COLUMN resume_sha256, DROP COLUMN resume_size, DROP COLUMN resume_mime')
+            for table in ('users', 'applications'):
+                cursor.execute(f'DROP TRIGGER {table}_set_updated_at ON {table}')
+                cursor.execute(f'ALTER TABLE {table} DROP COLUMN updated_at')
+        monkeypatch.setattr(backend, '_db_initialized', False)
+        monkeypatch.setattr(backend, '_db_init_failed_at', 0.0)
+
+        client = backend.app.test_client()
+        assert client.get('/health').status_code == 200
+        assert client.get('/api/emails').status_code == 200
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version FROM schema_version ORDER BY version')
+            assert [row[0] for row in cursor.fetchall()] == [m.version for m in MIGRATIONS]
+            for table in ('export_jobs', 'export_watermarks', 'recruiter_stats_counters', 'cache_versions',
+                          'shared_sessions'):
+                cursor.execute('SELECT to_regclass(%s)', (table,))
+                assert cursor.fetchone()[0] == table
+            cursor.execute("SELECT version FROM cache_versions WHERE name = 'weekly_tasks'")
+            assert cursor.fetchone() == (0,)
+        assert self.index_valid(backend, 'idx_users_created_at_id') is True
+        assert self.index_valid(backend, 'idx_applications_resume_sha256') is True
+        assert self.index_valid(backend, 'idx_users_updated_at_id') is True
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users WHERE updated_at IS NULL OR updated_at <> created_at")
+            assert cursor.fetchone() == (0,)
+
+    def test_first_request_does_not_wait_for_migration_lock(self, scratch, monkeypatch):
+        """Test a worker skips migrating while another process holds the lock, then backs off"""
+        import psycopg2
+        import migrations
+        backend, table, versions = scratch
+        backend.init_db()
+        steps = [Migration(1, 'noop', ['SELECT 1'])]
+        holder = psycopg2.connect(backend.DATABASE_URL)
+        try:
+            holder.cursor().execute('SELECT pg_advisory_lock(%s)', (migrations.MIGRATION_LOCK_ID,))
+            assert migrate(backend.DATABASE_URL, steps, table=versions, wait=False) is None
+
+            monkeypatch.setattr(backend, '_db_initialized', False)
+            monkeypatch.setattr(backend, '_db_init_failed_at', 0.0)
+            assert backend.lazy_init_db() is False
+            assert backend._db_init_failed_at > 0
+
+            # Within the retry delay the database is not touched at all
+            monkeypatch.setattr(migrations, 'migrate', lambda *args, **kwargs: pytest.fail('migrated'))
+            assert backend.app.test_client().get('/health').status_code == 200
+            assert backend.lazy_init_db() is False
+        finally:
+            holder.close()
+        monkeypatch.undo()
+        assert migrate(backend.DATABASE_URL, steps, table=versions, wait=False) == [1]
+
+    def test_route_queries_use_indexes(self, scratch):
+        """Test every hot route query is planned on its index"""
+        backend, _, _ = scratch
+        backend.init_db()
+        with backend.db_connection() as conn:
+            report = explain_routes(conn.cursor())
+        missing = [(route, expected, used) for route, expected, used, _ in report if not used & set(expected)]
+        assert missing == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
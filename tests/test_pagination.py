@@ -0,0 +1,223 @@
+"""
+Unit tests for keyset pagination (pagination.py) and the paginated admin listings
+"""
+
+import pytest
+import sys
+import os
+import secrets
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pagination import (InvalidPageRequest, encode_cursor, decode_cursor, decode_time_cursor,
+                        page_limit, parse_fields, parse_date, page_response)
+
+
+class TestPaginationHelpers:
+    """Test cursor encoding and parameter parsing"""
+
+    def test_cursor_round_trip(self):
+        """Test a (timestamp, id) cursor keeps microseconds"""
+        ts = datetime(2025, 1, 31, 23, 59, 59, 123456)
+        assert decode_time_cursor(encode_cursor(ts, 42)) == (ts, 42)
+        assert decode_time_cursor(None) is None
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors are rejected"""
+        for token in ('not-base64!', encode_cursor(1), encode_cursor('yesterday', 1)):
+            with pytest.raises(InvalidPageRequest):
+                decode_time_cursor(token)
+        with pytest.raises(InvalidPageRequest):
+            decode_cursor(encode_cursor(1, 2, 3))
+
+    def test_page_limit(self):
+        """Test page size defaults and clamping"""
+        assert page_limit(None, default=50) == 50
+        assert page_limit('0') == 1
+        assert page_limit('100000', maximum=500) == 500
+        with pytest.raises(InvalidPageRequest):
+            page_limit('ten')
+
+    def test_parse_fields(self):
+        """Test projections keep declared order and required fields"""
+        allowed = {'id': 'id', 'name': 'name', 'about': 'about'}
+        assert parse_fields(None, allowed) == ['id', 'name', 'about']
+        assert parse_fields('about,name', allowed, required=('id',)) == ['id', 'name', 'about']
+        with pytest.raises(InvalidPageRequest):
+            parse_fields('password_hash', allowed)
+
+    def test_parse_date(self):
+        """Test a bare end date covers the whole day"""
+        assert parse_date('2025-03-01') == datetime(2025, 3, 1)
+        assert parse_date('2025-03-01', end=True) == datetime(2025, 3, 2)
+        assert parse_date('2025-03-01T10:30:00', end=True) == datetime(2025, 3, 1, 10, 30)
+        with pytest.raises(InvalidPageRequest):
+            parse_date('March 1st')
+
+    def test_page_response(self):
+        """Test the extra row becomes a cursor for the last returned row"""
+        rows = [(3, 'c'), (2, 'b'), (1, 'a')]
+        page, cursor = page_response(rows, 2, key=lambda row: (row[1], row[0]))
+        assert page == rows[:2]
+        assert decode_cursor(cursor) == ['b', 2]
+        assert page_response(rows, 3, key=lambda row: row) == (rows, None)
+
+
+class TestApplicationListing:
+    """Test /api/admin/applications paging, filters and projection (requires database)"""
+
+    @pytest.fixture
+    def applications(self):
+        import backend
+        position = f'Pager-{secrets.token_hex(4)}'
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                ids = []
+                for i in range(5):
+                    # Two rows share a timestamp so the id tie-breaker matters
+                    cursor.execute('''
+                        INSERT INTO applications (position, full_name, email, phone, address, college,
+                                                  degree, semester, year, about, resume_name, status, applied_at)
+                        VALUES (%s, %s, %s, '1', 'a', %s, 'd', 's', 'y', 'long text', 'r.pdf', %s,
+                                TIMESTAMP '2025-01-01 12:00:00' + %s * INTERVAL '1 minute')
+                        RETURNING id
+                    ''', (position, f'Pager {i}', f'pager-{i}@example.com', 'MIT' if i % 2 else 'IIT',
+                          'selected' if i == 4 else 'pending', min(i, 3)))
+                    ids.append(cursor.fetchone()[0])
+        except Exception:
+            pytest.skip("Database not available")
+        yield position, ids
+        with backend.db_connection() as conn:
+            conn.cursor().execute('DELETE FROM applications WHERE id = ANY(%s)', (ids,))
+
+    def test_pages_cover_every_row_once(self, applications):
+        """Test following next_cursor walks all rows newest first"""
+        from backend import app
+        position, ids = applications
+        client = app.test_client()
+        seen, cursor = [], None
+        while True:
+            query = {'position': position, 'limit': 2}
+            if cursor:
+                query['cursor'] = cursor
+            data = client.get('/api/admin/applications', query_string=query).get_json()
+            seen.extend(application['id'] for application in data['applications'])
+            cursor = data['next_cursor']
+            assert data['has_more'] == (cursor is not None)
+            if not cursor:
+                break
+        assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    def test_filters_and_fields(self, applications):
+        """Test server-side filters and the fields projection"""
+        from backend import app
+        position, ids = applications
+        client = app.test_client()
+        data = client.get('/api/admin/applications', query_string={
+            'position': position, 'college': 'MIT', 'fields': 'fullName,status'}).get_json()
+        assert data['applications'] == [
+            {'id': ids[3], 'fullName': 'Pager 3', 'status': 'pending'},
+            {'id': ids[1], 'fullName': 'Pager 1', 'status': 'pending'},
+        ]
+        data = client.get('/api/admin/applications', query_string={
+            'position': position, 'status': 'selected'}).get_json()
+        assert [application['id'] for application in data['applications']] == [ids[4]]
+        assert data['applications'][0]['about'] == 'long text'
+
+    def test_bad_parameters(self, applications):
+        """Test invalid cursors and fields are rejected with 400"""
+        from backend import app
+        client = app.test_client()
+        assert client.get('/api/admin/applications?cursor=garbage').status_code == 400
+        assert client.get('/api/admin/applications?fields=password').status_code == 400
+
+
+class TestUserAndEmailListing:
+    """Test /api/users and /api/emails paging, date ranges and summaries (requires database)"""
+
+    @pytest.fixture
+    def user_with_emails(self):
+        import backend
+        email = f'pager-{secrets.token_hex(4)}@example.com'
+        try:
+            with backend.db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO users (name, email, phone, address, password_hash, created_at)
+                    VALUES ('Pager', %s, '1', 'a', 'x', '1999-06-15 08:00:00')
+                    RETURNING id
+                ''', (email,))
+                user_id = cursor.fetchone()[0]
+                for i in range(3):
+                    cursor.execute('''
+                        INSERT INTO emails (to_email, subject, body, user_id, sent_at)
+                        VALUES (%s, %s, 'Body text', %s, TIMESTAMP '1999-06-15 09:00:00' + %s * INTERVAL '1 day')
+                    ''', (email, f'Subject {i}', user_id, i))
+        except Exception:
+            pytest.skip("Database not available")
+        yield user_id
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM emails WHERE user_id = %s', (user_id,))
+            cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+
+    def test_users_date_range(self, user_with_emails):
+        """Test created_at range filtering with an inclusive end date"""
+        from backend import app
+        client = app.test_client()
+        data = client.get('/api/users?since=1999-06-15&until=1999-06-15').get_json()
+        assert [user['id'] for user in data['users']] == [user_with_emails]
+        assert data['has_more'] is False
+        assert client.get('/api/users?since=1999-06-16&until=1999-06-20').get_json()['users'] == []
+
+    def test_emails_pages_and_summary(self, user_with_emails):
+        """Test summary pages leave out bodies, which are fetched by id"""
+        from backend import app
+        client = app.test_client()
+        query = {'user_id': user_with_emails, 'summary': 'true', 'limit': 2}
+        first = client.get('/api/emails', query_string=query).get_json()
+        assert [email['subject'] for email in first['emails']] == ['Subject 2', 'Subject 1']
+        assert 'body' not in first['emails'][0]
+        second = client.get('/api/emails', query_string=dict(query, cursor=first['next_cursor'])).get_json()
+        assert [email['subject'] for email in second['emails']] == ['Subject 0']
+        assert second['next_cursor'] is None
+
+        email = client.get(f"/api/emails/{second['emails'][0]['id']}").get_json()
+        assert email['body'] == 'Body text'
+        assert client.get('/api/emails/999999999').status_code == 404
+
+        ranged = client.get('/api/emails', query_string={'user_id': user_with_emails, 'until': '1999-06-16'})
+        assert [email['subject'] for email in ranged.get_json()['emails']] == ['Subject 1', 'Subject 0']
+        assert client.get('/api/emails?user_id=abc').status_code == 400
+
+    def test_all_admin_data_embeds_projects(self, user_with_emails):
+        """Test /api/admin/all-data returns each user's projects in one response"""
+        import backend
+        with backend.db_connection() as conn:
+            cursor = conn.cursor()
+            for name in ('First', 'Second'):
+                cursor.execute('''
+                    INSERT INTO projects (user_id, name, description, status, updated_at)
+                    VALUES (%s, %s, 'd', 'planning', TIMESTAMP '1999-06-15 10:00:00' + %s * INTERVAL '1 hour')
+                ''', (user_with_emails, name, len(name)))
+        try:
+            client = backend.app.test_client()
+            users, cursor = [], None
+            while True:
+                data = client.get('/api/admin/all-data', query_string={'limit': 50, 'cursor': cursor or ''}).get_json()
+                users.extend(data['users'])
+                cursor = data['next_cursor']
+                if not cursor:
+                    break
+            user = next(u for u in users if u['id'] == user_with_emails)
+            assert [project['name'] for project in user['projects']] == ['Second', 'First']
+            assert all(isinstance(u['projects'], list) for u in users)
+        finally:
+            with backend.db_connection() as conn:
+                conn.cursor().execute('DELETE FROM projects WHERE user_id = %s', (user_with_emails,))
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,134 @@
+"""
+Unit tests for salted password hashing (passwords.py) and login rehashing
+"""
+
+import pytest
+import sys
+import os
+import hashlib
+import threading
+import secrets
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import passwords
+from passwords import hash_password, verify_password, PasswordHasherBusy
+
+
+@pytest.fixture
+def cheap_cost(monkeypatch):
+    """Keep KDF cost low so the suite stays fast"""
+    monkeypatch.setattr(passwords, 'SCRYPT_N', 2 ** 10)
+    monkeypatch.setattr(passwords, 'PBKDF2_ITERATIONS', 1000)
+
+
+class TestPasswordHashing:
+    """Test hash format, salting and verification"""
+
+    @pytest.mark.parametrize('algorithm', ['scrypt', 'pbkdf2_sha256'])
+    def test_round_trip(self, algorithm, monkeypatch, cheap_cost):
+        """Test each algorithm verifies its own hashes"""
+        if algorithm == 'scrypt' and not passwords.HAS_SCRYPT:
+            pytest.skip("hashlib.scrypt not available")
+        monkeypatch.setattr(passwords, 'ALGORITHM', algorithm)
+        hashed = hash_password('S3cret!')
+        assert hashed.startswith(algorithm + '$')
+        assert verify_password('S3cret!', hashed) == (True, False)
+        assert verify_password('wrong', hashed)[0] is False
+
+    def test_salted(self, cheap_cost):
+        """Test the same password hashes differently each time"""
+        assert hash_password('same') != hash_password('same')
+
+    def test_legacy_sha256_needs_rehash(self):
+        """Test old unsalted SHA-256 hashes still verify and are flagged"""
+        legacy = hashlib.sha256(b'oldpass').hexdigest()
+        assert verify_password('oldpass', legacy) == (True, True)
+        assert verify_password('nope', legacy)[0] is False
+
+    def test_cost_change_needs_rehash(self, monkeypatch, cheap_cost):
+        """Test hashes made with an older cost are flagged for upgrade"""
+        monkeypatch.setattr(passwords, 'ALGORITHM', 'pbkdf2_sha256')
+        hashed = hash_password('pw')
+        monkeypatch.setattr(passwords, 'PBKDF2_ITERATIONS', 2000)
+        assert verify_password('pw', hashed) == (True, True)
+
+    def test_malformed_hash_rejected(self):
+        """Test garbage in the password column never verifies"""
+        for stored in ('', None, 'scrypt$x$y', 'pbkdf2_sha256$10$zz$zz', 'plaintext'):
+            assert verify_password('plaintext', stored)[0] is False
+
+    def test_busy_when_queue_full(self, monkeypatch):
+        """Test a burst beyond the queue limit fails fast instead of piling up"""
+        monkeypatch.setattr(passwords, '_pending', threading.BoundedSemaphore(1))
+        monkeypatch.setattr(passwords, 'HASH_QUEUE_TIMEOUT', 0.01)
+        passwords._pending.acquire()
+        try:
+            with pytest.raises(PasswordHasherBusy):
+                hash_password('pw')
+        finally:
+            passwords._pending.release()
+
+    def test_calibrate(self):
+        """Test the calibration benchmark recommends a cost"""
+        results = passwords.calibrate(target_ms=5, rounds=1)
+        assert results['pbkdf2_sha256']['iterations'] >= 10000
+        if passwords.HAS_SCRYPT:
+            assert results['scrypt']['n'] >= 2 ** 10
+
+
+class TestLoginRehash:
+    """Test logins upgrade legacy hashes (requires database)"""
+
+    @pytest.fixture
+    def legacy_user(self):
+        from backend import app, get_db_connection
+        email = f'legacy_{secrets.token_hex(4)}@test.com'
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO users (name, email, phone, address, password_hash)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', ('Legacy User', email, '1234567890', '1 Test St', hashlib.sha256(b'oldpass1').hexdigest()))
+            conn.commit()
+            conn.close()
+        except Exception:
+            pytest.skip("Database not available")
+        yield app.test_client(), email
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM sessions WHERE user_id IN (SELECT id FROM users WHERE email = %s)', (email,))
+        cursor.execute('DELETE FROM users WHERE email = %s', (email,))
+        conn.commit()
+        conn.close()
+
+    def test_legacy_hash_upgraded_on_login(self, legacy_user):
+        """Test a successful login replaces the SHA-256 hash with a salted one"""
+        from backend import get_db_connection
+        client, email = legacy_user
+        response = client.post('/api/login', json={'email': email, 'password': 'oldpass1'})
+        assert response.status_code == 200
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT password_hash FROM users WHERE email = %s', (email,))
+        stored = cursor.fetchone()[0]
+        conn.close()
+        assert '$' in stored
+        assert verify_password('oldpass1', stored) == (True, False)
+
+        # The upgraded hash still logs in
+        response = client.post('/api/login', json={'email': email, 'password': 'oldpass1'})
+        assert response.status_code == 200
+
+    def test_wrong_password_not_upgraded(self, legacy_user):
+        """Test a failed login leaves the stored hash alone"""
+        client, email = legacy_user
+        response = client.post('/api/login', json={'email': email, 'password': 'wrong'})
+        assert response.status_code == 401
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
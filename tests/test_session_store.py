@@ -0,0 +1,172 @@
+"""
+Unit tests for the shared admin/intern session stores (session_store.py)
+"""
+
+import pytest
+import sys
+import os
+import time
+import secrets
+import hashlib
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from session_store import (MemorySessionStore, FileSessionStore, PostgresSessionStore,
+                           SessionSweeper, create_session_store)
+
+
+@pytest.fixture(params=['memory', 'file'])
+def store(request, tmp_path):
+    """Each local backend"""
+    if request.param == 'memory':
+        return MemorySessionStore('admin', ttl=60)
+    return FileSessionStore('admin', ttl=60, directory=str(tmp_path))
+
+
+class TestSessionStore:
+    """Test the dict-style interface shared by every backend"""
+
+    def test_set_and_get(self, store):
+        """Test a stored session can be read back"""
+        store['tok'] = {'email': 'admin@test.com', 'role': 'admin'}
+        assert 'tok' in store
+        assert store['tok']['email'] == 'admin@test.com'
+        assert store.get('tok', {}).get('role') == 'admin'
+
+    def test_missing_token(self, store):
+        """Test unknown and empty tokens are rejected"""
+        assert 'nope' not in store
+        assert '' not in store
+        assert store.get('nope', {}) == {}
+        with pytest.raises(KeyError):
+            store['nope']
+
+    def test_delete(self, store):
+        """Test logout removes the session"""
+        store['tok'] = {'email': 'admin@test.com'}
+        del store['tok']
+        assert 'tok' not in store
+
+    def test_expired_sessions_rejected(self, store):
+        """Test sessions stop verifying after their TTL"""
+        store.set('tok', {'email': 'admin@test.com'}, ttl=0.01)
+        time.sleep(0.02)
+        assert 'tok' not in store
+
+    def test_sweep_removes_expired(self, store):
+        """Test the sweeper removes only expired sessions"""
+        store.set('old', {'email': 'a@test.com'}, ttl=0.01)
+        store.set('new', {'email': 'b@test.com'})
+        time.sleep(0.02)
+        assert store.sweep() == 1
+        assert 'new' in store
+
+
+class TestFileSessionStore:
+    """Test cross-worker sharing on one host"""
+
+    def test_sessions_shared_between_instances(self, tmp_path):
+        """Test a token issued by one worker verifies in another"""
+        worker_a = FileSessionStore('admin', directory=str(tmp_path))
+        worker_b = FileSessionStore('admin', directory=str(tmp_path))
+        worker_a['tok'] = {'email': 'admin@test.com'}
+        assert worker_b['tok']['email'] == 'admin@test.com'
+        del worker_b['tok']
+        assert 'tok' not in worker_a
+
+    def test_namespaces_isolated(self, tmp_path):
+        """Test admin tokens do not verify as intern tokens"""
+        admin = FileSessionStore('admin', directory=str(tmp_path))
+        intern = FileSessionStore('intern', directory=str(tmp_path))
+        admin['tok'] = {'role': 'admin'}
+        assert 'tok' not in intern
+
+    def test_token_not_used_as_filename(self, tmp_path):
+        """Test raw tokens never appear on disk as file names"""
+        store = FileSessionStore('admin', directory=str(tmp_path))
+        store['../../etc/passwd'] = {'role': 'admin'}
+        assert os.listdir(store.directory) == [hashlib.sha256(b'../../etc/passwd').hexdigest()]
+
+
+class TestPostgresSessionStore:
+    """Test the PostgreSQL backend (requires DATABASE_URL)"""
+
+    @pytest.fixture
+    def pg_store(self):
+        from backend import db_connection, init_db
+        try:
+            init_db()
+        except Exception:
+            pytest.skip("Database not available")
+        return lambda: PostgresSessionStore('test', db_connection, cache_ttl=60)
+
+    def test_shared_between_workers(self, pg_store):
+        """Test a token written by one worker verifies in another"""
+        worker_a, worker_b = pg_store(), pg_store()
+        token = secrets.token_hex(16)
+        worker_a[token] = {'email': 'admin@test.com'}
+        assert worker_b[token] == {'email': 'admin@test.com'}
+        del worker_a[token]
+        assert token not in worker_a
+        assert token not in pg_store()
+
+    def test_local_cache_serves_hits(self, pg_store, monkeypatch):
+        """Test repeated verification does not hit the database"""
+        store = pg_store()
+        token = secrets.token_hex(16)
+        store[token] = {'email': 'admin@test.com'}
+        monkeypatch.setattr(store, '_connection', None)
+        assert token in store
+        assert store[token]['email'] == 'admin@test.com'
+
+    def test_request_shares_the_request_connection(self, pg_store):
+        """Test a login inside a request writes on the request transaction"""
+        from backend import app, db_connection, session_db_connection
+        store = PostgresSessionStore('test', session_db_connection)
+        token = secrets.token_hex(16)
+        with app.test_request_context('/'):
+            store[token] = {'email': 'admin@test.com'}
+            assert pg_store().get(token) is None   # not committed yet
+            app.process_response(app.response_class('ok'))
+        assert pg_store()[token] == {'email': 'admin@test.com'}
+        del store[token]
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM shared_sessions WHERE token = %s", (token,))
+            assert cursor.fetchone() == (0,)
+
+
+class TestSessionSweeper:
+    """Test the background sweeper"""
+
+    def test_sweep_once(self):
+        """Test one sweep pass covers every store"""
+        admin = MemorySessionStore('admin')
+        intern = MemorySessionStore('intern')
+        admin.set('a', {}, ttl=0.01)
+        intern.set('b', {}, ttl=0.01)
+        time.sleep(0.02)
+        assert SessionSweeper([admin, intern]).sweep_once() == 2
+
+    def test_thread_started_once_per_process(self):
+        """Test ensure_running starts a single daemon thread"""
+        sweeper = SessionSweeper([], interval=3600)
+        sweeper.ensure_running()
+        thread = sweeper._thread
+        sweeper.ensure_running()
+        assert sweeper._thread is thread
+        assert thread.daemon
+
+
+def test_create_session_store_backends(tmp_path, monkeypatch):
+    """Test SESSION_BACKEND selects the store"""
+    monkeypatch.setenv('SESSION_DIR', str(tmp_path))
+    assert isinstance(create_session_store('admin', backend='memory'), MemorySessionStore)
+    assert isinstance(create_session_store('admin', backend='file'), FileSessionStore)
+    with pytest.raises(ValueError):
+        create_session_store('admin', backend='redis')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
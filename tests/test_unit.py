@@ -13,7 +13,7 @@ import hashlib
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import Flask app
-from backend import app, hash_password, get_db_connection
+from backend import app, hash_password, verify_password, get_db_connection
 
 @pytest.fixture
 def client():
@@ -68,15 +68,14 @@ class TestSecurity:
         password = "TestPassword123"
         hashed = hash_password(password)
         assert hashed != password
-        assert len(hashed) == 64  # SHA-256 hex length
+        assert password not in hashed
     
     def test_password_verification(self):
         """Test password verification"""
         password = "TestPassword123"
         hashed = hash_password(password)
-        # Verify by hashing again and comparing
-        assert hash_password(password) == hashed
-        assert hash_password("WrongPassword") != hashed
+        assert verify_password(password, hashed) == (True, False)
+        assert verify_password("WrongPassword", hashed)[0] is False
 
 class TestUserAuthentication:
     """Test user registration and login"""
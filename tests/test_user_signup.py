@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import pytest
 import json
 from datetime import datetime
-from backend import app, get_db_connection, hash_password, USE_POSTGRES
+from backend import app, get_db_connection, hash_password, verify_password, USE_POSTGRES
 
 @pytest.fixture
 def client():
@@ -192,12 +192,8 @@ class TestUserSignup:
         assert result is not None
         password_hash = result[0]
         assert password_hash != password  # Password should be hashed
-        assert len(password_hash) == 64  # SHA256 hash length
-        # Verify it's a valid hex string
-        try:
-            int(password_hash, 16)
-        except ValueError:
-            pytest.fail("Password hash is not a valid hexadecimal string")
+        assert password_hash.split('$')[0] in ('scrypt', 'pbkdf2_sha256')  # Salted KDF, not bare SHA-256
+        assert verify_password(password, password_hash)[0]
 
 
 class TestUserDashboardDisplay: